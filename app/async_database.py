@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from functools import partial
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from app.cache import LRUCache
+from app.ids import parse_submission_id
+from app.models import (
+    DashboardStats,
+    MediaFile,
+    ReviewStats,
+    RollupReport,
+    SearchCursor,
+    SearchPage,
+    Submission,
+    SubmissionStatus,
+    TagUsage,
+    UserSummary,
+)
+from app.repository import SubmissionRepository, WriteOp
+from app.rollups import DAY
+
+T = TypeVar("T")
+
+
+class AsyncDatabase:
+    """存储后端（SubmissionRepository）的异步外观。
+
+    写操作全部投递到唯一的 DB 写线程（保持顺序），读操作走与只读连接池同样大小的线程池，
+    事件循环上只剩 await；同时用信号量限制排队中的请求数，避免突发流量把内存撑爆。
+
+    前面挂一层 Submission 读穿透缓存：审核过程中反复读取的待审投稿直接从内存返回，
+    所有写操作都会同步更新或失效对应条目。缓存只在事件循环线程访问，返回的都是副本。
+    ``/my`` 的个人概况按 user_id 另行缓存，该用户的投稿有写入时失效，反复刷新不产生数据库查询。
+
+    后端声明 ``blocking = False``（如内存引擎）时不经过线程池，直接在事件循环上执行。
+    """
+
+    def __init__(
+        self,
+        db: SubmissionRepository,
+        max_pending: int = 256,
+        cache_size: int = 512,
+        cache_ttl: Optional[float] = 600,
+        summary_cache_size: int = 1024,
+        summary_cache_ttl: Optional[float] = 300,
+    ):
+        self.db = db
+        self.cache: LRUCache[int, Submission] = LRUCache(cache_size, cache_ttl)
+        self.summary_cache: LRUCache[int, UserSummary] = LRUCache(summary_cache_size, summary_cache_ttl)
+        # 每次写入递增；读请求返回时若期间发生过写入，则不回填缓存，避免写回旧数据
+        self._write_generation = 0
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="femsub-db-write")
+        self._read_executor = ThreadPoolExecutor(
+            max_workers=db.read_pool_size, thread_name_prefix="femsub-db-read"
+        )
+        self._pending = asyncio.Semaphore(max_pending)
+
+    async def _submit(self, executor: ThreadPoolExecutor, func: Callable[..., T], *args, **kwargs) -> T:
+        if not self.db.blocking:
+            return func(*args, **kwargs)
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+    async def write(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """在 DB 写线程上执行任意同步函数。"""
+        return await self._submit(self._write_executor, func, *args, **kwargs)
+
+    async def write_op(self, op: WriteOp) -> Any:
+        """执行 Database 生成的写操作；组提交模式下直接入队，等所在批次落盘后返回。"""
+        if self.db.write_behind:
+            async with self._pending:
+                return await asyncio.wrap_future(self.db.submit_write(op))
+        return await self.write(lambda: self.db.submit_write(op).result())
+
+    async def read(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """借一个只读连接执行 ``func(conn, *args)``，仅 SQLite 后端可用。"""
+
+        def _with_reader():
+            with self.db.reader() as conn:
+                return func(conn, *args, **kwargs)
+
+        return await self._submit(self._read_executor, _with_reader)
+
+    def _invalidate_summaries(self, user_ids: Iterable[Optional[int]]):
+        """让这些用户的概况缓存失效。
+
+        写入前后各调用一次：写入期间开始的读取可能读到旧数据，
+        写完再推进一次代数，这类读取的结果就不会被写进缓存。
+        """
+        self._write_generation += 1
+        for user_id in set(user_ids):
+            if user_id is not None:
+                self.summary_cache.delete(user_id)
+
+    async def save_submission(self, submission: Submission):
+        previous = self.cache.peek(submission.submission_id)
+        owners = {submission.user_id, previous.user_id if previous is not None else None}
+        self._invalidate_summaries(owners)
+        try:
+            await self.write_op(self.db.save_submission_op(submission))
+            submission.mark_clean()
+        except Exception:
+            self.cache.delete(submission.submission_id)
+            raise
+        finally:
+            self._invalidate_summaries(owners)
+        if submission.media_loaded:
+            self.cache.set(submission.submission_id, _copy_submission(submission))
+            return
+        cached = self.cache.peek(submission.submission_id)
+        if cached is not None:
+            # 本次保存未带媒体：沿用缓存里已加载的媒体列表
+            self.cache.set(
+                submission.submission_id,
+                _copy_submission(submission, media_files=cached.media_files, media_loaded=cached.media_loaded),
+            )
+
+    async def resolve_id(self, raw_id: Union[int, str]) -> Optional[int]:
+        """把 callback_data 等处的 ID 解析为整数主键，兼容迁移前的文本 ID。"""
+        submission_id = parse_submission_id(raw_id)
+        if isinstance(submission_id, int):
+            return submission_id
+        return await self._submit(self._read_executor, self.db.resolve_legacy_id, submission_id)
+
+    async def get_submission(self, raw_id: Union[int, str], with_media: bool = True) -> Optional[Submission]:
+        submission_id = await self.resolve_id(raw_id)
+        if submission_id is None:
+            return None
+        cached = self.cache.get(submission_id)
+        if cached is not None:
+            if not with_media or cached.media_loaded:
+                return _copy_submission(cached)
+            generation = self._write_generation
+            media_files = await self.get_media(submission_id)
+            if generation == self._write_generation:
+                cached = _copy_submission(cached, media_files=media_files, media_loaded=True)
+                self.cache.set(submission_id, cached)
+                return _copy_submission(cached)
+
+        generation = self._write_generation
+        submission = await self._submit(self._read_executor, self.db.get_submission, submission_id, with_media)
+        if submission is not None and generation == self._write_generation:
+            self.cache.set(submission_id, _copy_submission(submission))
+        return submission
+
+    async def get_submissions(self, submission_ids: Sequence[int], with_media: bool = True) -> List[Submission]:
+        return await self._submit(self._read_executor, self.db.get_submissions, submission_ids, with_media)
+
+    async def get_media(self, submission_id: int) -> List[MediaFile]:
+        return await self._submit(self._read_executor, self.db.get_media, submission_id)
+
+    async def get_dashboard_stats(self) -> DashboardStats:
+        return await self._submit(self._read_executor, self.db.get_dashboard_stats)
+
+    async def get_user_summary(self, user_id: int, username: str) -> UserSummary:
+        cached = self.summary_cache.get(user_id)
+        if cached is not None:
+            return replace(cached, username=username)
+        generation = self._write_generation
+        summary = await self._submit(self._read_executor, self.db.get_user_summary, user_id, username)
+        if generation == self._write_generation:
+            self.summary_cache.set(user_id, summary)
+        return summary
+
+    async def search_submissions(
+        self, query: str, after: Optional[SearchCursor] = None, limit: int = 10
+    ) -> SearchPage:
+        return await self._submit(self._read_executor, self.db.search_submissions, query, after, limit)
+
+    async def get_popular_tags(self, limit: int = 20) -> List[TagUsage]:
+        return await self._submit(self._read_executor, self.db.get_popular_tags, limit)
+
+    async def get_submissions_by_tag(
+        self, tag: str, before: Optional[int] = None, limit: int = 10
+    ) -> List[Submission]:
+        return await self._submit(self._read_executor, self.db.get_submissions_by_tag, tag, before, limit)
+
+    async def backfill_rollups(self, granularity: str, start: int):
+        """迁移前的历史汇总按需补算：在读线程上检查，补算作为写操作分批交给写线程。"""
+        if not await self._submit(self._read_executor, self.db.rollups_pending, granularity, start):
+            return
+        while await self.write_op(self.db.backfill_rollups_op(granularity, start)):
+            pass
+
+    async def get_rollups(self, granularity: str, start: int, end: int) -> RollupReport:
+        await self.backfill_rollups(granularity, start)
+        return await self._submit(self._read_executor, self.db.get_rollups, granularity, start, end)
+
+    async def get_tag_rollups(self, tag: str, start: int, end: int) -> List[Tuple[int, int]]:
+        await self.backfill_rollups(DAY, start)
+        return await self._submit(self._read_executor, self.db.get_tag_rollups, tag, start, end)
+
+    async def get_review_stats(self, start: int, end: int, limit: int = 10) -> ReviewStats:
+        return await self._submit(self._read_executor, self.db.get_review_stats, start, end, limit)
+
+    async def update_fields(self, submission_id: int, **changes: Any) -> bool:
+        cached = self.cache.peek(submission_id)
+        owners = {changes.get("user_id"), cached.user_id if cached is not None else None}
+        self._invalidate_summaries(owners)
+        owner = None
+        try:
+            # 写操作返回投稿原来的 user_id，缓存里没有这条投稿时也能只失效它的主人
+            owner = await self.write_op(self.db.update_fields_op(submission_id, **changes))
+        except Exception:
+            self.cache.delete(submission_id)
+            raise
+        finally:
+            self._invalidate_summaries(owners | {owner})
+
+        updated = owner is not None
+        cached = self.cache.peek(submission_id)
+        if cached is not None and updated:
+            for name, value in changes.items():
+                setattr(cached, name, list(value) if name == "media_files" else value)
+            if "media_files" in changes:
+                cached.media_loaded = True
+            cached.mark_clean()
+        elif cached is not None:
+            self.cache.delete(submission_id)
+        return updated
+
+    async def save_changes(self, submission: Submission) -> bool:
+        """只把 Submission 上被修改过的字段写回数据库。"""
+        changes = submission.dirty_fields()
+        if not changes:
+            return False
+        updated = await self.update_fields(submission.submission_id, **changes)
+        submission.mark_clean()
+        return updated
+
+    async def update_submission_status(self, submission_id: int, status: SubmissionStatus):
+        await self.update_fields(submission_id, status=status)
+
+    async def update_submission_caption(self, submission_id: int, caption: str):
+        await self.update_fields(submission_id, caption=caption)
+
+    async def update_submission_tags(self, submission_id: int, tags: List[str]):
+        await self.update_fields(submission_id, tags=" ".join(tags))
+
+    async def close(self):
+        # 先让排队中的写入（包括组提交队列）全部落盘，再关闭连接
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self):
+        self._write_executor.shutdown(wait=True)
+        self._read_executor.shutdown(wait=True)
+        self.db.close()
+
+
+def _copy_submission(submission: Submission, **overrides: Any) -> Submission:
+    """缓存内外不共享可变对象（media_files 列表、脏字段集合）。"""
+    overrides.setdefault("media_files", list(submission.media_files))
+    return replace(submission, **overrides)
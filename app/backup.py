@@ -0,0 +1,128 @@
+"""
+在线备份：用 SQLite backup API 分步复制数据库，机器人无需停机。
+
+每一步只复制 ``pages_per_step`` 个页面，步与步之间释放锁并短暂休眠，写入可以继续进行；
+其它连接在备份期间修改了数据时，SQLite 会在下一步自动从头重新复制，保证快照一致。
+复制先写到临时文件，``PRAGMA integrity_check`` 通过后才改名为正式备份，随后按数量轮换旧文件。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKUP_PREFIX = "femsub-"
+BACKUP_SUFFIX = ".db"
+
+
+class BackupError(RuntimeError):
+    """备份副本未通过完整性校验。"""
+
+
+@dataclass(frozen=True)
+class BackupResult:
+    path: Path
+    duration: float
+    size_bytes: int
+    pages: int
+
+
+class BackupManager:
+    """定时备份 + 轮换，统计信息供 /metrics 展示。同一时间只允许一个备份在运行。"""
+
+    def __init__(
+        self,
+        db_path: str,
+        backup_dir: str = "backups",
+        keep: int = 7,
+        pages_per_step: int = 256,
+        step_sleep: float = 0.005,
+    ):
+        self.db_path = db_path
+        self.backup_dir = Path(backup_dir)
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self._lock = threading.Lock()
+        self.backups_ok = 0
+        self.backups_failed = 0
+        self.last_result: Optional[BackupResult] = None
+        self.last_success_at: Optional[datetime] = None
+
+    def run(self) -> BackupResult:
+        """执行一次备份（阻塞，应在线程中调用）。"""
+        with self._lock:
+            try:
+                result = self._backup()
+            except Exception:
+                self.backups_failed += 1
+                raise
+            self.backups_ok += 1
+            self.last_result = result
+            self.last_success_at = datetime.now()
+            self.rotate()
+            return result
+
+    def _backup(self) -> BackupResult:
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        target = self.backup_dir / f"{BACKUP_PREFIX}{datetime.now():%Y%m%d-%H%M%S-%f}{BACKUP_SUFFIX}"
+        partial = target.with_suffix(".tmp")
+        partial.unlink(missing_ok=True)
+
+        started = time.perf_counter()
+        pages = 0
+
+        def progress(status: int, remaining: int, total: int):
+            nonlocal pages
+            pages = total
+
+        source = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        destination = sqlite3.connect(str(partial))
+        try:
+            source.backup(destination, pages=self.pages_per_step, progress=progress, sleep=self.step_sleep)
+            result = destination.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            destination.close()
+            source.close()
+
+        if result != "ok":
+            partial.unlink(missing_ok=True)
+            raise BackupError(f"Backup integrity check failed: {result}")
+
+        os.replace(partial, target)
+        duration = time.perf_counter() - started
+        size = target.stat().st_size
+        logging.info("Database backup written to %s (%s bytes, %.2fs)", target, size, duration)
+        return BackupResult(path=target, duration=duration, size_bytes=size, pages=pages)
+
+    def list_backups(self) -> List[Path]:
+        """按时间从旧到新排列的已有备份（文件名带时间戳，可直接按名称排序）。"""
+        if not self.backup_dir.is_dir():
+            return []
+        return sorted(self.backup_dir.glob(f"{BACKUP_PREFIX}*{BACKUP_SUFFIX}"))
+
+    def rotate(self) -> List[Path]:
+        """只保留最新的 ``keep`` 份备份，返回被删除的文件。"""
+        backups = self.list_backups()
+        expired = backups[: max(len(backups) - self.keep, 0)]
+        for path in expired:
+            path.unlink(missing_ok=True)
+        return expired
+
+    def stats(self) -> Dict[str, float]:
+        result = self.last_result
+        return {
+            "backups_ok": self.backups_ok,
+            "backups_failed": self.backups_failed,
+            "last_duration_seconds": round(result.duration, 3) if result else 0.0,
+            "last_size_bytes": result.size_bytes if result else 0,
+            "last_pages": result.pages if result else 0,
+            "last_success_at": self.last_success_at.isoformat(timespec="seconds") if self.last_success_at else "",
+        }
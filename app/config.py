@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List
+
+DEFAULT_PRESET_TAGS = "#日常,#福利,#自拍,#故事"
+DEFAULT_REJECTION_REASONS = "内容违规,画质过低,重复投稿,与频道主题无关"
+
+
+def _load_dotenv(path: str = ".env"):
+    """读取项目根目录的 .env（不覆盖已存在的环境变量）。"""
+    env_file = Path(path)
+    if not env_file.is_file():
+        return
+    for line in env_file.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        os.environ.setdefault(key.strip(), value.strip().strip("'\""))
+
+
+def _split_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _bool_env(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _int_env(name: str, default: int = 0) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    bot_token: str = ""
+    admin_group_id: int = 0
+    channel_id: int = 0
+    nav_channel_link: str = "https://t.me/FemSub_bot"
+    preset_tags: List[str] = field(default_factory=lambda: _split_list(DEFAULT_PRESET_TAGS))
+    rejection_reasons: List[str] = field(default_factory=lambda: _split_list(DEFAULT_REJECTION_REASONS))
+    media_group_debounce: float = 1.0
+    media_group_timeout: float = 10.0
+    media_group_max_pending: int = 200
+    media_group_max_per_user: int = 3
+    outbound_global_rate: float = 30.0
+    outbound_private_rate: float = 1.0
+    outbound_group_per_minute: float = 20.0
+    outbound_max_retries: int = 3
+    outbound_max_retry_after: float = 60.0
+    storage_backend: str = "sqlite"
+    db_path: str = "femsub.db"
+    worker_id: int = 0
+    timezone: str = ""
+    submission_cache_size: int = 512
+    submission_cache_ttl: float = 600.0
+    user_summary_cache_size: int = 1024
+    user_summary_cache_ttl: float = 300.0
+    profile_cache_size: int = 2048
+    profile_cache_ttl: float = 1800.0
+    db_write_behind: bool = False
+    db_write_batch_size: int = 64
+    db_write_batch_delay_ms: float = 5.0
+    archive_after_days: int = 30
+    archive_batch_size: int = 500
+    archive_interval: int = 3600
+    backup_dir: str = "backups"
+    backup_interval: int = 86400
+    backup_keep: int = 7
+    backup_pages_per_step: int = 256
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        _load_dotenv()
+        return cls(
+            bot_token=os.getenv("BOT_TOKEN", ""),
+            admin_group_id=_int_env("ADMIN_GROUP_ID"),
+            channel_id=_int_env("CHANNEL_ID"),
+            nav_channel_link=os.getenv("NAV_CHANNEL_LINK", "https://t.me/FemSub_bot"),
+            preset_tags=_split_list(os.getenv("PRESET_TAGS", DEFAULT_PRESET_TAGS)),
+            rejection_reasons=_split_list(os.getenv("REJECTION_REASONS", DEFAULT_REJECTION_REASONS)),
+            media_group_debounce=float(os.getenv("MEDIA_GROUP_DEBOUNCE", "1")),
+            media_group_timeout=float(os.getenv("MEDIA_GROUP_TIMEOUT", "10")),
+            media_group_max_pending=_int_env("MEDIA_GROUP_MAX_PENDING", 200),
+            media_group_max_per_user=_int_env("MEDIA_GROUP_MAX_PER_USER", 3),
+            outbound_global_rate=float(os.getenv("OUTBOUND_GLOBAL_RATE", "30")),
+            outbound_private_rate=float(os.getenv("OUTBOUND_PRIVATE_RATE", "1")),
+            outbound_group_per_minute=float(os.getenv("OUTBOUND_GROUP_PER_MINUTE", "20")),
+            outbound_max_retries=_int_env("OUTBOUND_MAX_RETRIES", 3),
+            outbound_max_retry_after=float(os.getenv("OUTBOUND_MAX_RETRY_AFTER", "60")),
+            storage_backend=os.getenv("STORAGE_BACKEND", "sqlite").strip().lower(),
+            db_path=os.getenv("DB_PATH", "femsub.db"),
+            worker_id=_int_env("WORKER_ID"),
+            timezone=os.getenv("TIMEZONE", "").strip(),
+            submission_cache_size=_int_env("SUBMISSION_CACHE_SIZE", 512),
+            submission_cache_ttl=float(os.getenv("SUBMISSION_CACHE_TTL", "600")),
+            user_summary_cache_size=_int_env("USER_SUMMARY_CACHE_SIZE", 1024),
+            user_summary_cache_ttl=float(os.getenv("USER_SUMMARY_CACHE_TTL", "300")),
+            profile_cache_size=_int_env("PROFILE_CACHE_SIZE", 2048),
+            profile_cache_ttl=float(os.getenv("PROFILE_CACHE_TTL", "1800")),
+            db_write_behind=_bool_env("DB_WRITE_BEHIND"),
+            db_write_batch_size=_int_env("DB_WRITE_BATCH_SIZE", 64),
+            db_write_batch_delay_ms=float(os.getenv("DB_WRITE_BATCH_DELAY_MS", "5")),
+            archive_after_days=_int_env("ARCHIVE_AFTER_DAYS", 30),
+            archive_batch_size=_int_env("ARCHIVE_BATCH_SIZE", 500),
+            archive_interval=_int_env("ARCHIVE_INTERVAL", 3600),
+            backup_dir=os.getenv("BACKUP_DIR", "backups"),
+            backup_interval=_int_env("BACKUP_INTERVAL", 86400),
+            backup_keep=_int_env("BACKUP_KEEP", 7),
+            backup_pages_per_step=_int_env("BACKUP_PAGES_PER_STEP", 256),
+        )
+
+
+settings = Settings.from_env()
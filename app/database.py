@@ -1,151 +1,764 @@
 from __future__ import annotations
 
-import json
-import logging
+import asyncio
+import queue
 import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from app.models import MediaFile, Submission, SubmissionStatus
+from app.latency import percentile
+from app.migrations import STATS_SOURCES, apply_migrations, fill_stats, register_functions
+from app.models import (
+    DashboardStats,
+    MediaFile,
+    ModeratorStats,
+    ReviewStats,
+    RollupBucket,
+    RollupReport,
+    SearchCursor,
+    SearchPage,
+    StatsDrift,
+    Submission,
+    SubmissionStatus,
+    TagUsage,
+    UserSummary,
+)
+from app.rollups import BACKFILL_CHUNK, DAY, HOUR, previous_bucket
+from app.search import build_match_query
+from app.tags import normalize_tag
+from app.timeutil import TimeBuckets, add_days, format_day, register_time_functions, to_epoch
+from app.write_behind import WriteBehindQueue, WriteOp
+
+# 连接级 PRAGMA：WAL 下 NORMAL 足够安全，且读写互不阻塞
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",  # 约 16 MB 页缓存
+    "PRAGMA mmap_size = 134217728",  # 128 MB 内存映射
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+# 显式列投影：列顺序与 row_to_submission 的解包顺序一一对应，新增列不会影响解码
+SUBMISSION_COLUMNS = (
+    "submission_id",
+    "user_id",
+    "username",
+    "caption",
+    "caption_only",
+    "is_anonymous",
+    "tags",
+    "status",
+    "created_at",
+    "media_group_id",
+    "admin_message_id",
+    "preview_message_id",
+    "decision_by",
+    "decided_at",
+)
+# 由 created_at 派生、只在写入时计算的整数时间列（见迁移 9），范围查询和按天统计都用它们
+TIME_COLUMNS = ("created_ts", "created_day", "decided_ts")
+WRITE_COLUMNS = SUBMISSION_COLUMNS + TIME_COLUMNS
+# 读取走热表 + 归档表的联合视图，已归档的投稿对调用方透明
+SELECT_SUBMISSIONS = f"SELECT {', '.join(SUBMISSION_COLUMNS)} FROM all_submissions"
+
+# media_files 不是 submissions 的列，而是映射到 submission_media 子表
+UPDATABLE_FIELDS = (frozenset(SUBMISSION_COLUMNS) | {"media_files"}) - {"submission_id"}
+UPSERT_SUBMISSION = f"""
+    INSERT INTO submissions ({', '.join(WRITE_COLUMNS)})
+    VALUES ({', '.join('?' * len(WRITE_COLUMNS))})
+    ON CONFLICT(submission_id) DO UPDATE SET
+    {', '.join(f'{column} = excluded.{column}' for column in WRITE_COLUMNS if column != 'submission_id')}
+"""
+
+MEDIA_COLUMNS = ("submission_id", "position", "file_id", "file_unique_id", "file_type", "caption")
+SELECT_MEDIA = f"SELECT {', '.join(MEDIA_COLUMNS)} FROM submission_media"
+INSERT_MEDIA = (
+    f"INSERT INTO submission_media ({', '.join(MEDIA_COLUMNS)}) VALUES ({', '.join('?' * len(MEDIA_COLUMNS))})"
+)
+
+# 粒度 -> (汇总表, 桶列, 去重投稿人来源表, 其桶列)
+ROLLUP_TABLES = {
+    HOUR: ("rollup_hourly", "hour", "rollup_hourly_users", "hour"),
+    DAY: ("rollup_daily", "day", "stats_user_daily", "day"),
+}
+
+# 单条 SQL 的绑定参数上限（旧版 SQLite 为 999）
+BULK_CHUNK_SIZE = 500
+
+
+FIELD_ENCODERS: Dict[str, Callable[[Any], Any]] = {
+    "is_anonymous": int,
+    "status": lambda status: status.value,
+    "created_at": lambda created_at: created_at.isoformat(),
+    "decided_at": lambda decided_at: decided_at.isoformat(),
+}
+
+
+def encode_field(column: str, value: Any) -> Any:
+    """Submission 字段值 -> SQLite 存储值。"""
+    encoder = FIELD_ENCODERS.get(column)
+    return encoder(value) if encoder and value is not None else value
+
+
+def _media_rows(submission_id: int, media_files: List[MediaFile]):
+    for position, media in enumerate(media_files):
+        yield submission_id, position, media.file_id, media.file_unique_id, media.file_type, media.caption
+
+
+def row_to_media(row: Sequence) -> MediaFile:
+    _, _, file_id, file_unique_id, file_type, caption = row
+    return MediaFile(file_id=file_id, file_type=file_type, caption=caption, file_unique_id=file_unique_id)
+
+
+def load_media(conn: sqlite3.Connection, submission_ids: Sequence[int]) -> Dict[int, List[MediaFile]]:
+    """一次查询加载多条投稿的媒体，按 submission_id 分组并保持 position 顺序。"""
+    placeholders = ", ".join("?" * len(submission_ids))
+    media: Dict[int, List[MediaFile]] = {}
+    for row in conn.execute(
+        f"{SELECT_MEDIA} WHERE submission_id IN ({placeholders}) ORDER BY submission_id, position",
+        list(submission_ids),
+    ):
+        media.setdefault(row[0], []).append(row_to_media(row))
+    return media
+
+
+def row_to_submission(row: Sequence, media_files: Optional[List[MediaFile]] = None) -> Submission:
+    """把按 SUBMISSION_COLUMNS 投影的行解码为 Submission；media_files 为 None 表示未加载媒体。"""
+    (
+        submission_id,
+        user_id,
+        username,
+        caption,
+        caption_only,
+        is_anonymous,
+        tags,
+        status,
+        created_at,
+        media_group_id,
+        admin_message_id,
+        preview_message_id,
+        decision_by,
+        decided_at,
+    ) = row
+
+    return Submission(
+        submission_id=submission_id,
+        user_id=user_id,
+        username=username,
+        media_files=media_files if media_files is not None else [],
+        caption=caption,
+        caption_only=caption_only or caption,
+        is_anonymous=bool(is_anonymous),
+        tags=tags or "",
+        status=SubmissionStatus(status),
+        created_at=datetime.fromisoformat(created_at),
+        media_group_id=media_group_id,
+        admin_message_id=admin_message_id,
+        preview_message_id=preview_message_id,
+        decided_at=datetime.fromisoformat(decided_at) if decided_at else None,
+        decision_by=decision_by,
+        media_loaded=media_files is not None,
+    )
 
 
 class Database:
-    """SQLite 数据访问封装"""
+    """SQLite 数据访问封装
+
+    持有一个长连接写入端和一个只读连接池（WAL 模式），
+    避免每次调用都重新建立连接，统计类的重查询也不会阻塞投稿写入。
+    """
+
+    # 所有调用都会做磁盘 IO，AsyncDatabase 需要把它们放到线程池执行
+    blocking = True
 
-    def __init__(self, db_path: str = "femsub.db"):
+    def __init__(
+        self,
+        db_path: str = "femsub.db",
+        read_pool_size: int = 4,
+        forbid_loop_calls: bool = False,
+        write_behind: bool = False,
+        write_batch_size: int = 64,
+        write_batch_delay: float = 0.005,
+        timezone: str = "",
+    ):
         self.db_path = db_path
+        self.time_buckets = TimeBuckets(timezone)
+        self.read_pool_size = read_pool_size
+        # 为 True 时，若在运行中的事件循环线程里直接调用同步方法则立即报错（测试用）
+        self.forbid_loop_calls = forbid_loop_calls
+        self._write_lock = threading.RLock()
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode = WAL")
         self._init_db()
 
-    def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS submissions (
-                submission_id TEXT PRIMARY KEY,
-                user_id INTEGER NOT NULL,
-                username TEXT NOT NULL,
-                media_files TEXT NOT NULL,
-                caption TEXT,
-                caption_only TEXT,
-                is_anonymous BOOLEAN DEFAULT 0,
-                tags TEXT,
-                status TEXT NOT NULL,
-                created_at TIMESTAMP NOT NULL,
-                media_group_id TEXT,
-                admin_message_id INTEGER,
-                preview_message_id INTEGER,
-                decision_by INTEGER
+        # 可选的组提交模式：写入先进队列，按批次合并成一个事务提交
+        self._write_behind: Optional[WriteBehindQueue] = None
+        if write_behind:
+            self._write_behind = WriteBehindQueue(
+                self._writer, self._write_lock, max_batch=write_batch_size, max_delay=write_batch_delay
             )
+
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=read_pool_size)
+        for _ in range(read_pool_size):
+            self._readers.put(self._connect(read_only=True))
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        if read_only:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only = 1")
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        register_functions(conn)
+        register_time_functions(conn, self.time_buckets)
+        return conn
+
+    def _check_not_on_event_loop(self):
+        if not self.forbid_loop_calls:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        raise RuntimeError("Synchronous Database call inside a running event loop; use AsyncDatabase instead")
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """独占写连接，退出时提交（异常时回滚）。"""
+        self._check_not_on_event_loop()
+        with self._write_lock:
+            with self._writer:
+                yield self._writer
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """从只读连接池借出一个连接，用完归还。"""
+        self._check_not_on_event_loop()
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @property
+    def write_behind(self) -> bool:
+        return self._write_behind is not None
+
+    def write_behind_stats(self) -> Dict[str, float]:
+        return self._write_behind.stats() if self._write_behind else {}
+
+    def submit_write(self, op: WriteOp) -> Future:
+        """提交一个写操作 ``op(conn)``。
+
+        组提交模式下立即返回、在批次落盘后完成的 Future；否则在当前线程同步执行并返回已完成的 Future。
         """
-        )
+        if self._write_behind is not None:
+            return self._write_behind.submit(op)
 
+        future: Future = Future()
         try:
-            cursor.execute("ALTER TABLE submissions ADD COLUMN decision_by INTEGER")
-        except sqlite3.OperationalError:
-            pass
+            with self.writer() as conn:
+                future.set_result(op(conn))
+        except Exception as exc:  # pylint: disable=broad-except
+            future.set_exception(exc)
+        return future
+
+    def _run_write(self, op: WriteOp) -> Any:
+        self._check_not_on_event_loop()
+        return self.submit_write(op).result()
 
-        conn.commit()
-        conn.close()
+    def close(self):
+        if self._write_behind is not None:
+            self._write_behind.close()
+        with self._write_lock:
+            self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+    def _init_db(self):
+        with self._write_lock:
+            apply_migrations(self._writer)
 
     def save_submission(self, submission: Submission):
-        conn = sqlite3.connect(self.db_path)
+        """整行写入（新投稿）。已存在时走 UPSERT 原地更新，而不是 REPLACE 的删除再插入。"""
+        self._run_write(self.save_submission_op(submission))
+        submission.mark_clean()
+
+    def update_fields(self, submission_id: int, **changes: Any) -> bool:
+        """只更新给定字段，返回是否命中了记录。"""
+        if not changes:
+            return False
+        return self._run_write(self.update_fields_op(submission_id, **changes)) is not None
+
+    def save_submission_op(self, submission: Submission) -> WriteOp:
+        params = [encode_field(column, getattr(submission, column)) for column in SUBMISSION_COLUMNS]
+        params.extend(self.time_fields(submission.created_at, submission.decided_at))
+        media_files = list(submission.media_files) if submission.media_loaded else None
+
+        def op(conn: sqlite3.Connection):
+            conn.execute(UPSERT_SUBMISSION, params)
+            if media_files is not None:
+                self._replace_media(conn, submission.submission_id, media_files)
+
+        return op
+
+    def update_fields_op(self, submission_id: int, **changes: Any) -> WriteOp:
+        """写操作返回投稿（修改前）所属的 user_id，记录不存在时返回 None，供调用方按用户失效缓存。"""
+        unknown = set(changes) - UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown submission fields: {', '.join(sorted(unknown))}")
+
+        media_files = changes.pop("media_files", None)
+        columns = list(changes)
+        params = [encode_field(column, value) for column, value in changes.items()]
+        if "created_at" in changes:
+            created_ts = to_epoch(changes["created_at"])
+            columns.extend(("created_ts", "created_day"))
+            params.extend((created_ts, self.time_buckets.day(created_ts)))
+        if "decided_at" in changes:
+            columns.append("decided_ts")
+            params.append(to_epoch(changes["decided_at"]) if changes["decided_at"] else None)
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+
+        def op(conn: sqlite3.Connection) -> Optional[int]:
+            owner = None
+            for table in ("submissions", "submissions_archive"):
+                row = conn.execute(f"SELECT user_id FROM {table} WHERE submission_id = ?", (submission_id,)).fetchone()
+                if row is None:
+                    continue
+                owner = row[0]
+                if changes:
+                    conn.execute(f"UPDATE {table} SET {assignments} WHERE submission_id = ?", (*params, submission_id))
+                break
+            if media_files is not None and owner is not None:
+                self._replace_media(conn, submission_id, media_files)
+            return owner
+
+        return op
+
+    def time_fields(self, created_at: datetime, decided_at: Optional[datetime] = None) -> Tuple[Optional[int], ...]:
+        """(created_at, decided_at) -> TIME_COLUMNS 的值 (created_ts, created_day, decided_ts)"""
+        created_ts = to_epoch(created_at)
+        decided_ts = to_epoch(decided_at) if decided_at else None
+        return created_ts, self.time_buckets.day(created_ts), decided_ts
+
+    def get_dashboard_stats(self) -> DashboardStats:
+        with self.reader() as conn:
+            return self._load_dashboard(conn, self.time_buckets)
+
+    def get_user_summary(self, user_id: int, username: str) -> UserSummary:
+        with self.reader() as conn:
+            return self._load_user_summary(conn, user_id, username)
+
+    @staticmethod
+    def _load_dashboard(conn: sqlite3.Connection, buckets: TimeBuckets) -> DashboardStats:
+        """全部读自聚合表（见迁移 8），与投稿总量无关。"""
         cursor = conn.cursor()
 
+        cursor.execute("SELECT status, count FROM stats_status WHERE count > 0")
+        status_counts = dict(cursor.fetchall())
+
+        cursor.execute(
+            "SELECT day, count FROM stats_daily WHERE day >= ? AND count > 0 ORDER BY day ASC",
+            (buckets.days_ago(7),),
+        )
+        daily_counts = [(format_day(day), count) for day, count in cursor.fetchall()]
+
+        # 用户名取该用户最近一条投稿上的，走 (user_id, created_ts) 索引，与排行在同一条语句里
         cursor.execute(
             """
-            INSERT OR REPLACE INTO submissions
-            (submission_id, user_id, username, media_files, caption, caption_only,
-             is_anonymous, tags, status, created_at, media_group_id,
-             admin_message_id, preview_message_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            WITH top AS (
+                SELECT user_id, SUM(count) AS total
+                FROM stats_user_daily
+                WHERE day >= ?
+                GROUP BY user_id
+                HAVING total > 0
+                ORDER BY total DESC, user_id
+                LIMIT 10
+            )
+            SELECT COALESCE((
+                SELECT username FROM all_submissions AS s
+                WHERE s.user_id = top.user_id
+                ORDER BY created_ts DESC
+                LIMIT 1
+            ), ''), total
+            FROM top
+            ORDER BY total DESC, user_id
         """,
-            (
-                submission.submission_id,
-                submission.user_id,
-                submission.username,
-                json.dumps(
-                    [
-                        {"file_id": m.file_id, "file_type": m.file_type, "caption": m.caption}
-                        for m in submission.media_files
-                    ]
-                ),
-                submission.caption,
-                submission.caption_only,
-                submission.is_anonymous,
-                submission.tags,
-                submission.status.value,
-                submission.created_at.isoformat(),
-                submission.media_group_id,
-                submission.admin_message_id,
-                submission.preview_message_id,
-            ),
+            (buckets.days_ago(30),),
         )
+        top_submitters = [(username, count) for username, count in cursor.fetchall()]
 
-        conn.commit()
-        conn.close()
+        return DashboardStats(
+            total=sum(status_counts.values()),
+            status_counts=status_counts,
+            daily_counts=daily_counts,
+            top_submitters=top_submitters,
+        )
 
-    def get_submission(self, submission_id: str) -> Optional[Submission]:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    @staticmethod
+    def _load_user_summary(conn: sqlite3.Connection, user_id: int, username: str) -> UserSummary:
+        """一条语句取回计数与最近投稿：kind = 0 为 stats_user_status 的计数行，kind = 1 为最近的投稿。"""
+        rows = conn.execute(
+            """
+            SELECT 0 AS kind, NULL, NULL, NULL, status, count, NULL FROM stats_user_status
+            WHERE user_id = ? AND count > 0
+            UNION ALL
+            SELECT * FROM (
+                SELECT 1, submission_id, caption_only, tags, status, created_at, created_ts
+                FROM all_submissions
+                WHERE user_id = ?
+                ORDER BY created_ts DESC
+                LIMIT 10
+            )
+            ORDER BY kind, 7 DESC
+        """,
+            (user_id, user_id),
+        ).fetchall()
 
-        cursor.execute("SELECT * FROM submissions WHERE submission_id = ?", (submission_id,))
-        row = cursor.fetchone()
-        conn.close()
+        status_counts = {status: count for kind, _, _, _, status, count, _ in rows if kind == 0}
+        recent_compact = [
+            (sub_id, caption_only or "", tags or "", status, created_at)
+            for kind, sub_id, caption_only, tags, status, created_at, _ in rows
+            if kind == 1
+        ]
 
-        if not row:
-            return None
+        return UserSummary(
+            username=username,
+            total=sum(status_counts.values()),
+            status_counts=status_counts,
+            recent_submissions=recent_compact,
+        )
 
-        if len(row) <= 12:
-            caption_only = row[4]
-            tags = row[6] if row[6] else ""
-        else:
-            caption_only = row[5] if row[5] else row[4]
-            tags = row[7] if row[7] else ""
+    def archive_batch_op(self, cutoff: datetime, batch_size: int) -> WriteOp:
+        """把 cutoff 之前创建、已有审核结果的投稿移一批到归档表，返回移动的条数。"""
+        columns = ", ".join(WRITE_COLUMNS)
 
-        try:
-            media_files_data = json.loads(row[3])
-        except json.JSONDecodeError as exc:
-            logging.error("Invalid media_files JSON for submission %s: %s", submission_id, exc)
-            media_files_data = []
-
-        media_files = [MediaFile(**m) for m in media_files_data]
-
-        return Submission(
-            submission_id=row[0],
-            user_id=row[1],
-            username=row[2],
-            media_files=media_files,
-            caption=row[4],
-            caption_only=caption_only,
-            is_anonymous=bool(row[5] if len(row) <= 12 else row[6]),
-            tags=tags,
-            status=SubmissionStatus(row[7] if len(row) <= 12 else row[8]),
-            created_at=datetime.fromisoformat(row[8] if len(row) <= 12 else row[9]),
-            media_group_id=row[9] if len(row) <= 12 else row[10],
-            admin_message_id=row[10] if len(row) <= 12 else row[11],
-            preview_message_id=row[11] if len(row) <= 12 else row[12],
+        def op(conn: sqlite3.Connection) -> int:
+            ids = [
+                row[0]
+                for row in conn.execute(
+                    """
+                    SELECT submission_id FROM submissions
+                    WHERE status != ? AND created_ts < ?
+                    ORDER BY created_ts
+                    LIMIT ?
+                """,
+                    (SubmissionStatus.PENDING.value, to_epoch(cutoff), batch_size),
+                )
+            ]
+            if not ids:
+                return 0
+            placeholders = ", ".join("?" * len(ids))
+            conn.execute(
+                f"""
+                INSERT OR REPLACE INTO submissions_archive ({columns}, legacy_id, archived_at)
+                SELECT {columns}, legacy_id, ? FROM submissions WHERE submission_id IN ({placeholders})
+            """,
+                (datetime.now().isoformat(), *ids),
+            )
+            conn.execute(f"DELETE FROM submissions WHERE submission_id IN ({placeholders})", ids)
+            return len(ids)
+
+        return op
+
+    def archive_decided(self, cutoff: datetime, batch_size: int = 500) -> int:
+        """同步版归档（脚本用），按批次循环直到没有可归档的行。"""
+        moved = 0
+        while True:
+            count = self._run_write(self.archive_batch_op(cutoff, batch_size))
+            moved += count
+            if count < batch_size:
+                return moved
+
+    @staticmethod
+    def _replace_media(conn: sqlite3.Connection, submission_id: int, media_files: List[MediaFile]):
+        conn.execute("DELETE FROM submission_media WHERE submission_id = ?", (submission_id,))
+        conn.executemany(INSERT_MEDIA, _media_rows(submission_id, media_files))
+
+    def get_submission(self, submission_id: int, with_media: bool = True) -> Optional[Submission]:
+        """with_media=False 时跳过媒体表，适合只关心文案/状态的回调。"""
+        with self.reader() as conn:
+            row = conn.execute(f"{SELECT_SUBMISSIONS} WHERE submission_id = ?", (submission_id,)).fetchone()
+            if not row:
+                return None
+            media_files = load_media(conn, [submission_id]).get(submission_id, []) if with_media else None
+
+        return row_to_submission(row, media_files)
+
+    def get_submissions(self, submission_ids: Sequence[int], with_media: bool = True) -> List[Submission]:
+        """批量读取，按传入顺序返回（不存在的 ID 会被跳过）。"""
+        found: Dict[int, Submission] = {}
+        unique_ids = list(dict.fromkeys(submission_ids))
+
+        with self.reader() as conn:
+            for start in range(0, len(unique_ids), BULK_CHUNK_SIZE):
+                chunk = unique_ids[start : start + BULK_CHUNK_SIZE]
+                placeholders = ", ".join("?" * len(chunk))
+                media = load_media(conn, chunk) if with_media else {}
+                for row in conn.execute(f"{SELECT_SUBMISSIONS} WHERE submission_id IN ({placeholders})", chunk):
+                    submission_id = row[0]
+                    found[submission_id] = row_to_submission(
+                        row, media.get(submission_id, []) if with_media else None
+                    )
+
+        return [found[submission_id] for submission_id in submission_ids if submission_id in found]
+
+    def get_media(self, submission_id: int) -> List[MediaFile]:
+        with self.reader() as conn:
+            return load_media(conn, [submission_id]).get(submission_id, [])
+
+    def search_submissions(
+        self, query: str, after: Optional[SearchCursor] = None, limit: int = 10
+    ) -> SearchPage:
+        """全文检索 caption_only / tags，按 bm25 相关度排序；``after`` 为上一页返回的游标。"""
+        match = build_match_query(query)
+        if match is None:
+            return SearchPage(submissions=[])
+
+        sql = "SELECT rowid, rank FROM submissions_fts WHERE submissions_fts MATCH ?"
+        params: List[Any] = [match]
+        if after is not None:
+            sql += " AND (rank > ? OR (rank = ? AND rowid > ?))"
+            params.extend((after[0], after[0], after[1]))
+        sql += " ORDER BY rank, rowid LIMIT ?"
+        params.append(limit + 1)
+
+        with self.reader() as conn:
+            hits = conn.execute(sql, params).fetchall()
+        page = hits[:limit]
+        return SearchPage(
+            submissions=self.get_submissions([rowid for rowid, _ in page], with_media=False),
+            next_cursor=(page[-1][1], page[-1][0]) if len(hits) > limit else None,
         )
 
-    def update_submission_status(self, submission_id: str, status: SubmissionStatus):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE submissions SET status = ? WHERE submission_id = ?", (status.value, submission_id))
-        conn.commit()
-        conn.close()
+    def rebuild_stats(self) -> List[StatsDrift]:
+        """按原始数据重新计算聚合表，返回与重算结果不一致的计数（正常情况下为空）。"""
+        with self.writer() as conn:
+            drifts = []
+            for table, (keys, source_sql) in STATS_SOURCES.items():
+                stored_sql = f"SELECT {', '.join(keys)}, count FROM {table}"
+                stored = {tuple(row[:-1]): row[-1] for row in conn.execute(stored_sql)}
+                actual = {tuple(row[:-1]): row[-1] for row in conn.execute(source_sql)}
+                for key in sorted(set(stored) | set(actual), key=repr):
+                    if stored.get(key, 0) != actual.get(key, 0):
+                        drifts.append(StatsDrift(table, key, stored.get(key, 0), actual.get(key, 0)))
+            fill_stats(conn)
+        return drifts
 
-    def update_submission_caption(self, submission_id: str, caption: str):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE submissions SET caption = ? WHERE submission_id = ?", (caption, submission_id))
-        conn.commit()
-        conn.close()
+    def seed_tags(self, names: Sequence[str]):
+        """确保预设标签存在于 tags 表（启动时调用，可重复执行）。"""
+        tags = [tag for tag in map(normalize_tag, names) if tag]
+        with self.writer() as conn:
+            conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", ((tag,) for tag in tags))
+            conn.executemany("UPDATE tags SET preset = 1 WHERE name = ?", ((tag,) for tag in tags))
 
-    def update_submission_tags(self, submission_id: str, tags: List[str]):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE submissions SET tags = ? WHERE submission_id = ?", (" ".join(tags), submission_id))
-        conn.commit()
-        conn.close()
+    def get_popular_tags(self, limit: int = 20) -> List[TagUsage]:
+        """按使用次数排序的标签；预设标签即使未被使用也会列出。"""
+        with self.reader() as conn:
+            rows = conn.execute(
+                """
+                SELECT name, usage_count, preset FROM tags
+                WHERE usage_count > 0 OR preset
+                ORDER BY usage_count DESC, name
+                LIMIT ?
+            """,
+                (limit,),
+            ).fetchall()
+        return [TagUsage(name=name, usage_count=count, preset=bool(preset)) for name, count, preset in rows]
+
+    def get_submissions_by_tag(
+        self, tag: str, before: Optional[int] = None, limit: int = 10
+    ) -> List[Submission]:
+        """带某个标签的投稿，按 ID（即创建时间）倒序；``before`` 为上一页最后一条的 ID。"""
+        name = normalize_tag(tag)
+        if name is None:
+            return []
+        sql = """
+            SELECT st.submission_id FROM submission_tags AS st JOIN tags AS t ON t.tag_id = st.tag_id
+            WHERE t.name = ?
+        """
+        params: List[Any] = [name]
+        if before is not None:
+            sql += " AND st.submission_id < ?"
+            params.append(before)
+        sql += " ORDER BY st.submission_id DESC LIMIT ?"
+        params.append(limit)
+        with self.reader() as conn:
+            ids = [row[0] for row in conn.execute(sql, params)]
+        return self.get_submissions(ids, with_media=False)
+
+    def resolve_legacy_id(self, legacy_id: str) -> Optional[int]:
+        """迁移前的文本 ID -> 整数 ID；旧消息上的按钮靠它继续可用。"""
+        with self.reader() as conn:
+            row = conn.execute("SELECT submission_id FROM all_submissions WHERE legacy_id = ?", (legacy_id,)).fetchone()
+        return row[0] if row else None
+
+    # ----- 按小时 / 按天汇总（见迁移 10 与 app/rollups.py） -----
+
+    def rollups_pending(self, granularity: str, start: int) -> bool:
+        """从 start 起的桶里是否还有迁移前、尚未回填的历史数据。"""
+        with self.reader() as conn:
+            row = conn.execute(
+                "SELECT pending_through FROM rollup_state WHERE granularity = ?", (granularity,)
+            ).fetchone()
+        return row is not None and row[0] >= start
+
+    def backfill_rollups_op(self, granularity: str, start: int) -> WriteOp:
+        """从尚未回填的最后一个桶往前补算一批（最多 BACKFILL_CHUNK 个桶），返回是否还有需要补算的桶。"""
+        table, key, users_table, _ = ROLLUP_TABLES[granularity]
+        bucket_expr = "created_ts / 3600 * 3600" if granularity == HOUR else "created_day"
+
+        def op(conn: sqlite3.Connection) -> bool:
+            row = conn.execute("SELECT pending_through FROM rollup_state WHERE granularity = ?", (granularity,))
+            pending = row.fetchone()[0]
+            if pending < start:
+                return False
+            low = max(start, previous_bucket(granularity, pending, BACKFILL_CHUNK[granularity] - 1))
+            if granularity == HOUR:
+                ts_range = (low, pending + 3600)
+            else:
+                ts_range = (self.time_buckets.day_start(low), self.time_buckets.day_start(add_days(pending, 1)))
+
+            # 重算得到的是绝对值，会覆盖这些桶里触发器在回填之前累加的增量
+            conn.execute(f"DELETE FROM {table} WHERE {key} BETWEEN ? AND ?", (low, pending))
+            conn.execute(
+                f"""
+                INSERT INTO {table} ({key}, submissions, approved, rejected, media)
+                SELECT {bucket_expr}, COUNT(*), SUM(status = 'approved'), SUM(status = 'rejected'),
+                    SUM((SELECT COUNT(*) FROM submission_media AS m WHERE m.submission_id = s.submission_id))
+                FROM all_submissions AS s
+                WHERE created_ts >= ? AND created_ts < ?
+                GROUP BY 1
+            """,
+                ts_range,
+            )
+            if granularity == HOUR:
+                conn.execute(f"DELETE FROM {users_table} WHERE hour BETWEEN ? AND ?", (low, pending))
+                conn.execute(
+                    f"""
+                    INSERT INTO {users_table} (hour, user_id, count)
+                    SELECT {bucket_expr}, user_id, COUNT(*) FROM all_submissions
+                    WHERE created_ts >= ? AND created_ts < ?
+                    GROUP BY 1, 2
+                """,
+                    ts_range,
+                )
+            else:
+                # 按天的去重投稿人来自 stats_user_daily，迁移 8 起一直是完整的，只需补算标签
+                conn.execute("DELETE FROM rollup_tag_daily WHERE day BETWEEN ? AND ?", (low, pending))
+                conn.execute(
+                    """
+                    INSERT INTO rollup_tag_daily (tag, day, count)
+                    SELECT j.value, s.created_day, COUNT(*)
+                    FROM all_submissions AS s, json_each(tag_list(s.tags)) AS j
+                    WHERE s.created_ts >= ? AND s.created_ts < ?
+                    GROUP BY j.value COLLATE NOCASE, 2
+                """,
+                    ts_range,
+                )
+
+            pending = previous_bucket(granularity, low)
+            conn.execute("UPDATE rollup_state SET pending_through = ? WHERE granularity = ?", (pending, granularity))
+            return pending >= start
+
+        return op
+
+    def backfill_rollups(self, granularity: str, start: int):
+        """把历史汇总补算到 start 所在的桶，每批一个写事务。"""
+        while self.rollups_pending(granularity, start) and self._run_write(
+            self.backfill_rollups_op(granularity, start)
+        ):
+            pass
+
+    def get_rollups(self, granularity: str, start: int, end: int) -> RollupReport:
+        """[start, end) 内每个桶的汇总；start / end 为整点 epoch 秒或 YYYYMMDD。
+
+        只读查询，迁移前的历史数据要先经 backfill_rollups 补算。
+        """
+        table, key, users_table, user_key = ROLLUP_TABLES[granularity]
+        with self.reader() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT {key}, submissions, approved, rejected, media FROM {table}
+                WHERE {key} >= ? AND {key} < ? AND submissions > 0
+                ORDER BY {key}
+            """,
+                (start, end),
+            ).fetchall()
+            users_where = f"WHERE {user_key} >= ? AND {user_key} < ? AND count > 0"
+            submitters = dict(
+                conn.execute(f"SELECT {user_key}, COUNT(*) FROM {users_table} {users_where} GROUP BY 1", (start, end))
+            )
+            unique = conn.execute(f"SELECT COUNT(DISTINCT user_id) FROM {users_table} {users_where}", (start, end))
+            unique_submitters = unique.fetchone()[0]
+        return RollupReport(
+            granularity=granularity,
+            buckets=[
+                RollupBucket(bucket, submissions, approved, rejected, submitters.get(bucket, 0), media)
+                for bucket, submissions, approved, rejected, media in rows
+            ],
+            unique_submitters=unique_submitters,
+        )
+
+    def get_tag_rollups(self, tag: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """某个标签在 [start, end) 内每天的投稿数 (YYYYMMDD, count)。"""
+        name = normalize_tag(tag)
+        if name is None:
+            return []
+        with self.reader() as conn:
+            return conn.execute(
+                """
+                SELECT day, count FROM rollup_tag_daily
+                WHERE tag = ? AND day >= ? AND day < ? AND count > 0
+                ORDER BY day
+            """,
+                (name, start, end),
+            ).fetchall()
+
+    def get_review_stats(self, start: int, end: int, limit: int = 10) -> ReviewStats:
+        """审核日期（YYYYMMDD）在 [start, end) 内的耗时分布与管理员排行，读自迁移 11 的聚合表。"""
+        with self.reader() as conn:
+            histogram = dict(
+                conn.execute(
+                    """
+                    SELECT bucket, SUM(count) FROM review_latency
+                    WHERE day >= ? AND day < ?
+                    GROUP BY bucket HAVING SUM(count) > 0
+                """,
+                    (start, end),
+                )
+            )
+            rows = conn.execute(
+                """
+                SELECT admin_id,
+                    SUM(CASE WHEN status = 'approved' THEN count ELSE 0 END) AS approved,
+                    SUM(CASE WHEN status = 'rejected' THEN count ELSE 0 END) AS rejected
+                FROM moderator_daily
+                WHERE day >= ? AND day < ?
+                GROUP BY admin_id HAVING approved + rejected > 0
+                ORDER BY approved + rejected DESC, admin_id
+                LIMIT ?
+            """,
+                (start, end, limit),
+            ).fetchall()
+        return ReviewStats(
+            decisions=sum(histogram.values()),
+            p50=percentile(histogram, 0.5),
+            p95=percentile(histogram, 0.95),
+            histogram=histogram,
+            moderators=[ModeratorStats(admin_id, approved, rejected) for admin_id, approved, rejected in rows],
+        )
+
+    def update_submission_status(self, submission_id: int, status: SubmissionStatus):
+        self.update_fields(submission_id, status=status)
+
+    def update_submission_caption(self, submission_id: int, caption: str):
+        self.update_fields(submission_id, caption=caption)
 
+    def update_submission_tags(self, submission_id: int, tags: List[str]):
+        self.update_fields(submission_id, tags=" ".join(tags))
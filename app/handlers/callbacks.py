@@ -22,6 +22,8 @@ async def handle_callback_query(update, context: ContextTypes.DEFAULT_TYPE, serv
         await services.submission_service.confirm_submission(query, submission_id, context)
     elif data.startswith("cancel:"):
         await services.submission_service.cancel_submission(query)
+    elif data.startswith("search_more:"):
+        await services.search_service.handle_callback(query, data)
     elif data.startswith("admin_") or data.startswith("confirm_ban:"):
         await services.admin_service.handle_callback(query, data, context)
 
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import html
 from datetime import datetime
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
+from app.latency import format_duration
+from app.rollups import DAY, bucket_label, group_buckets, parse_period
 from app.services.container import ServiceContainer
 from app.templates import STORY_TEMPLATE
 
@@ -52,7 +55,11 @@ async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE, services: Se
         await update.message.reply_text("❌ 此命令仅限管理员使用。")
         return
 
-    dashboard = services.stats_service.get_dashboard()
+    if context.args:
+        await _stats_trend(update, services, context.args)
+        return
+
+    dashboard = await services.stats_service.get_dashboard()
 
     stats_text = f"📊 <b>FemSub 统计面板</b>\n\n"
     stats_text += f"📤 <b>总投稿数</b>: {dashboard.total}\n"
@@ -78,11 +85,110 @@ async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE, services: Se
     await update.message.reply_text(stats_text, parse_mode=ParseMode.HTML)
 
 
+STATS_USAGE = "用法：/stats [时间段] [#标签]，时间段如 48h、90d、12w、6m、1y"
+
+
+async def _stats_trend(update: Update, services: ServiceContainer, args):
+    period = parse_period(args[0])
+    tag = args[1] if len(args) > 1 else None
+    if period is None or (tag and period.granularity != DAY):
+        await update.message.reply_text(STATS_USAGE)
+        return
+
+    buckets = services.database.time_buckets
+    if tag:
+        counts = await services.stats_service.get_tag_trend(tag, period)
+        text = f"🏷 <b>{html.escape(tag)} 投稿趋势（最近 {period.label}）</b>\n"
+        text += f"共 {sum(count for _, count in counts)} 条\n\n"
+        for group in group_buckets(counts):
+            label = _group_label(buckets, DAY, group[0][0], group[-1][0])
+            text += f"  {label}: {sum(count for _, count in group)} 条\n"
+        if not counts:
+            text += "  暂无数据\n"
+        await update.message.reply_text(text, parse_mode=ParseMode.HTML)
+        return
+
+    report = await services.stats_service.get_trend(period)
+    rows = report.buckets
+    text = f"📈 <b>投稿趋势（最近 {period.label}）</b>\n"
+    text += f"📤 投稿 {sum(row.submissions for row in rows)} 条，"
+    text += f"✅ 通过 {sum(row.approved for row in rows)}，🚫 拒绝 {sum(row.rejected for row in rows)}\n"
+    text += f"🖼 媒体 {sum(row.media for row in rows)} 个，👥 投稿人 {report.unique_submitters} 位\n\n"
+    for group in group_buckets(rows):
+        label = _group_label(buckets, period.granularity, group[0].bucket, group[-1].bucket)
+        text += f"  {label}: {sum(row.submissions for row in group)} 条"
+        text += f"（✅{sum(row.approved for row in group)} 🚫{sum(row.rejected for row in group)}）\n"
+    if not rows:
+        text += "  暂无数据\n"
+    await update.message.reply_text(text, parse_mode=ParseMode.HTML)
+
+
+def _group_label(buckets, granularity: str, first: int, last: int) -> str:
+    label = bucket_label(buckets, granularity, first)
+    return label if first == last else f"{label} ~ {bucket_label(buckets, granularity, last)}"
+
+
+async def review(update: Update, context: ContextTypes.DEFAULT_TYPE, services: ServiceContainer):
+    if update.message.chat.id != services.settings.admin_group_id:
+        await update.message.reply_text("❌ 此命令仅限管理员使用。")
+        return
+
+    period = parse_period(context.args[0]) if context.args else parse_period("30d")
+    if period is None or period.granularity != DAY:
+        await update.message.reply_text("用法：/review [时间段]，时间段如 7d、30d、12w、1y")
+        return
+
+    stats = await services.stats_service.get_review_stats(period)
+    text = f"⏱ <b>审核效率（最近 {period.label}）</b>\n\n"
+    text += f"📋 <b>已审核</b>: {stats.decisions} 条\n"
+    text += f"⌛ <b>审核耗时</b>: p50 {format_duration(stats.p50)}，p95 {format_duration(stats.p95)}\n"
+
+    text += "\n<b>🧑‍⚖️ 管理员排行</b>\n"
+    if stats.moderators:
+        for i, moderator in enumerate(stats.moderators, 1):
+            link = f"<a href='tg://user?id={moderator.admin_id}'>{moderator.admin_id}</a>"
+            text += f"  {i}. {link}: {moderator.decisions} 条（✅{moderator.approved} 🚫{moderator.rejected}）\n"
+    else:
+        text += "  暂无数据\n"
+
+    await update.message.reply_text(text, parse_mode=ParseMode.HTML)
+
+
+async def metrics(update: Update, context: ContextTypes.DEFAULT_TYPE, services: ServiceContainer):
+    if update.message.chat.id != services.settings.admin_group_id:
+        await update.message.reply_text("❌ 此命令仅限管理员使用。")
+        return
+
+    metrics_text = "🩺 <b>运行指标</b>\n"
+    for section, values in services.metrics.snapshot().items():
+        metrics_text += f"\n<b>{section}</b>\n"
+        for name, value in values.items():
+            metrics_text += f"  {name}: {value}\n"
+
+    await update.message.reply_text(metrics_text, parse_mode=ParseMode.HTML)
+
+
+async def search(update: Update, context: ContextTypes.DEFAULT_TYPE, services: ServiceContainer):
+    if update.message.chat.id != services.settings.admin_group_id:
+        await update.message.reply_text("❌ 此命令仅限管理员使用。")
+        return
+
+    await services.search_service.search(update.message, " ".join(context.args or []))
+
+
+async def tags(update: Update, context: ContextTypes.DEFAULT_TYPE, services: ServiceContainer):
+    if update.message.chat.id != services.settings.admin_group_id:
+        await update.message.reply_text("❌ 此命令仅限管理员使用。")
+        return
+
+    await services.search_service.tags(update.message, " ".join(context.args or []))
+
+
 async def my_command(update: Update, context: ContextTypes.DEFAULT_TYPE, services: ServiceContainer):
     user_id = update.message.from_user.id
     username = update.message.from_user.username or update.message.from_user.first_name
 
-    summary = services.stats_service.get_user_summary(user_id, username)
+    summary = await services.stats_service.get_user_summary(user_id, username)
 
     my_text = f"👤 <b>{summary.username} 的个人中心</b>\n\n"
     my_text += f"📤 <b>总投稿数</b>: {summary.total}\n"
@@ -0,0 +1,86 @@
+"""
+按时间递增的 64 位整数投稿 ID（snowflake 风格）。
+
+布局（高位到低位）：41 位毫秒时间戳（相对 ``EPOCH_MS``）| 10 位 worker | 12 位序号。
+同一毫秒内最多 4096 个 ID，用尽或时钟回拨时借用下一毫秒，保证单进程内严格递增。
+ID 大小与创建时间同序，按 ID 范围扫描即按时间扫描；十进制最长 19 位，适合放进 callback_data。
+纪元取在 Bot API 上线之前，旧数据迁移时不会出现早于纪元的投稿；41 位时间戳可用到 2084 年。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone, tzinfo
+from typing import Callable, Optional, Union
+
+# 2015-01-01 00:00:00 UTC
+EPOCH_MS = 1_420_070_400_000
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+TIMESTAMP_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+
+def compose_id(timestamp_ms: int, worker_id: int = 0, sequence: int = 0) -> int:
+    if timestamp_ms < EPOCH_MS:
+        raise ValueError(f"timestamp {timestamp_ms} ms is before the submission id epoch")
+    return ((timestamp_ms - EPOCH_MS) << TIMESTAMP_SHIFT) | (worker_id << SEQUENCE_BITS) | sequence
+
+
+def id_timestamp_ms(submission_id: int) -> int:
+    """从 ID 中取回生成时的毫秒时间戳。"""
+    return (submission_id >> TIMESTAMP_SHIFT) + EPOCH_MS
+
+
+def id_to_datetime(submission_id: int, tz: Optional[tzinfo] = None) -> datetime:
+    """ID 的生成时间（带时区，默认 UTC）。"""
+    return datetime.fromtimestamp(id_timestamp_ms(submission_id) / 1000, tz or timezone.utc)
+
+
+def datetime_to_ms(moment: datetime) -> int:
+    """datetime -> 毫秒时间戳；不带时区的值与 ``created_ts`` 一样按服务器本地时间解释。"""
+    return int(moment.timestamp() * 1000)
+
+
+def min_id_for(moment: datetime) -> int:
+    """``moment`` 之后生成的所有 ID 都不小于该值，可用作按时间的范围扫描下界（早于纪元时即最小 ID）。"""
+    return compose_id(max(EPOCH_MS, datetime_to_ms(moment)))
+
+
+def parse_submission_id(raw: Union[int, str]) -> Union[int, str]:
+    """解析 callback_data / 状态中的投稿 ID；旧版文本 ID（如 ``single_1_2``）原样返回，交给存储层按 legacy_id 查找。"""
+    if isinstance(raw, int):
+        return raw
+    raw = raw.strip()
+    return int(raw) if raw.isdigit() else raw
+
+
+class SnowflakeGenerator:
+    """线程安全的 ID 生成器；多进程部署时每个进程需使用不同的 ``worker_id``。"""
+
+    def __init__(self, worker_id: int = 0, clock: Optional[Callable[[], float]] = None):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self._clock = clock or time.time
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self, timestamp_ms: Optional[int] = None) -> int:
+        """生成下一个 ID；``timestamp_ms`` 用于按历史时间回填（迁移 / 导入）。"""
+        now_ms = int(self._clock() * 1000) if timestamp_ms is None else timestamp_ms
+        with self._lock:
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                # 同一毫秒，或时钟回拨：沿用上一次的时间戳继续递增序号
+                self._sequence += 1
+            else:
+                self._last_ms += 1
+                self._sequence = 0
+            return compose_id(self._last_ms, self.worker_id, self._sequence)
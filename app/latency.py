@@ -0,0 +1,55 @@
+"""
+审核耗时（投稿创建 -> 通过 / 拒绝）的对数分桶直方图。
+
+桶 ``b`` 覆盖 ``[BASE**b, BASE**(b+1))`` 秒，相邻桶宽度相差 BASE 倍：几秒到几周的耗时只需要
+一百个左右的桶，且每个桶内的相对误差不超过 20%。桶号由触发器通过 ``latency_bucket`` 自定义函数计算，
+SQLite 与内存引擎共用同一套分桶与分位数估算。
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional
+
+BASE = 1.2
+
+
+def latency_bucket(seconds: Optional[float]) -> Optional[int]:
+    """SQLite 自定义函数：耗时秒数 -> 桶号；不足 1 秒（含时钟回拨造成的负值）都记入 0 号桶。"""
+    if seconds is None:
+        return None
+    return int(math.log(max(seconds, 1.0), BASE))
+
+
+def bucket_bounds(bucket: int) -> tuple[float, float]:
+    return BASE**bucket, BASE ** (bucket + 1)
+
+
+def percentile(histogram: Dict[int, int], q: float) -> Optional[float]:
+    """按直方图估算第 q 分位（0-1）的耗时秒数，桶内按几何插值；没有数据时返回 None。"""
+    total = sum(histogram.values())
+    if total <= 0:
+        return None
+    rank = q * total
+    seen = 0
+    for bucket in sorted(histogram):
+        count = histogram[bucket]
+        if count <= 0:
+            continue
+        if seen + count >= rank:
+            low, high = bucket_bounds(bucket)
+            return low * (high / low) ** ((rank - seen) / count)
+        seen += count
+    return bucket_bounds(max(histogram))[1]
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.0f} 秒"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} 分钟"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} 小时"
+    return f"{seconds / 86400:.1f} 天"
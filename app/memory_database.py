@@ -0,0 +1,442 @@
+from __future__ import annotations
+
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import Future
+from dataclasses import replace
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.database import UPDATABLE_FIELDS
+from app.latency import latency_bucket, percentile
+from app.models import (
+    DashboardStats,
+    MediaFile,
+    ModeratorStats,
+    ReviewStats,
+    RollupBucket,
+    RollupReport,
+    SearchCursor,
+    SearchPage,
+    StatsDrift,
+    Submission,
+    SubmissionStatus,
+    TagUsage,
+    UserSummary,
+)
+from app.repository import WriteOp
+from app.rollups import HOUR
+from app.search import query_terms, tokenize
+from app.tags import normalize_tag, parse_tags
+from app.timeutil import TimeBuckets, format_day, hour_bucket, to_epoch
+
+
+def _count_phrase(tokens: List[str], phrase: List[str]) -> int:
+    """phrase 在 tokens 中连续出现的次数，最后一个词元按前缀匹配（与 FTS5 查询语义一致）。"""
+    *head, last = phrase
+    width = len(phrase)
+    return sum(
+        1
+        for start in range(len(tokens) - width + 1)
+        if tokens[start : start + width - 1] == head and tokens[start + width - 1].startswith(last)
+    )
+
+
+def _copy(submission: Submission, **overrides: Any) -> Submission:
+    overrides.setdefault("media_files", list(submission.media_files))
+    return replace(submission, **overrides)
+
+
+class InMemoryDatabase:
+    """纯内存存储后端，实现与 Database 相同的仓储协议。
+
+    数据放在 dict 里，并按用户、状态、日期维护二级索引和计数，统计查询不需要全表扫描。
+    进程退出即丢失，适合单元测试与压测。
+    """
+
+    read_pool_size = 1
+    blocking = False
+    write_behind = False
+
+    def __init__(self, timezone: str = ""):
+        self.time_buckets = TimeBuckets(timezone)
+        self._lock = threading.RLock()
+        self._rows: Dict[int, Submission] = {}
+        self._archive: Dict[int, Submission] = {}
+        self._by_user: Dict[int, Set[int]] = defaultdict(set)
+        self._status_counts: Counter = Counter()
+        self._daily_counts: Counter = Counter()
+        # 日期桶与 SQLite 的 created_day 一致：按配置时区划分的整数 YYYYMMDD
+        self._user_daily_counts: Dict[int, Counter] = defaultdict(Counter)
+        self._user_status_counts: Dict[int, Counter] = defaultdict(Counter)
+        self._usernames: Dict[int, str] = {}
+        # 标签索引：小写名称 -> 展示名称 / 投稿 ID 集合
+        self._tag_names: Dict[str, str] = {}
+        self._tag_members: Dict[str, Set[int]] = defaultdict(set)
+        self._preset_tags: Set[str] = set()
+
+    # ----- 索引维护 -----
+
+    def _find(self, submission_id: int) -> Optional[Submission]:
+        return self._rows.get(submission_id) or self._archive.get(submission_id)
+
+    def _index(self, submission: Submission):
+        day = self.time_buckets.day_of(submission.created_at)
+        self._by_user[submission.user_id].add(submission.submission_id)
+        self._status_counts[submission.status.value] += 1
+        self._daily_counts[day] += 1
+        self._user_daily_counts[day][submission.user_id] += 1
+        self._user_status_counts[submission.user_id][submission.status.value] += 1
+        self._usernames[submission.user_id] = submission.username
+        for tag in parse_tags(submission.tags):
+            self._tag_names.setdefault(tag.lower(), tag)
+            self._tag_members[tag.lower()].add(submission.submission_id)
+
+    def _unindex(self, submission: Submission):
+        day = self.time_buckets.day_of(submission.created_at)
+        self._by_user[submission.user_id].discard(submission.submission_id)
+        self._status_counts[submission.status.value] -= 1
+        self._daily_counts[day] -= 1
+        self._user_daily_counts[day][submission.user_id] -= 1
+        self._user_status_counts[submission.user_id][submission.status.value] -= 1
+        for tag in parse_tags(submission.tags):
+            self._tag_members[tag.lower()].discard(submission.submission_id)
+
+    # ----- 写入 -----
+
+    def write_behind_stats(self) -> Dict[str, float]:
+        return {}
+
+    def submit_write(self, op: WriteOp) -> Future:
+        future: Future = Future()
+        try:
+            with self._lock:
+                future.set_result(op(self))
+        except Exception as exc:  # pylint: disable=broad-except
+            future.set_exception(exc)
+        return future
+
+    def save_submission(self, submission: Submission):
+        self.submit_write(self.save_submission_op(submission)).result()
+        submission.mark_clean()
+
+    def save_submission_op(self, submission: Submission) -> WriteOp:
+        snapshot = _copy(submission)
+
+        def op(engine: "InMemoryDatabase"):
+            existing = engine._find(snapshot.submission_id)
+            if existing is not None and not snapshot.media_loaded:
+                snapshot.media_files = list(existing.media_files)
+            snapshot.media_loaded = True
+            snapshot.mark_clean()
+            target = engine._archive if snapshot.submission_id in engine._archive else engine._rows
+            if existing is not None:
+                engine._unindex(existing)
+            target[snapshot.submission_id] = snapshot
+            engine._index(snapshot)
+
+        return op
+
+    def update_fields(self, submission_id: int, **changes: Any) -> bool:
+        if not changes:
+            return False
+        return self.submit_write(self.update_fields_op(submission_id, **changes)).result() is not None
+
+    def update_fields_op(self, submission_id: int, **changes: Any) -> WriteOp:
+        unknown = set(changes) - UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown submission fields: {', '.join(sorted(unknown))}")
+
+        def op(engine: "InMemoryDatabase") -> Optional[int]:
+            existing = engine._find(submission_id)
+            if existing is None:
+                return None
+            owner = existing.user_id
+            engine._unindex(existing)
+            for name, value in changes.items():
+                setattr(existing, name, list(value) if name == "media_files" else value)
+            existing.mark_clean()
+            engine._index(existing)
+            return owner
+
+        return op
+
+    def archive_batch_op(self, cutoff: datetime, batch_size: int) -> WriteOp:
+        def op(engine: "InMemoryDatabase") -> int:
+            candidates = sorted(
+                (
+                    submission
+                    for submission in engine._rows.values()
+                    if submission.status != SubmissionStatus.PENDING and submission.created_at < cutoff
+                ),
+                key=lambda submission: submission.created_at,
+            )[:batch_size]
+            for submission in candidates:
+                engine._archive[submission.submission_id] = engine._rows.pop(submission.submission_id)
+            return len(candidates)
+
+        return op
+
+    def archive_decided(self, cutoff: datetime, batch_size: int = 500) -> int:
+        moved = 0
+        while True:
+            count = self.submit_write(self.archive_batch_op(cutoff, batch_size)).result()
+            moved += count
+            if count < batch_size:
+                return moved
+
+    def _stats_snapshot(self) -> Dict[str, Dict[tuple, int]]:
+        return {
+            "stats_status": {(status,): count for status, count in self._status_counts.items() if count},
+            "stats_daily": {(day,): count for day, count in self._daily_counts.items() if count},
+            "stats_user_daily": {
+                (day, user_id): count
+                for day, counts in self._user_daily_counts.items()
+                for user_id, count in counts.items()
+                if count
+            },
+            "stats_user_status": {
+                (user_id, status): count
+                for user_id, counts in self._user_status_counts.items()
+                for status, count in counts.items()
+                if count
+            },
+        }
+
+    def rebuild_stats(self) -> List[StatsDrift]:
+        with self._lock:
+            stored = self._stats_snapshot()
+            self._status_counts.clear()
+            self._daily_counts.clear()
+            self._user_daily_counts.clear()
+            self._user_status_counts.clear()
+            for submission in [*self._rows.values(), *self._archive.values()]:
+                day = self.time_buckets.day_of(submission.created_at)
+                self._status_counts[submission.status.value] += 1
+                self._daily_counts[day] += 1
+                self._user_daily_counts[day][submission.user_id] += 1
+                self._user_status_counts[submission.user_id][submission.status.value] += 1
+            actual = self._stats_snapshot()
+
+        return [
+            StatsDrift(table, key, stored[table].get(key, 0), actual[table].get(key, 0))
+            for table in actual
+            for key in sorted(set(stored[table]) | set(actual[table]), key=repr)
+            if stored[table].get(key, 0) != actual[table].get(key, 0)
+        ]
+
+    # ----- 读取 -----
+
+    def get_submission(self, submission_id: int, with_media: bool = True) -> Optional[Submission]:
+        with self._lock:
+            submission = self._find(submission_id)
+            if submission is None:
+                return None
+            if with_media:
+                return _copy(submission)
+            return _copy(submission, media_files=[], media_loaded=False)
+
+    def get_submissions(self, submission_ids: Sequence[int], with_media: bool = True) -> List[Submission]:
+        found = (self.get_submission(submission_id, with_media) for submission_id in submission_ids)
+        return [submission for submission in found if submission is not None]
+
+    def get_media(self, submission_id: int) -> List[MediaFile]:
+        with self._lock:
+            submission = self._find(submission_id)
+            return list(submission.media_files) if submission else []
+
+    def search_submissions(
+        self, query: str, after: Optional[SearchCursor] = None, limit: int = 10
+    ) -> SearchPage:
+        """线性扫描的简化检索：所有关键词都需命中，rank 为负的命中次数（标签加倍），与 FTS5 同样升序。"""
+        terms = query_terms(query)
+        if not terms:
+            return SearchPage(submissions=[])
+
+        hits = []
+        with self._lock:
+            for submission in [*self._rows.values(), *self._archive.values()]:
+                caption_tokens = tokenize(submission.caption_only)
+                tag_tokens = tokenize(submission.tags)
+                counts = [
+                    _count_phrase(caption_tokens, phrase) + 2 * _count_phrase(tag_tokens, phrase) for phrase in terms
+                ]
+                if all(counts):
+                    hits.append((-float(sum(counts)), submission.submission_id))
+
+        hits.sort()
+        if after is not None:
+            hits = [hit for hit in hits if hit > tuple(after)]
+        page = hits[:limit]
+        return SearchPage(
+            submissions=self.get_submissions([submission_id for _, submission_id in page], with_media=False),
+            next_cursor=page[-1] if len(hits) > limit else None,
+        )
+
+    def seed_tags(self, names: Sequence[str]):
+        with self._lock:
+            for tag in filter(None, map(normalize_tag, names)):
+                self._tag_names.setdefault(tag.lower(), tag)
+                self._preset_tags.add(tag.lower())
+
+    def get_popular_tags(self, limit: int = 20) -> List[TagUsage]:
+        with self._lock:
+            usages = [
+                TagUsage(name=name, usage_count=len(self._tag_members[key]), preset=key in self._preset_tags)
+                for key, name in self._tag_names.items()
+            ]
+        usages = [usage for usage in usages if usage.usage_count or usage.preset]
+        usages.sort(key=lambda usage: (-usage.usage_count, usage.name.lower()))
+        return usages[:limit]
+
+    def get_submissions_by_tag(
+        self, tag: str, before: Optional[int] = None, limit: int = 10
+    ) -> List[Submission]:
+        name = normalize_tag(tag)
+        if name is None:
+            return []
+        with self._lock:
+            ids = sorted(self._tag_members.get(name.lower(), ()), reverse=True)
+        if before is not None:
+            ids = [submission_id for submission_id in ids if submission_id < before]
+        return self.get_submissions(ids[:limit], with_media=False)
+
+    def resolve_legacy_id(self, legacy_id: str) -> Optional[int]:
+        # 内存引擎没有迁移前的数据
+        return None
+
+    def _rollup_bucket(self, granularity: str, submission: Submission) -> int:
+        if granularity == HOUR:
+            return hour_bucket(to_epoch(submission.created_at))
+        return self.time_buckets.day_of(submission.created_at)
+
+    def rollups_pending(self, granularity: str, start: int) -> bool:
+        # 内存引擎不维护汇总表，没有需要回填的历史
+        return False
+
+    def backfill_rollups_op(self, granularity: str, start: int) -> WriteOp:
+        def op(engine: "InMemoryDatabase") -> bool:
+            return False
+
+        return op
+
+    def backfill_rollups(self, granularity: str, start: int):
+        pass
+
+    def get_rollups(self, granularity: str, start: int, end: int) -> RollupReport:
+        # 内存引擎数据量小，直接扫描，不维护汇总表
+        totals: Dict[int, Counter] = defaultdict(Counter)
+        users: Dict[int, Set[int]] = defaultdict(set)
+        with self._lock:
+            for submission in [*self._rows.values(), *self._archive.values()]:
+                bucket = self._rollup_bucket(granularity, submission)
+                if not start <= bucket < end:
+                    continue
+                totals[bucket]["submissions"] += 1
+                totals[bucket][submission.status.value] += 1
+                totals[bucket]["media"] += len(submission.media_files)
+                users[bucket].add(submission.user_id)
+        return RollupReport(
+            granularity=granularity,
+            buckets=[
+                RollupBucket(
+                    bucket,
+                    counts["submissions"],
+                    counts[SubmissionStatus.APPROVED.value],
+                    counts[SubmissionStatus.REJECTED.value],
+                    len(users[bucket]),
+                    counts["media"],
+                )
+                for bucket, counts in sorted(totals.items())
+            ],
+            unique_submitters=len(set().union(*users.values())),
+        )
+
+    def get_tag_rollups(self, tag: str, start: int, end: int) -> List[Tuple[int, int]]:
+        name = normalize_tag(tag)
+        if name is None:
+            return []
+        counts: Counter = Counter()
+        with self._lock:
+            for submission_id in self._tag_members.get(name.lower(), ()):
+                day = self.time_buckets.day_of(self._find(submission_id).created_at)
+                if start <= day < end:
+                    counts[day] += 1
+        return sorted(counts.items())
+
+    def get_review_stats(self, start: int, end: int, limit: int = 10) -> ReviewStats:
+        histogram: Counter = Counter()
+        moderators: Dict[int, Counter] = defaultdict(Counter)
+        with self._lock:
+            for submission in [*self._rows.values(), *self._archive.values()]:
+                if submission.decided_at is None or submission.status == SubmissionStatus.PENDING:
+                    continue
+                decided_ts = to_epoch(submission.decided_at)
+                if not start <= self.time_buckets.day(decided_ts) < end:
+                    continue
+                histogram[latency_bucket(decided_ts - to_epoch(submission.created_at))] += 1
+                if submission.decision_by is not None:
+                    moderators[submission.decision_by][submission.status.value] += 1
+        ranked = sorted(moderators.items(), key=lambda item: (-sum(item[1].values()), item[0]))[:limit]
+        return ReviewStats(
+            decisions=sum(histogram.values()),
+            p50=percentile(histogram, 0.5),
+            p95=percentile(histogram, 0.95),
+            histogram=dict(histogram),
+            moderators=[
+                ModeratorStats(
+                    admin_id, counts[SubmissionStatus.APPROVED.value], counts[SubmissionStatus.REJECTED.value]
+                )
+                for admin_id, counts in ranked
+            ],
+        )
+
+    def get_dashboard_stats(self) -> DashboardStats:
+        seven_days_ago = self.time_buckets.days_ago(7)
+        thirty_days_ago = self.time_buckets.days_ago(30)
+
+        with self._lock:
+            status_counts = {status: count for status, count in self._status_counts.items() if count}
+            daily_counts = [
+                (format_day(day), count)
+                for day, count in sorted(self._daily_counts.items())
+                if count and day >= seven_days_ago
+            ]
+            submitters: Counter = Counter()
+            for day, counts in self._user_daily_counts.items():
+                if day >= thirty_days_ago:
+                    submitters.update(counts)
+            ranked = sorted((item for item in submitters.items() if item[1]), key=lambda item: (-item[1], item[0]))
+            top_submitters = [(self._usernames.get(user_id, ""), count) for user_id, count in ranked[:10]]
+
+        return DashboardStats(
+            total=sum(status_counts.values()),
+            status_counts=status_counts,
+            daily_counts=daily_counts,
+            top_submitters=top_submitters,
+        )
+
+    def get_user_summary(self, user_id: int, username: str) -> UserSummary:
+        with self._lock:
+            submissions = [self._find(submission_id) for submission_id in self._by_user.get(user_id, ())]
+
+        status_counts = dict(Counter(submission.status.value for submission in submissions))
+        recent = sorted(submissions, key=lambda submission: submission.created_at, reverse=True)[:10]
+        return UserSummary(
+            username=username,
+            total=len(submissions),
+            status_counts=status_counts,
+            recent_submissions=[
+                (
+                    submission.submission_id,
+                    submission.caption_only or "",
+                    submission.tags or "",
+                    submission.status.value,
+                    submission.created_at.isoformat(),
+                )
+                for submission in recent
+            ],
+        )
+
+    def close(self):
+        pass
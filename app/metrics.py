@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from typing import Callable, Dict
+
+Collector = Callable[[], Dict[str, float]]
+
+
+class MetricsRegistry:
+    """进程内指标汇总：各组件注册一个返回当前数值的 collector，/metrics 命令统一展示。"""
+
+    def __init__(self):
+        self._collectors: Dict[str, Collector] = {}
+
+    def register(self, name: str, collector: Collector):
+        self._collectors[name] = collector
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: collector() for name, collector in self._collectors.items()}
@@ -0,0 +1,845 @@
+"""
+按版本号顺序执行的 schema 迁移。
+
+当前版本记录在 ``PRAGMA user_version`` 中，每个迁移只执行一次，且与版本号写入处于同一事务，
+中途失败会整体回滚。新增迁移时只需在 ``MIGRATIONS`` 末尾追加，永远不要修改已发布的步骤。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from typing import Callable, Dict, List, Tuple
+
+from app.ids import SnowflakeGenerator
+from app.latency import latency_bucket
+from app.search import fts_text
+from app.tags import tag_list
+from app.timeutil import TimeBuckets, register_time_functions
+
+Migration = Tuple[int, str, Callable[[sqlite3.Connection], None]]
+
+
+def _column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _create_submissions(conn: sqlite3.Connection):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS submissions (
+            submission_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            media_files TEXT NOT NULL,
+            caption TEXT,
+            caption_only TEXT,
+            is_anonymous BOOLEAN DEFAULT 0,
+            tags TEXT,
+            status TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            media_group_id TEXT,
+            admin_message_id INTEGER,
+            preview_message_id INTEGER,
+            decision_by INTEGER
+        )
+    """
+    )
+    # 早期版本建的表没有 decision_by 列
+    if "decision_by" not in _column_names(conn, "submissions"):
+        conn.execute("ALTER TABLE submissions ADD COLUMN decision_by INTEGER")
+
+
+def _add_submission_indexes(conn: sqlite3.Connection):
+    # /my：按用户过滤、按时间倒序，附带 status 让状态统计也只走索引
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_submissions_user_created ON submissions (user_id, created_at, status)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions (status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_created ON submissions (created_at)")
+
+
+def _rebuild_submissions(conn: sqlite3.Connection, create_sql: str, columns: List[str]):
+    """SQLite 无法直接删除/修改列：按新定义建表、拷贝数据、替换旧表并重建索引。"""
+    conn.execute(create_sql.replace("submissions (", "submissions_new (", 1))
+    column_list = ", ".join(columns)
+    conn.execute(f"INSERT INTO submissions_new ({column_list}) SELECT {column_list} FROM submissions")
+    conn.execute("DROP TABLE submissions")
+    conn.execute("ALTER TABLE submissions_new RENAME TO submissions")
+    _add_submission_indexes(conn)
+
+
+def _move_media_to_child_table(conn: sqlite3.Connection):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS submission_media (
+            submission_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            file_id TEXT NOT NULL,
+            file_unique_id TEXT,
+            file_type TEXT NOT NULL,
+            caption TEXT,
+            PRIMARY KEY (submission_id, position)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submission_media_type ON submission_media (file_type, submission_id)")
+
+    def legacy_media_rows():
+        for submission_id, raw in conn.execute("SELECT submission_id, media_files FROM submissions"):
+            try:
+                items = json.loads(raw) if raw else []
+            except json.JSONDecodeError as exc:
+                logging.error("Invalid media_files JSON for submission %s: %s", submission_id, exc)
+                continue
+            for position, item in enumerate(items):
+                yield submission_id, position, item["file_id"], None, item["file_type"], item.get("caption")
+
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO submission_media
+        (submission_id, position, file_id, file_unique_id, file_type, caption)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+        list(legacy_media_rows()),
+    )
+
+    _rebuild_submissions(
+        conn,
+        """
+        CREATE TABLE submissions (
+            submission_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            caption TEXT,
+            caption_only TEXT,
+            is_anonymous BOOLEAN DEFAULT 0,
+            tags TEXT,
+            status TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            media_group_id TEXT,
+            admin_message_id INTEGER,
+            preview_message_id INTEGER,
+            decision_by INTEGER
+        )
+    """,
+        [
+            "submission_id",
+            "user_id",
+            "username",
+            "caption",
+            "caption_only",
+            "is_anonymous",
+            "tags",
+            "status",
+            "created_at",
+            "media_group_id",
+            "admin_message_id",
+            "preview_message_id",
+            "decision_by",
+        ],
+    )
+
+
+def _create_archive(conn: sqlite3.Connection):
+    # 冷数据表：结构与 submissions 相同，另记录归档时间
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS submissions_archive (
+            submission_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            caption TEXT,
+            caption_only TEXT,
+            is_anonymous BOOLEAN DEFAULT 0,
+            tags TEXT,
+            status TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            media_group_id TEXT,
+            admin_message_id INTEGER,
+            preview_message_id INTEGER,
+            decision_by INTEGER,
+            archived_at TIMESTAMP NOT NULL
+        )
+    """
+    )
+    _add_archive_indexes(conn)
+    _create_all_submissions_view(conn)
+
+
+def _add_archive_indexes(conn: sqlite3.Connection):
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_archive_user_created ON submissions_archive (user_id, created_at, status)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_archive_created ON submissions_archive (created_at)")
+
+
+def _create_all_submissions_view(conn: sqlite3.Connection):
+    """热表 + 归档表的统一只读视图，统计与 /my 查询都基于它，WHERE 条件会下推到两张表的索引。"""
+    columns = ", ".join(column for column in _column_names(conn, "submissions"))
+    conn.execute("DROP VIEW IF EXISTS all_submissions")
+    conn.execute(
+        f"""
+        CREATE VIEW all_submissions AS
+        SELECT {columns} FROM submissions
+        UNION ALL
+        SELECT {columns} FROM submissions_archive
+    """
+    )
+
+
+_SUBMISSION_DATA_COLUMNS = [
+    "user_id",
+    "username",
+    "caption",
+    "caption_only",
+    "is_anonymous",
+    "tags",
+    "status",
+    "created_at",
+    "media_group_id",
+    "admin_message_id",
+    "preview_message_id",
+    "decision_by",
+]
+
+
+def _rebuild_with_integer_ids(conn: sqlite3.Connection, table: str, extra_columns: List[str]):
+    extra_defs = "".join(f", {column} TIMESTAMP NOT NULL" for column in extra_columns)
+    conn.execute(
+        f"""
+        CREATE TABLE {table}_new (
+            submission_id INTEGER PRIMARY KEY,
+            legacy_id TEXT,
+            user_id INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            caption TEXT,
+            caption_only TEXT,
+            is_anonymous BOOLEAN DEFAULT 0,
+            tags TEXT,
+            status TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            media_group_id TEXT,
+            admin_message_id INTEGER,
+            preview_message_id INTEGER,
+            decision_by INTEGER{extra_defs}
+        )
+    """
+    )
+    column_list = ", ".join([*_SUBMISSION_DATA_COLUMNS, *extra_columns])
+    source_list = ", ".join(f"t.{column}" for column in [*_SUBMISSION_DATA_COLUMNS, *extra_columns])
+    conn.execute(
+        f"""
+        INSERT INTO {table}_new (submission_id, legacy_id, {column_list})
+        SELECT m.submission_id, m.legacy_id, {source_list}
+        FROM {table} AS t JOIN temp.submission_id_map AS m ON m.legacy_id = t.submission_id
+    """
+    )
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    # 旧消息上的按钮仍带着文本 ID，按 legacy_id 反查
+    conn.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_legacy ON {table} (legacy_id) WHERE legacy_id IS NOT NULL"
+    )
+
+
+def _convert_to_integer_ids(conn: sqlite3.Connection):
+    """文本主键（single_{uid}_{ts} / mg_{uid}_{ts}）-> 按创建时间生成的 snowflake 整数主键。
+
+    早于 ID 纪元的创建时间无法编码，直接报错回滚，而不是压成同一个时间前缀。
+    """
+    _ensure_time_functions(conn)
+    generator = SnowflakeGenerator()
+    rows = conn.execute(
+        "SELECT submission_id, iso_epoch_ms(created_at) FROM all_submissions ORDER BY created_at, submission_id"
+    ).fetchall()
+    id_map = []
+    for legacy_id, created_ms in rows:
+        try:
+            id_map.append((legacy_id, generator.next_id(created_ms)))
+        except ValueError as exc:
+            raise ValueError(f"cannot convert submission {legacy_id}: {exc}") from exc
+    conn.execute("CREATE TEMP TABLE submission_id_map (legacy_id TEXT PRIMARY KEY, submission_id INTEGER NOT NULL)")
+    conn.executemany("INSERT INTO temp.submission_id_map VALUES (?, ?)", id_map)
+
+    # 视图引用了两张表，重建期间先删除
+    conn.execute("DROP VIEW IF EXISTS all_submissions")
+    _rebuild_with_integer_ids(conn, "submissions", [])
+    _add_submission_indexes(conn)
+    _rebuild_with_integer_ids(conn, "submissions_archive", ["archived_at"])
+    _add_archive_indexes(conn)
+    _create_all_submissions_view(conn)
+
+    conn.execute(
+        """
+        CREATE TABLE submission_media_new (
+            submission_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            file_id TEXT NOT NULL,
+            file_unique_id TEXT,
+            file_type TEXT NOT NULL,
+            caption TEXT,
+            PRIMARY KEY (submission_id, position)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute(
+        """
+        INSERT INTO submission_media_new (submission_id, position, file_id, file_unique_id, file_type, caption)
+        SELECT m.submission_id, t.position, t.file_id, t.file_unique_id, t.file_type, t.caption
+        FROM submission_media AS t JOIN temp.submission_id_map AS m ON m.legacy_id = t.submission_id
+    """
+    )
+    conn.execute("DROP TABLE submission_media")
+    conn.execute("ALTER TABLE submission_media_new RENAME TO submission_media")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submission_media_type ON submission_media (file_type, submission_id)")
+    conn.execute("DROP TABLE temp.submission_id_map")
+
+
+def register_functions(conn: sqlite3.Connection):
+    """触发器依赖的自定义函数；每个会写入 submissions 的连接都必须注册。"""
+    conn.create_function("fts_text", 1, fts_text, deterministic=True)
+    conn.create_function("tag_list", 1, tag_list, deterministic=True)
+    conn.create_function("latency_bucket", 1, latency_bucket, deterministic=True)
+
+
+def _install_triggers(conn: sqlite3.Connection, build: Callable[..., List[str]], *args: str):
+    """在 submissions 与 submissions_archive 上各建一组 ``build(table, other, *args)`` 生成的触发器。
+
+    归档时同一行先插入归档表、再从热表删除：各组的插入 / 删除触发器都在另一张表里已有同 ID 的行时跳过，
+    由它们维护的索引和计数在搬移前后保持不变。
+    """
+    for table, other in (("submissions", "submissions_archive"), ("submissions_archive", "submissions")):
+        for statement in build(table, other, *args):
+            conn.execute(statement)
+
+
+def _fts_triggers(table: str, other: str) -> List[str]:
+    insert_row = (
+        "INSERT INTO submissions_fts (rowid, caption_only, tags) "
+        "VALUES (new.submission_id, fts_text(new.caption_only), fts_text(new.tags));"
+    )
+    delete_row = (
+        "INSERT INTO submissions_fts (submissions_fts, rowid, caption_only, tags) "
+        "VALUES ('delete', old.submission_id, fts_text(old.caption_only), fts_text(old.tags));"
+    )
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table}
+        WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE submission_id = new.submission_id)
+        BEGIN {insert_row} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table}
+        WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE submission_id = old.submission_id)
+        BEGIN {delete_row} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF caption_only, tags ON {table}
+        BEGIN {delete_row} {insert_row} END
+        """,
+    ]
+
+
+def _create_fts_index(conn: sqlite3.Connection):
+    """caption_only / tags 的全文索引（contentless FTS5，只存倒排表），由两张表上的触发器同步。"""
+    register_functions(conn)
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS submissions_fts
+        USING fts5(caption_only, tags, content='', tokenize='unicode61 remove_diacritics 2')
+    """
+    )
+    # 标签命中的权重是文案的两倍
+    conn.execute("INSERT INTO submissions_fts (submissions_fts, rank) VALUES ('rank', 'bm25(1.0, 2.0)')")
+    _install_triggers(conn, _fts_triggers)
+    conn.execute(
+        """
+        INSERT INTO submissions_fts (rowid, caption_only, tags)
+        SELECT submission_id, fts_text(caption_only), fts_text(tags) FROM all_submissions
+    """
+    )
+
+
+def _tag_triggers(table: str, other: str) -> List[str]:
+    link_new_tags = """
+        INSERT OR IGNORE INTO tags (name) SELECT value FROM json_each(tag_list(new.tags));
+        INSERT OR IGNORE INTO submission_tags (tag_id, submission_id)
+        SELECT tag_id, new.submission_id FROM tags WHERE name IN (SELECT value FROM json_each(tag_list(new.tags)));
+    """
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_tags_insert AFTER INSERT ON {table}
+        WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE submission_id = new.submission_id)
+        BEGIN {link_new_tags} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_tags_delete AFTER DELETE ON {table}
+        WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE submission_id = old.submission_id)
+        BEGIN DELETE FROM submission_tags WHERE submission_id = old.submission_id; END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_tags_update AFTER UPDATE OF tags ON {table}
+        WHEN old.tags IS NOT new.tags
+        BEGIN
+            DELETE FROM submission_tags
+            WHERE submission_id = old.submission_id AND tag_id NOT IN (
+                SELECT tag_id FROM tags WHERE name IN (SELECT value FROM json_each(tag_list(new.tags)))
+            );
+            {link_new_tags}
+        END
+        """,
+    ]
+
+
+def _create_tag_index(conn: sqlite3.Connection):
+    """规范化标签索引：tags（含使用次数）+ submission_tags 关联表，均由触发器维护。"""
+    register_functions(conn)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tags (
+            tag_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+            usage_count INTEGER NOT NULL DEFAULT 0,
+            preset BOOLEAN NOT NULL DEFAULT 0
+        )
+    """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tags_usage ON tags (usage_count DESC)")
+    # 主键 (tag_id, submission_id)：按标签列出投稿时直接按 ID（即时间）倒序走索引
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS submission_tags (
+            tag_id INTEGER NOT NULL,
+            submission_id INTEGER NOT NULL,
+            PRIMARY KEY (tag_id, submission_id)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submission_tags_submission ON submission_tags (submission_id)")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS submission_tags_count_insert AFTER INSERT ON submission_tags
+        BEGIN UPDATE tags SET usage_count = usage_count + 1 WHERE tag_id = new.tag_id; END
+    """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS submission_tags_count_delete AFTER DELETE ON submission_tags
+        BEGIN UPDATE tags SET usage_count = usage_count - 1 WHERE tag_id = old.tag_id; END
+    """
+    )
+    _install_triggers(conn, _tag_triggers)
+
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO tags (name)
+        SELECT value FROM all_submissions, json_each(tag_list(all_submissions.tags))
+    """
+    )
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO submission_tags (tag_id, submission_id)
+        SELECT t.tag_id, s.submission_id
+        FROM all_submissions AS s, json_each(tag_list(s.tags)) AS j
+        JOIN tags AS t ON t.name = j.value
+    """
+    )
+
+
+def _stats_sources(day: str) -> Dict[str, Tuple[Tuple[str, ...], str]]:
+    return {
+        "stats_status": (("status",), "SELECT status, COUNT(*) FROM all_submissions GROUP BY status"),
+        "stats_daily": (("day",), f"SELECT {day}, COUNT(*) FROM all_submissions GROUP BY 1"),
+        "stats_user_daily": (
+            ("day", "user_id"),
+            f"SELECT {day}, user_id, COUNT(*) FROM all_submissions GROUP BY 1, 2",
+        ),
+        "stats_user_status": (
+            ("user_id", "status"),
+            "SELECT user_id, status, COUNT(*) FROM all_submissions GROUP BY 1, 2",
+        ),
+    }
+
+
+# 迁移 8 建表时日期桶还是 DATE(created_at) 字符串，迁移 9 改为 created_day
+_STATS_SOURCES_V8 = _stats_sources("DATE(created_at)")
+_STATS_SOURCES_V9 = _stats_sources("created_day")
+
+_DECIDED = "decided_ts IS NOT NULL AND status != 'pending'"
+# 聚合表 -> (键列, 从原始数据重新计算的 SQL)；迁移初始化和 rebuild-stats 共用
+STATS_SOURCES = {
+    **_STATS_SOURCES_V9,
+    "review_latency": (
+        ("day", "bucket"),
+        f"""SELECT day_bucket(decided_ts), latency_bucket(decided_ts - created_ts), COUNT(*)
+        FROM all_submissions WHERE {_DECIDED} GROUP BY 1, 2""",
+    ),
+    "moderator_daily": (
+        ("day", "admin_id", "status"),
+        f"""SELECT day_bucket(decided_ts), decision_by, status, COUNT(*)
+        FROM all_submissions WHERE {_DECIDED} AND decision_by IS NOT NULL GROUP BY 1, 2, 3""",
+    ),
+}
+
+
+def fill_stats(conn: sqlite3.Connection, sources: Dict[str, Tuple[Tuple[str, ...], str]] = STATS_SOURCES):
+    """清空并按原始数据重新计算所有聚合表。"""
+    for table, (keys, source_sql) in sources.items():
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"INSERT INTO {table} ({', '.join(keys)}, count) {source_sql}")
+
+
+def _stats_changes(row: str, delta: str, day: str) -> str:
+    day = day.format(row=row)
+    return f"""
+        INSERT INTO stats_status (status, count) VALUES ({row}.status, {delta})
+        ON CONFLICT (status) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO stats_daily (day, count) VALUES ({day}, {delta})
+        ON CONFLICT (day) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO stats_user_daily (day, user_id, count) VALUES ({day}, {row}.user_id, {delta})
+        ON CONFLICT (day, user_id) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO stats_user_status (user_id, status, count) VALUES ({row}.user_id, {row}.status, {delta})
+        ON CONFLICT (user_id, status) DO UPDATE SET count = count + excluded.count;
+    """
+
+
+def _stats_triggers(
+    table: str, other: str, day: str = "{row}.created_day", day_column: str = "created_day"
+) -> List[str]:
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_stats_insert AFTER INSERT ON {table}
+        WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE submission_id = new.submission_id)
+        BEGIN {_stats_changes("new", "1", day)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_stats_delete AFTER DELETE ON {table}
+        WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE submission_id = old.submission_id)
+        BEGIN {_stats_changes("old", "-1", day)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_stats_update AFTER UPDATE OF status, user_id, {day_column} ON {table}
+        WHEN old.status IS NOT new.status OR old.user_id IS NOT new.user_id
+            OR {day.format(row="old")} IS NOT {day.format(row="new")}
+        BEGIN {_stats_changes("old", "-1", day)} {_stats_changes("new", "1", day)} END
+        """,
+    ]
+
+
+_SUBMISSION_TABLES = ("submissions", "submissions_archive")
+
+
+def _create_stats_tables(conn: sqlite3.Connection, day_type: str):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS stats_status (status TEXT PRIMARY KEY, count INTEGER NOT NULL) WITHOUT ROWID"
+    )
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS stats_daily (day {day_type} PRIMARY KEY, count INTEGER NOT NULL) WITHOUT ROWID"
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS stats_user_daily (
+            day {day_type} NOT NULL,
+            user_id INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, user_id)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stats_user_status (
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (user_id, status)
+        ) WITHOUT ROWID
+    """
+    )
+
+
+def _create_stats_counters(conn: sqlite3.Connection):
+    """/stats 与 /my 使用的聚合计数，由触发器在写入 / 状态变更的同一事务内增量维护。"""
+    _create_stats_tables(conn, "TEXT")
+    _install_triggers(conn, _stats_triggers, "DATE({row}.created_at)", "created_at")
+    fill_stats(conn, _STATS_SOURCES_V8)
+
+
+def _ensure_time_functions(conn: sqlite3.Connection):
+    # Database 连接已按配置的时区注册过；单独对一个连接跑迁移时退回服务器本地时区
+    registered = {row[0] for row in conn.execute("SELECT name FROM pragma_function_list")}
+    if "day_bucket" not in registered:
+        register_time_functions(conn, TimeBuckets())
+
+
+def _add_time_columns(conn: sqlite3.Connection):
+    """created_ts（epoch 秒）/ created_day（YYYYMMDD 日期桶）取代对 ISO 字符串做 DATE()，范围查询可以直接走索引。"""
+    _ensure_time_functions(conn)
+    for table in _SUBMISSION_TABLES:
+        columns = _column_names(conn, table)
+        if "created_ts" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN created_ts INTEGER")
+        if "created_day" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN created_day INTEGER")
+        conn.execute(f"UPDATE {table} SET created_ts = iso_epoch(created_at) WHERE created_ts IS NULL")
+        conn.execute(f"UPDATE {table} SET created_day = day_bucket(created_ts) WHERE created_day IS NULL")
+
+    for name, table in (("submissions", "submissions"), ("archive", "submissions_archive")):
+        conn.execute(f"DROP INDEX IF EXISTS idx_{name}_user_created")
+        conn.execute(f"DROP INDEX IF EXISTS idx_{name}_created")
+        conn.execute(f"CREATE INDEX idx_{name}_user_created ON {table} (user_id, created_ts, status)")
+        conn.execute(f"CREATE INDEX idx_{name}_created ON {table} (created_ts)")
+    _create_all_submissions_view(conn)
+
+    # 日期桶改为整数：重建按天聚合的两张表和触发器
+    for table in _SUBMISSION_TABLES:
+        for kind in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {table}_stats_{kind}")
+    conn.execute("DROP TABLE IF EXISTS stats_daily")
+    conn.execute("DROP TABLE IF EXISTS stats_user_daily")
+    _create_stats_tables(conn, "INTEGER")
+    _install_triggers(conn, _stats_triggers)
+    fill_stats(conn, _STATS_SOURCES_V9)
+
+
+def _rollup_changes(row: str, delta: str) -> str:
+    hour = f"({row}.created_ts / 3600 * 3600)"
+    media = f"(SELECT COUNT(*) FROM submission_media WHERE submission_id = {row}.submission_id)"
+    counters = (
+        f"{delta}, {delta} * ({row}.status = 'approved'), {delta} * ({row}.status = 'rejected'), {delta} * {media}"
+    )
+    add_counters = """
+        submissions = submissions + excluded.submissions, approved = approved + excluded.approved,
+        rejected = rejected + excluded.rejected, media = media + excluded.media
+    """
+    return f"""
+        INSERT INTO rollup_hourly (hour, submissions, approved, rejected, media) VALUES ({hour}, {counters})
+        ON CONFLICT (hour) DO UPDATE SET {add_counters};
+        INSERT INTO rollup_daily (day, submissions, approved, rejected, media) VALUES ({row}.created_day, {counters})
+        ON CONFLICT (day) DO UPDATE SET {add_counters};
+        INSERT INTO rollup_hourly_users (hour, user_id, count) VALUES ({hour}, {row}.user_id, {delta})
+        ON CONFLICT (hour, user_id) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO rollup_tag_daily (tag, day, count)
+        SELECT value, {row}.created_day, {delta} FROM json_each(tag_list({row}.tags)) WHERE 1
+        ON CONFLICT (tag, day) DO UPDATE SET count = count + excluded.count;
+    """
+
+
+def _rollup_triggers(table: str, other: str) -> List[str]:
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_rollup_insert AFTER INSERT ON {table}
+        WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE submission_id = new.submission_id)
+        BEGIN {_rollup_changes("new", "1")} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_rollup_delete AFTER DELETE ON {table}
+        WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE submission_id = old.submission_id)
+        BEGIN {_rollup_changes("old", "-1")} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_rollup_update AFTER UPDATE OF status, user_id, created_ts, tags ON {table}
+        WHEN old.status IS NOT new.status OR old.user_id IS NOT new.user_id
+            OR old.created_ts IS NOT new.created_ts OR old.tags IS NOT new.tags
+        BEGIN {_rollup_changes("old", "-1")} {_rollup_changes("new", "1")} END
+        """,
+    ]
+
+
+def _media_rollup_trigger(event: str, row: str, delta: str) -> str:
+    # 媒体在投稿行写入之后单独写入子表，按所属投稿的创建时间计入对应的桶
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS submission_media_rollup_{event.lower()} AFTER {event} ON submission_media
+        BEGIN
+            INSERT INTO rollup_hourly (hour, media)
+            SELECT created_ts / 3600 * 3600, {delta} FROM all_submissions WHERE submission_id = {row}.submission_id
+            ON CONFLICT (hour) DO UPDATE SET media = media + excluded.media;
+            INSERT INTO rollup_daily (day, media)
+            SELECT created_day, {delta} FROM all_submissions WHERE submission_id = {row}.submission_id
+            ON CONFLICT (day) DO UPDATE SET media = media + excluded.media;
+        END
+    """
+
+
+def _create_rollups(conn: sqlite3.Connection):
+    """按小时 / 按天的投稿汇总（投稿、通过、拒绝、媒体数、去重投稿人、按标签），由触发器增量维护。
+
+    已有的历史数据不在这里回填：rollup_state 记录每种粒度还需要补算的最后一个桶，
+    查询时按需向前补算（见 ``Database.backfill_rollups_op``）。
+    """
+    register_functions(conn)
+    _ensure_time_functions(conn)
+    for name, key in (("rollup_hourly", "hour"), ("rollup_daily", "day")):
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {name} (
+                {key} INTEGER PRIMARY KEY,
+                submissions INTEGER NOT NULL DEFAULT 0,
+                approved INTEGER NOT NULL DEFAULT 0,
+                rejected INTEGER NOT NULL DEFAULT 0,
+                media INTEGER NOT NULL DEFAULT 0
+            )
+        """
+        )
+    # 按天的去重投稿人直接用 stats_user_daily；按小时的单独维护
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rollup_hourly_users (
+            hour INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (hour, user_id)
+        ) WITHOUT ROWID
+    """
+    )
+    # 按标签名而不是 tag_id：触发器执行顺序不保证 tags 表里已有新标签
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rollup_tag_daily (
+            tag TEXT NOT NULL COLLATE NOCASE,
+            day INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (tag, day)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS rollup_state (granularity TEXT PRIMARY KEY, pending_through INTEGER NOT NULL)"
+    )
+    _install_triggers(conn, _rollup_triggers)
+    conn.execute(_media_rollup_trigger("INSERT", "new", "1"))
+    conn.execute(_media_rollup_trigger("DELETE", "old", "-1"))
+
+    # 当前所在的桶及之前的桶都可能缺少迁移前的数据；空库则无需回填
+    has_rows = conn.execute("SELECT EXISTS (SELECT 1 FROM all_submissions)").fetchone()[0]
+    now = "CAST(strftime('%s', 'now') AS INTEGER)"
+    conn.executemany(
+        "INSERT OR REPLACE INTO rollup_state (granularity, pending_through) VALUES (?, ?)",
+        [
+            ("hour", conn.execute(f"SELECT {now} / 3600 * 3600").fetchone()[0] if has_rows else 0),
+            ("day", conn.execute(f"SELECT day_bucket({now})").fetchone()[0] if has_rows else 0),
+        ],
+    )
+
+
+def _review_changes(row: str, delta: str) -> str:
+    decided = f"{row}.decided_ts IS NOT NULL AND {row}.status != 'pending'"
+    return f"""
+        INSERT INTO review_latency (day, bucket, count)
+        SELECT day_bucket({row}.decided_ts), latency_bucket({row}.decided_ts - {row}.created_ts), {delta}
+        WHERE {decided}
+        ON CONFLICT (day, bucket) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO moderator_daily (day, admin_id, status, count)
+        SELECT day_bucket({row}.decided_ts), {row}.decision_by, {row}.status, {delta}
+        WHERE {decided} AND {row}.decision_by IS NOT NULL
+        ON CONFLICT (day, admin_id, status) DO UPDATE SET count = count + excluded.count;
+    """
+
+
+def _review_triggers(table: str, other: str) -> List[str]:
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_review_insert AFTER INSERT ON {table}
+        WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE submission_id = new.submission_id)
+        BEGIN {_review_changes("new", "1")} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_review_delete AFTER DELETE ON {table}
+        WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE submission_id = old.submission_id)
+        BEGIN {_review_changes("old", "-1")} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_review_update
+        AFTER UPDATE OF status, decided_ts, decision_by, created_ts ON {table}
+        WHEN old.status IS NOT new.status OR old.decided_ts IS NOT new.decided_ts
+            OR old.decision_by IS NOT new.decision_by OR old.created_ts IS NOT new.created_ts
+        BEGIN {_review_changes("old", "-1")} {_review_changes("new", "1")} END
+        """,
+    ]
+
+
+def _create_review_stats(conn: sqlite3.Connection):
+    """审核时间与操作人：decided_at / decided_ts 列，以及按审核日期聚合的耗时直方图和管理员工作量。
+
+    迁移前已审核的投稿没有审核时间，不计入这两张表。
+    """
+    register_functions(conn)
+    _ensure_time_functions(conn)
+    for table in _SUBMISSION_TABLES:
+        columns = _column_names(conn, table)
+        if "decision_by" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN decision_by INTEGER")
+        if "decided_at" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN decided_at TIMESTAMP")
+        if "decided_ts" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN decided_ts INTEGER")
+    _create_all_submissions_view(conn)
+
+    # bucket 见 app/latency.py
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS review_latency (
+            day INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, bucket)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS moderator_daily (
+            day INTEGER NOT NULL,
+            admin_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, admin_id, status)
+        ) WITHOUT ROWID
+    """
+    )
+    _install_triggers(conn, _review_triggers)
+    fill_stats(conn, {name: STATS_SOURCES[name] for name in ("review_latency", "moderator_daily")})
+
+
+# 派生数据（全文索引、标签、计数、汇总、审核统计）都靠两张表上的触发器维护；以后重建 submissions /
+# submissions_archive 的迁移会丢掉这些触发器，需要对每个 ``_*_triggers`` 重新执行 ``_install_triggers``。
+MIGRATIONS: List[Migration] = [
+    (1, "create submissions table", _create_submissions),
+    (2, "add indexes on user_id/created_at/status", _add_submission_indexes),
+    (3, "move media_files JSON into submission_media", _move_media_to_child_table),
+    (4, "add submissions_archive and all_submissions view", _create_archive),
+    (5, "switch to time-ordered integer submission ids", _convert_to_integer_ids),
+    (6, "add submissions_fts full-text index", _create_fts_index),
+    (7, "add normalized tags / submission_tags index", _create_tag_index),
+    (8, "add incrementally maintained stats counters", _create_stats_counters),
+    (9, "add integer created_ts / created_day columns", _add_time_columns),
+    (10, "add hourly / daily rollup tables", _create_rollups),
+    (11, "record decided_at / decision_by and review latency stats", _create_review_stats),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """把数据库升级到最新版本，返回升级后的版本号。"""
+    current = get_schema_version(conn)
+
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        logging.info("Applying schema migration %s: %s", version, description)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        current = version
+
+    return current
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 
 class SubmissionStatus(Enum):
@@ -17,11 +17,15 @@ class MediaFile:
     file_id: str
     file_type: str  # 'photo', 'video', 'document'
     caption: Optional[str] = None
+    file_unique_id: Optional[str] = None
+
+
+_UNTRACKED_FIELDS = frozenset({"_dirty", "media_loaded"})
 
 
 @dataclass
 class Submission:
-    submission_id: str
+    submission_id: int
     user_id: int
     username: str
     media_files: List[MediaFile]
@@ -34,4 +38,108 @@ class Submission:
     media_group_id: Optional[str] = None
     admin_message_id: Optional[int] = None
     preview_message_id: Optional[int] = None
+    # 审核结果的时间与操作的管理员（通过 / 拒绝时写入）
+    decided_at: Optional[datetime] = None
+    decision_by: Optional[int] = None
+    # 为 False 表示读取时未加载 media_files（列表为空不代表没有媒体），保存时不会触碰媒体表
+    media_loaded: bool = field(default=True, repr=False, compare=False)
+
+    _dirty: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any):
+        # 构造完成后（_dirty 已存在）才开始记录被修改的字段
+        if name not in _UNTRACKED_FIELDS and hasattr(self, "_dirty"):
+            self._dirty.add(name)
+        super().__setattr__(name, value)
+
+    def dirty_fields(self) -> Dict[str, Any]:
+        """自上次落库以来被修改过的字段及其当前值。"""
+        return {name: getattr(self, name) for name in self._dirty}
+
+    def mark_clean(self):
+        self._dirty.clear()
+
+
+@dataclass(frozen=True)
+class DashboardStats:
+    total: int
+    status_counts: Dict[str, int]
+    daily_counts: List[Tuple[str, int]]
+    top_submitters: List[Tuple[str, int]]
+
+
+@dataclass(frozen=True)
+class UserSummary:
+    username: str
+    total: int
+    status_counts: Dict[str, int]
+    recent_submissions: List[Tuple[int, str, str, str, str]]
+
+
+# 检索游标：(rank, submission_id)，按 rank 升序、ID 升序翻页
+SearchCursor = Tuple[float, int]
+
+
+@dataclass
+class SearchPage:
+    submissions: List[Submission]
+    # 还有下一页时为本页最后一条的游标
+    next_cursor: Optional[SearchCursor] = None
+
+
+@dataclass(frozen=True)
+class TagUsage:
+    name: str
+    usage_count: int
+    preset: bool = False
+
+
+@dataclass(frozen=True)
+class StatsDrift:
+    """rebuild-stats 发现的计数偏差：聚合表中的值与按原始数据重算的值不同。"""
+
+    table: str
+    key: Tuple[Any, ...]
+    stored: int
+    actual: int
+
+
+@dataclass(frozen=True)
+class RollupBucket:
+    """一个小时 / 一天内创建的投稿汇总；bucket 为整点 epoch 秒或 YYYYMMDD。"""
+
+    bucket: int
+    submissions: int
+    approved: int
+    rejected: int
+    submitters: int
+    media: int
+
+
+@dataclass(frozen=True)
+class RollupReport:
+    granularity: str  # "hour" | "day"
+    buckets: List[RollupBucket]
+    unique_submitters: int
+
+
+@dataclass(frozen=True)
+class ModeratorStats:
+    admin_id: int
+    approved: int
+    rejected: int
+
+    @property
+    def decisions(self) -> int:
+        return self.approved + self.rejected
+
+
+@dataclass(frozen=True)
+class ReviewStats:
+    """一段时间内（按审核日期）的审核耗时分布与管理员工作量。"""
 
+    decisions: int
+    p50: Optional[float]
+    p95: Optional[float]
+    histogram: Dict[int, int]
+    moderators: List[ModeratorStats]
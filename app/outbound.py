@@ -0,0 +1,292 @@
+"""
+统一的 Telegram 发送调度：所有服务主动发出的消息（频道发布、审核群预览、用户通知、反馈转发）都经过这里。
+
+Telegram 对机器人有两层限速：全局约 30 条/秒，单个私聊约 1 条/秒，群组 / 频道约 20 条/分钟。
+调度器为全局和每个会话各维护一个令牌桶，按优先级（频道发布 > 审核群 > 用户通知）依次放行；
+某个会话的桶空了只会让它自己的消息排队，不会挡住其它会话。每个会话同一时间只有一个请求在途，
+收到 ``RetryAfter`` 时暂停该会话，等待 Telegram 给出的时间后把这条消息放回它原来的位置重发，
+因此同一会话里的消息（例如审核群的预览和随后的控制面板）不会因为重发而乱序。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+import warnings
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from telegram.error import RetryAfter
+from telegram.warnings import PTBDeprecationWarning
+
+# 优先级：数字越小越先发
+PUBLISH = 0
+REVIEW = 1
+NOTIFY = 2
+PRIORITY_NAMES = {PUBLISH: "publish", REVIEW: "review", NOTIFY: "notify"}
+
+# 会话令牌桶超过这个数量时，清掉已经回满的桶
+MAX_IDLE_BUCKETS = 1024
+
+
+class TokenBucket:
+    """以 rate 个/秒回填、最多存 capacity 个令牌；pause 之后在指定时间前不放行。"""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = now
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float, cost: float = 1.0) -> float:
+        """还要等多少秒才能拿到 cost 个令牌（单次消耗不超过容量）。"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        cost = min(cost, self.capacity)
+        return 0.0 if self.tokens >= cost else (cost - self.tokens) / self.rate
+
+    def take(self, now: float, cost: float = 1.0):
+        self._refill(now)
+        self.tokens -= min(cost, self.capacity)
+
+    def pause(self, now: float, seconds: float):
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = self.paused_until
+
+    def idle(self, now: float) -> bool:
+        return now >= self.paused_until and self.wait_time(now, self.capacity) == 0.0
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    chat_id: int = field(compare=False)
+    method: Callable[..., Awaitable[Any]] = field(compare=False)
+    kwargs: Dict[str, Any] = field(compare=False)
+    cost: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued: float = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+def retry_after_seconds(exc: RetryAfter) -> float:
+    # PTB 22 起 retry_after 可能是 int 或 timedelta（取决于 PTB_TIMEDELTA），两种都接受
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", PTBDeprecationWarning)
+        value = exc.retry_after
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class OutboundDispatcher:
+    """按全局 / 会话令牌桶与优先级调度发送，RetryAfter 自动退避重发。
+
+    用法与直接调用 Bot 方法一致，只是把方法本身作为第一个参数：
+    ``await outbound.send(bot.send_message, chat_id=..., text=..., priority=NOTIFY)``。
+    chat_id 为负数的是群组 / 频道，按群组限速；其余按私聊限速。
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        private_rate: float = 1.0,
+        group_per_minute: float = 20.0,
+        max_retries: int = 3,
+        max_retry_after: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.private_rate = private_rate
+        self.group_rate = group_per_minute / 60.0
+        self.group_burst = group_per_minute
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.clock = clock
+        self._global = TokenBucket(global_rate, global_rate, clock())
+        self._chats: Dict[int, TokenBucket] = {}
+        # 按 (priority, seq) 有序
+        self._jobs: List[_Job] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        # 有请求在途的会话
+        self._busy_chats: Set[int] = set()
+        self._closed = False
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def send(
+        self,
+        method: Callable[..., Awaitable[Any]],
+        *,
+        priority: int = NOTIFY,
+        cost: float = 1.0,
+        **kwargs: Any,
+    ) -> Any:
+        """排队发送并等待结果；cost 为这次调用计入限速的请求数（相册与 Telegram 一样按一次请求计，编辑 / 删除传 0）。"""
+        if self._closed:
+            raise RuntimeError("OutboundDispatcher is closed")
+        self._ensure_worker()
+        job = _Job(
+            priority=priority,
+            seq=next(self._seq),
+            chat_id=kwargs["chat_id"],
+            method=method,
+            kwargs=kwargs,
+            cost=cost,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued=self.clock(),
+        )
+        self._push(job)
+        return await job.future
+
+    async def close(self):
+        """停止调度；还在排队的发送以 RuntimeError 结束，正在进行的请求等其完成。"""
+        self._closed = True
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        for job in self._jobs:
+            if not job.future.done():
+                job.future.set_exception(RuntimeError("OutboundDispatcher is closed"))
+        self._jobs.clear()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def stats(self) -> Dict[str, float]:
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for job in self._jobs:
+            depth[PRIORITY_NAMES.get(job.priority, "notify")] += 1
+        started = self.sent + self.failed + self.retried
+        return {
+            "queue_depth": len(self._jobs),
+            **{f"queue_{name}": count for name, count in depth.items()},
+            "in_flight": len(self._in_flight),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retry_after": self.retried,
+            "avg_queue_wait": round(self.total_wait / started, 3) if started else 0.0,
+            "max_queue_wait": round(self.max_wait, 3),
+            "chat_buckets": len(self._chats),
+        }
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+    def _push(self, job: _Job):
+        bisect.insort(self._jobs, job)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            now = self.clock()
+            if len(self._chats) >= MAX_IDLE_BUCKETS:
+                for idle_chat in [key for key, value in self._chats.items() if value.idle(now)]:
+                    del self._chats[idle_chat]
+            if chat_id < 0:
+                bucket = TokenBucket(self.group_rate, self.group_burst, now)
+            else:
+                bucket = TokenBucket(self.private_rate, 1.0, now)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _next_ready(self, now: float) -> tuple[Optional[_Job], Optional[float]]:
+        """按优先级找第一条可以立即发送的任务；都不行时返回最短需要等待的秒数。"""
+        shortest: Optional[float] = None
+        blocked: Set[int] = set()
+        for job in list(self._jobs):
+            if job.future.done():
+                # 调用方已经取消
+                self._jobs.remove(job)
+                continue
+            global_wait = self._global.wait_time(now, job.cost)
+            if global_wait > 0:
+                return None, global_wait if shortest is None else min(shortest, global_wait)
+            if job.chat_id in blocked:
+                # 同一会话里保持先后顺序
+                continue
+            if job.chat_id in self._busy_chats:
+                # 等在途请求结束（结束时会唤醒调度）
+                blocked.add(job.chat_id)
+                continue
+            chat_wait = self._bucket(job.chat_id).wait_time(now, job.cost)
+            if chat_wait == 0:
+                return job, None
+            blocked.add(job.chat_id)
+            shortest = chat_wait if shortest is None else min(shortest, chat_wait)
+        return None, shortest
+
+    async def _run(self):
+        while True:
+            now = self.clock()
+            job, delay = self._next_ready(now)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._jobs.remove(job)
+            self._busy_chats.add(job.chat_id)
+            self._global.take(now, job.cost)
+            self._bucket(job.chat_id).take(now, job.cost)
+            waited = now - job.enqueued
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            task = asyncio.create_task(self._execute(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _execute(self, job: _Job):
+        try:
+            result = await job.method(**job.kwargs)
+        except RetryAfter as exc:
+            seconds = retry_after_seconds(exc)
+            self.retried += 1
+            self._bucket(job.chat_id).pause(self.clock(), seconds)
+            logging.warning("Flood limit hit for chat %s, retrying after %.1fs", job.chat_id, seconds)
+            if job.attempts < self.max_retries and seconds <= self.max_retry_after and not self._closed:
+                # 保留原来的 seq：重新排回同一会话队列的最前面
+                job.attempts += 1
+                job.enqueued = self.clock()
+                self._push(job)
+                return
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(exc)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(exc)
+        else:
+            self.sent += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._busy_chats.discard(job.chat_id)
+            if self._wakeup is not None:
+                self._wakeup.set()
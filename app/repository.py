@@ -0,0 +1,122 @@
+"""
+存储后端协议与工厂。
+
+services 通过 AsyncDatabase 访问存储，AsyncDatabase 只依赖 ``SubmissionRepository`` 中的方法；
+写操作统一拆成“生成写操作 (``*_op``) + ``submit_write`` 执行”两步，使组提交等机制与后端无关。
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+
+from app.models import (
+    DashboardStats,
+    MediaFile,
+    ReviewStats,
+    RollupReport,
+    SearchCursor,
+    SearchPage,
+    StatsDrift,
+    Submission,
+    TagUsage,
+    UserSummary,
+)
+from app.timeutil import TimeBuckets
+
+# 写操作：接收后端自身的写句柄（SQLite 为写连接，内存引擎为引擎本身）
+WriteOp = Callable[[Any], Any]
+
+BACKENDS = ("sqlite", "memory")
+
+
+class SubmissionRepository(Protocol):
+    # 读操作可并发执行的线程数
+    read_pool_size: int
+    # 为 False 表示调用不会阻塞（纯内存），AsyncDatabase 会直接在事件循环上执行
+    blocking: bool
+    # 按天统计使用的时区与日期桶换算
+    time_buckets: TimeBuckets
+
+    @property
+    def write_behind(self) -> bool: ...
+
+    def write_behind_stats(self) -> Dict[str, float]: ...
+
+    def submit_write(self, op: WriteOp) -> Future: ...
+
+    def save_submission(self, submission: Submission): ...
+
+    def save_submission_op(self, submission: Submission) -> WriteOp: ...
+
+    def update_fields(self, submission_id: int, **changes: Any) -> bool: ...
+
+    def update_fields_op(self, submission_id: int, **changes: Any) -> WriteOp:
+        """写操作返回投稿（修改前）所属的 user_id，记录不存在时返回 None。"""
+
+    def get_submission(self, submission_id: int, with_media: bool = True) -> Optional[Submission]: ...
+
+    def get_submissions(self, submission_ids: Sequence[int], with_media: bool = True) -> List[Submission]: ...
+
+    def get_media(self, submission_id: int) -> List[MediaFile]: ...
+
+    def search_submissions(
+        self, query: str, after: Optional[SearchCursor] = None, limit: int = 10
+    ) -> SearchPage: ...
+
+    def rebuild_stats(self) -> List[StatsDrift]: ...
+
+    def seed_tags(self, names: Sequence[str]): ...
+
+    def get_popular_tags(self, limit: int = 20) -> List[TagUsage]: ...
+
+    def get_submissions_by_tag(
+        self, tag: str, before: Optional[int] = None, limit: int = 10
+    ) -> List[Submission]: ...
+
+    def resolve_legacy_id(self, legacy_id: str) -> Optional[int]: ...
+
+    def get_dashboard_stats(self) -> DashboardStats: ...
+
+    def rollups_pending(self, granularity: str, start: int) -> bool: ...
+
+    def backfill_rollups_op(self, granularity: str, start: int) -> WriteOp:
+        """补算一批历史汇总，写操作返回是否还有需要补算的桶。"""
+
+    def backfill_rollups(self, granularity: str, start: int): ...
+
+    def get_rollups(self, granularity: str, start: int, end: int) -> RollupReport: ...
+
+    def get_tag_rollups(self, tag: str, start: int, end: int) -> List[Tuple[int, int]]: ...
+
+    def get_review_stats(self, start: int, end: int, limit: int = 10) -> ReviewStats: ...
+
+    def get_user_summary(self, user_id: int, username: str) -> UserSummary: ...
+
+    def archive_batch_op(self, cutoff: datetime, batch_size: int) -> WriteOp: ...
+
+    def archive_decided(self, cutoff: datetime, batch_size: int = 500) -> int: ...
+
+    def close(self): ...
+
+
+def create_repository(settings) -> SubmissionRepository:
+    """按 Settings.storage_backend 创建存储后端。"""
+    if settings.storage_backend == "memory":
+        from app.memory_database import InMemoryDatabase
+
+        return InMemoryDatabase(timezone=settings.timezone)
+
+    if settings.storage_backend == "sqlite":
+        from app.database import Database
+
+        return Database(
+            db_path=settings.db_path,
+            write_behind=settings.db_write_behind,
+            write_batch_size=settings.db_write_batch_size,
+            write_batch_delay=settings.db_write_batch_delay_ms / 1000,
+            timezone=settings.timezone,
+        )
+
+    raise ValueError(f"Unknown STORAGE_BACKEND {settings.storage_backend!r}, expected one of {BACKENDS}")
@@ -0,0 +1,73 @@
+"""
+按小时 / 按天的投稿汇总（rollup）：时间段解析、查询窗口与展示分组。
+
+汇总表由触发器随写入增量维护（见迁移 10）；迁移之前的历史数据不在迁移时一次性回填，
+而是第一次查询到某个时间段时按桶范围补算，之后同样由触发器维护。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple, TypeVar
+
+from app.timeutil import TimeBuckets, add_days, format_day, hour_bucket
+
+HOUR = "hour"
+DAY = "day"
+GRANULARITIES = (HOUR, DAY)
+
+T = TypeVar("T")
+
+# 每个单位对应 (粒度, 桶数)
+_PERIOD_UNITS = {"h": (HOUR, 1), "d": (DAY, 1), "w": (DAY, 7), "m": (DAY, 30), "y": (DAY, 365)}
+_PERIOD_PATTERN = re.compile(r"^(\d+)([hdwmy])$")
+MAX_BUCKETS = {HOUR: 24 * 31, DAY: 365 * 5}
+
+# 懒回填每个写事务补算的桶数，避免长时间占用写连接
+BACKFILL_CHUNK = {HOUR: 24 * 7, DAY: 31}
+
+
+@dataclass(frozen=True)
+class Period:
+    granularity: str
+    count: int
+    label: str
+
+
+def parse_period(text: str) -> Optional[Period]:
+    """'48h' / '90d' / '12w' / '6m' / '1y' -> Period；格式不对或超出范围时返回 None。"""
+    match = _PERIOD_PATTERN.match(text.strip().lower())
+    if not match:
+        return None
+    granularity, per_unit = _PERIOD_UNITS[match.group(2)]
+    count = int(match.group(1)) * per_unit
+    if not 0 < count <= MAX_BUCKETS[granularity]:
+        return None
+    return Period(granularity, count, match.group(0))
+
+
+def window(buckets: TimeBuckets, period: Period, now: Optional[datetime] = None) -> Tuple[int, int]:
+    """截至当前桶（含）的 period.count 个桶，返回 [start, end) 桶键。"""
+    if period.granularity == HOUR:
+        end = hour_bucket((now or datetime.now()).timestamp()) + 3600
+        return end - period.count * 3600, end
+    end = add_days(buckets.today(now), 1)
+    return add_days(end, -period.count), end
+
+
+def previous_bucket(granularity: str, bucket: int, steps: int = 1) -> int:
+    return bucket - steps * 3600 if granularity == HOUR else add_days(bucket, -steps)
+
+
+def bucket_label(buckets: TimeBuckets, granularity: str, bucket: int) -> str:
+    if granularity == HOUR:
+        return buckets.localize(bucket).strftime("%m-%d %H:00")
+    return format_day(bucket)
+
+
+def group_buckets(rows: List[T], max_rows: int = 12) -> List[List[T]]:
+    """把按时间排好序的桶合并成不超过 max_rows 组，长时间段在消息里只展示粗粒度的走势。"""
+    size = max(1, -(-len(rows) // max_rows))
+    return [rows[index : index + size] for index in range(0, len(rows), size)]
@@ -0,0 +1,41 @@
+"""
+全文检索的文本处理（FTS5 与内存引擎共用）。
+
+unicode61 分词器把连续的中日韩字符当成一个词，“日常”无法命中“今天的日常”。
+写入索引前用 ``fts_text`` 在每个 CJK 字符两侧补空格，索引粒度变成单字；
+查询时 ``build_match_query`` 把每个关键词转成短语查询，单字必须连续出现，效果等同子串匹配。
+``fts_text`` 注册为 SQLite 函数供触发器调用，必须保持确定性，否则删除索引时无法对上原值。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+_CJK_CHAR = re.compile(r"([぀-ヿ㐀-䶿一-鿿豈-﫿가-힯])")
+_TOKEN = re.compile(r"\w+")
+
+
+def fts_text(text: Optional[str]) -> str:
+    """写入 FTS 索引前的文本规整：CJK 单字切分。"""
+    if not text:
+        return ""
+    return _CJK_CHAR.sub(r" \1 ", text)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """与 unicode61 近似的分词（小写、按非单词字符切分），内存引擎使用。"""
+    return _TOKEN.findall(fts_text(text).lower())
+
+
+def query_terms(query: str) -> List[List[str]]:
+    """用户输入 -> 关键词列表，每个关键词是一组需要连续出现的词元。"""
+    return [tokens for tokens in (tokenize(term) for term in query.split()) if tokens]
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """用户输入 -> FTS5 MATCH 表达式；关键词之间为 AND，每个关键词的最后一个词元按前缀匹配。"""
+    terms = query_terms(query)
+    if not terms:
+        return None
+    return " ".join(f'"{" ".join(tokens)}"*' for tokens in terms)
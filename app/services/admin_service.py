@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import html
 import logging
+from datetime import datetime
 from typing import Dict
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
@@ -10,7 +11,9 @@ from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
 from app.models import Submission, SubmissionStatus
+from app.outbound import NOTIFY, PUBLISH, REVIEW
 from app.services.state_store import TimedStateStore
+from app.tags import merge_tags, parse_tags
 
 
 class AdminService:
@@ -20,6 +23,8 @@ class AdminService:
         self.container = container
         self.db = container.db
         self.settings = container.settings
+        self.outbound = container.outbound
+        self.profiles = container.profiles
         # 管理员三种临时状态：编辑文案 / 添加标签 / 填写拒绝理由
         self.edit_states: TimedStateStore[Dict] = TimedStateStore(ttl_seconds=600)
         self.tag_states: TimedStateStore[Dict] = TimedStateStore(ttl_seconds=600)
@@ -43,15 +48,7 @@ class AdminService:
 
     async def format_control_text(self, submission: Submission, context: ContextTypes.DEFAULT_TYPE) -> str:
         anonymous_status = "是" if submission.is_anonymous else "否"
-
-        try:
-            user = await context.bot.get_chat(submission.user_id)
-            full_name = user.first_name
-            if user.last_name:
-                full_name += f" {user.last_name}"
-        except Exception as exc:  # pylint: disable=broad-except
-            logging.error("Error getting user info: %s", exc)
-            full_name = submission.username
+        full_name = await self.profiles.display_name(context.bot, submission.user_id, submission.username)
 
         escaped_full_name = html.escape(full_name)
         username_display = f" (@{submission.username})" if submission.username else ""
@@ -82,7 +79,7 @@ class AdminService:
 
     async def _handle_admin_approve(self, query, data: str, context: ContextTypes.DEFAULT_TYPE):
         submission_id = data.split(":")[1]
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id)
 
         if not submission:
             await query.edit_message_text("❌ 投稿不存在", parse_mode=ParseMode.HTML)
@@ -93,15 +90,7 @@ class AdminService:
             final_caption = f"{final_caption}\n\n{submission.tags}" if final_caption else submission.tags
 
         if not submission.is_anonymous:
-            try:
-                user = await context.bot.get_chat(submission.user_id)
-                full_name = user.first_name
-                if user.last_name:
-                    full_name += f" {user.last_name}"
-            except Exception as exc:  # pylint: disable=broad-except
-                logging.error("Error getting user info: %s", exc)
-                full_name = submission.username
-
+            full_name = await self.profiles.display_name(context.bot, submission.user_id, submission.username)
             escaped_full_name = html.escape(full_name)
             user_link = f"<a href='tg://user?id={submission.user_id}'>{escaped_full_name}</a>"
             footer_text = f"\n\nvia {user_link}"
@@ -135,58 +124,68 @@ class AdminService:
                         media = InputMediaDocument(media=media_file.file_id, caption=media_caption, parse_mode=ParseMode.HTML)
                     media_group.append(media)
 
-                await context.bot.send_media_group(chat_id=self.settings.channel_id, media=media_group)
+                await self.outbound.send(
+                    context.bot.send_media_group,
+                    chat_id=self.settings.channel_id,
+                    media=media_group,
+                    priority=PUBLISH,
+                )
             else:
                 if submission.media_files:
                     media_file = submission.media_files[0]
                     if media_file.file_type == "photo":
-                        await context.bot.send_photo(
+                        await self.outbound.send(
+                            context.bot.send_photo,
                             chat_id=self.settings.channel_id,
                             photo=media_file.file_id,
                             caption=final_caption,
                             parse_mode=ParseMode.HTML,
+                            priority=PUBLISH,
                         )
                     elif media_file.file_type == "video":
-                        await context.bot.send_video(
+                        await self.outbound.send(
+                            context.bot.send_video,
                             chat_id=self.settings.channel_id,
                             video=media_file.file_id,
                             caption=final_caption,
                             parse_mode=ParseMode.HTML,
+                            priority=PUBLISH,
                         )
                     else:
-                        await context.bot.send_document(
+                        await self.outbound.send(
+                            context.bot.send_document,
                             chat_id=self.settings.channel_id,
                             document=media_file.file_id,
                             caption=final_caption,
                             parse_mode=ParseMode.HTML,
+                            priority=PUBLISH,
                         )
                 else:
-                    await context.bot.send_message(
+                    await self.outbound.send(
+                        context.bot.send_message,
                         chat_id=self.settings.channel_id,
                         text=final_caption,
                         parse_mode=ParseMode.HTML,
+                        priority=PUBLISH,
                     )
 
             submission.status = SubmissionStatus.APPROVED
-            self.db.save_submission(submission)
-
-            try:
-                await context.bot.send_message(
-                    chat_id=submission.user_id,
-                    text="✅ 恭喜！您的投稿已被采纳。",
-                    parse_mode=ParseMode.HTML,
-                )
-            except Exception as exc:  # pylint: disable=broad-except
-                logging.error("Error notifying user about approval: %s", exc)
+            submission.decided_at = datetime.now()
+            submission.decision_by = query.from_user.id
+            await self.db.save_changes(submission)
 
             admin_name = query.from_user.first_name
             if query.from_user.last_name:
                 admin_name += f" {query.from_user.last_name}"
 
-            await query.edit_message_text(
-                f"✅ <b>已发布</b> (操作人: {admin_name})",
-                reply_markup=None,
-                parse_mode=ParseMode.HTML,
+            # 通知投稿人与更新控制面板互不依赖，同时进行
+            await asyncio.gather(
+                self._notify_user(context, submission.user_id, "✅ 恭喜！您的投稿已被采纳。", "approval"),
+                query.edit_message_text(
+                    f"✅ <b>已发布</b> (操作人: {admin_name})",
+                    reply_markup=None,
+                    parse_mode=ParseMode.HTML,
+                ),
             )
         except Exception as exc:  # pylint: disable=broad-except
             logging.error("Error publishing to channel: %s", exc)
@@ -198,7 +197,7 @@ class AdminService:
 
     async def _handle_admin_reject_simple(self, query, submission_id: str, context: ContextTypes.DEFAULT_TYPE):
         """管理员点“拒绝”后，提示其回复理由，再转发给用户。"""
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id, with_media=False)
 
         if not submission:
             await query.edit_message_text("❌ 投稿不存在", parse_mode=ParseMode.HTML)
@@ -212,10 +211,12 @@ class AdminService:
             "如果你只回一个表情或空消息，就会发一条默认的拒绝提示给她。"
         )
 
-        prompt_message = await context.bot.send_message(
+        prompt_message = await self.outbound.send(
+            context.bot.send_message,
             chat_id=self.settings.admin_group_id,
             text=prompt_text,
             parse_mode=ParseMode.HTML,
+            priority=REVIEW,
         )
 
         admin_id = query.from_user.id
@@ -237,20 +238,22 @@ class AdminService:
 
     async def _handle_admin_edit(self, query, data: str, context: ContextTypes.DEFAULT_TYPE):
         submission_id = data.split(":")[1]
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id, with_media=False)
 
         if not submission:
             await query.answer("❌ 投稿不存在")
             return
 
         escaped_caption = html.escape(submission.caption_only or "无")
-        prompt_message = await context.bot.send_message(
+        prompt_message = await self.outbound.send(
+            context.bot.send_message,
             chat_id=self.settings.admin_group_id,
             text=f"当前文案:\n{escaped_caption}\n\n请回复本条消息输入新的文案：",
             reply_markup=InlineKeyboardMarkup(
                 [[InlineKeyboardButton("↩️ 返回", callback_data=f"admin_back:{submission_id}")]]
             ),
             parse_mode=ParseMode.HTML,
+            priority=REVIEW,
         )
 
         admin_id = query.from_user.id
@@ -265,20 +268,27 @@ class AdminService:
         await query.answer()
 
     async def _handle_admin_tags_simple(self, query, submission_id: str, context: ContextTypes.DEFAULT_TYPE):
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id, with_media=False)
 
         if not submission:
             await query.answer("❌ 投稿不存在")
             return
 
         escaped_tags = html.escape(submission.tags) if submission.tags else "无"
-        prompt_message = await context.bot.send_message(
+        popular = await self.db.get_popular_tags(limit=10)
+        popular_text = " ".join(f"<code>{html.escape(tag.name)}</code>" for tag in popular) or "无"
+        prompt_message = await self.outbound.send(
+            context.bot.send_message,
             chat_id=self.settings.admin_group_id,
-            text=f"当前标签: {escaped_tags}\n\n<b>请回复本条消息输入您想添加的 Tag (例如 #Tag1 #Tag2)...</b>",
+            text=(
+                f"当前标签: {escaped_tags}\n常用标签: {popular_text}\n\n"
+                "<b>请回复本条消息输入您想添加的 Tag (例如 #Tag1 #Tag2)...</b>"
+            ),
             reply_markup=InlineKeyboardMarkup(
                 [[InlineKeyboardButton("↩️ 返回", callback_data=f"admin_back:{submission_id}")]]
             ),
             parse_mode=ParseMode.HTML,
+            priority=REVIEW,
         )
 
         admin_id = query.from_user.id
@@ -294,7 +304,7 @@ class AdminService:
 
     async def _handle_admin_ban(self, query, data: str):
         submission_id = data.split(":")[1]
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id, with_media=False)
 
         if not submission:
             await query.edit_message_text("❌ 投稿不存在", parse_mode=ParseMode.HTML)
@@ -316,7 +326,7 @@ class AdminService:
 
     async def _handle_confirm_ban(self, query, data: str):
         submission_id = data.split(":")[1]
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id, with_media=False)
 
         if not submission:
             await query.edit_message_text("❌ 投稿不存在", parse_mode=ParseMode.HTML)
@@ -331,7 +341,7 @@ class AdminService:
 
     async def _handle_admin_back(self, query, data: str, context: ContextTypes.DEFAULT_TYPE):
         submission_id = data.split(":")[1]
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id, with_media=False)
 
         if not submission:
             await query.edit_message_text("❌ 投稿不存在", parse_mode=ParseMode.HTML)
@@ -364,7 +374,7 @@ class AdminService:
         submission_id = state_data["sub_id"]
         prompt_msg_id = state_data["prompt_msg_id"]
 
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id, with_media=False)
         if not submission:
             await self._safe_delete_message(prompt_msg_id, context)
             self.edit_states.delete(admin_id)
@@ -381,7 +391,7 @@ class AdminService:
             submission.caption = new_caption + "\n\n" + submission.tags
         else:
             submission.caption = new_caption
-        self.db.save_submission(submission)
+        await self.db.save_changes(submission)
 
         await self._update_preview_message(submission, context)
 
@@ -397,7 +407,7 @@ class AdminService:
         submission_id = state_data["sub_id"]
         prompt_msg_id = state_data["prompt_msg_id"]
 
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id, with_media=False)
         if not submission:
             await self._safe_delete_message(prompt_msg_id, context)
             self.tag_states.delete(admin_id)
@@ -409,16 +419,19 @@ class AdminService:
             self.tag_states.delete(admin_id)
             return
 
-        if submission.tags and new_tags in submission.tags:
-            warning_msg = await context.bot.send_message(
+        added_tags = merge_tags(submission.tags, parse_tags(new_tags))
+        if not added_tags:
+            warning_msg = await self.outbound.send(
+                context.bot.send_message,
                 chat_id=self.settings.admin_group_id,
-                text=f"⚠️ 标签 <code>{new_tags}</code> 已存在，无需重复添加。",
+                text=f"⚠️ 标签 <code>{html.escape(new_tags)}</code> 已存在，无需重复添加。",
                 parse_mode=ParseMode.HTML,
+                priority=REVIEW,
             )
             await asyncio.sleep(3)
             await self._safe_delete_message(warning_msg.message_id, context)
         else:
-            submission.tags = f"{submission.tags} {new_tags}".strip() if submission.tags else new_tags
+            submission.tags = " ".join(filter(None, [submission.tags, *added_tags]))
             if submission.caption_only:
                 submission.caption = submission.caption_only
                 if submission.tags:
@@ -426,7 +439,7 @@ class AdminService:
             else:
                 submission.caption = submission.tags
 
-            self.db.save_submission(submission)
+            await self.db.save_changes(submission)
             await self._update_preview_message(submission, context)
 
         await self._safe_delete_message(message.message_id, context)
@@ -442,7 +455,7 @@ class AdminService:
         prompt_msg_id = state_data["prompt_msg_id"]
         control_msg_id = state_data["control_msg_id"]
 
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id, with_media=False)
         if not submission:
             await self._safe_delete_message(prompt_msg_id, context)
             self.reject_states.delete(admin_id)
@@ -463,18 +476,13 @@ class AdminService:
                 "如果你还想当下贱的玩物，可以随时再来。"
             )
 
-        try:
-            await context.bot.send_message(
-                chat_id=submission.user_id,
-                text=user_text,
-                parse_mode=ParseMode.HTML,
-            )
-        except Exception as exc:  # pylint: disable=broad-except
-            logging.error("Error notifying user about rejection: %s", exc)
+        await self._notify_user(context, submission.user_id, user_text, "rejection")
 
         # 更新数据库状态
         submission.status = SubmissionStatus.REJECTED
-        self.db.save_submission(submission)
+        submission.decided_at = datetime.now()
+        submission.decision_by = admin_id
+        await self.db.save_changes(submission)
 
         # 更新管理员控制面板那条消息
         try:
@@ -483,11 +491,14 @@ class AdminService:
                 admin_name += f" {message.from_user.last_name}"
 
             summary = f"理由：{admin_reason[:30]}..." if admin_reason else "使用默认理由"
-            await context.bot.edit_message_text(
+            await self.outbound.send(
+                context.bot.edit_message_text,
                 chat_id=self.settings.admin_group_id,
                 message_id=control_msg_id,
                 text=f"🚫 <b>已拒绝</b> (操作人: {admin_name})\n{summary}",
                 parse_mode=ParseMode.HTML,
+                cost=0,
+                priority=REVIEW,
             )
         except Exception as exc:  # pylint: disable=broad-except
             logging.error("Error updating admin control message after rejection: %s", exc)
@@ -498,6 +509,19 @@ class AdminService:
 
         self.reject_states.delete(admin_id)
 
+    async def _notify_user(self, context: ContextTypes.DEFAULT_TYPE, user_id: int, text: str, event: str):
+        """通知投稿人审核结果；用户屏蔽了机器人等失败只记日志，不影响审核流程。"""
+        try:
+            await self.outbound.send(
+                context.bot.send_message,
+                chat_id=user_id,
+                text=text,
+                parse_mode=ParseMode.HTML,
+                priority=NOTIFY,
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.error("Error notifying user about %s: %s", event, exc)
+
     async def _update_preview_message(self, submission: Submission, context: ContextTypes.DEFAULT_TYPE):
         try:
             final_caption = submission.caption_only or ""
@@ -506,27 +530,36 @@ class AdminService:
 
             if submission.preview_message_id:
                 try:
-                    await context.bot.edit_message_caption(
+                    await self.outbound.send(
+                        context.bot.edit_message_caption,
                         chat_id=self.settings.admin_group_id,
                         message_id=submission.preview_message_id,
                         caption=final_caption,
                         parse_mode=ParseMode.HTML,
+                        cost=0,
+                        priority=REVIEW,
                     )
                 except Exception:
-                    await context.bot.edit_message_text(
+                    await self.outbound.send(
+                        context.bot.edit_message_text,
                         chat_id=self.settings.admin_group_id,
                         message_id=submission.preview_message_id,
                         text=final_caption,
                         parse_mode=ParseMode.HTML,
+                        cost=0,
+                        priority=REVIEW,
                     )
         except Exception as exc:  # pylint: disable=broad-except
             logging.error("Error updating preview message: %s", exc)
 
     async def _safe_delete_message(self, message_id: int, context: ContextTypes.DEFAULT_TYPE):
         try:
-            await context.bot.delete_message(
+            await self.outbound.send(
+                context.bot.delete_message,
                 chat_id=self.settings.admin_group_id,
                 message_id=message_id,
+                cost=0,
+                priority=REVIEW,
             )
         except Exception:
             pass
@@ -1,9 +1,17 @@
 from __future__ import annotations
 
 from app.config import Settings
-from app.database import Database
+from app.async_database import AsyncDatabase
+from app.backup import BackupManager
+from app.ids import SnowflakeGenerator
+from app.metrics import MetricsRegistry
+from app.outbound import OutboundDispatcher
+from app.repository import create_repository
 from app.services.admin_service import AdminService
 from app.services.feedback_service import FeedbackService
+from app.services.maintenance_service import MaintenanceService
+from app.services.profiles import ProfileCache
+from app.services.search_service import SearchService
 from app.services.stats_service import StatsService
 from app.services.submission_service import SubmissionService
 
@@ -13,9 +21,56 @@ class ServiceContainer:
 
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.db = Database()
+        # 存储后端由 STORAGE_BACKEND 选择（sqlite / memory）
+        self.database = create_repository(settings)
+        self.database.seed_tags(settings.preset_tags)
+        # services 只通过异步外观访问存储，阻塞的 SQLite 调用不会落在事件循环线程上
+        self.db = AsyncDatabase(
+            self.database,
+            cache_size=settings.submission_cache_size,
+            cache_ttl=settings.submission_cache_ttl,
+            summary_cache_size=settings.user_summary_cache_size,
+            summary_cache_ttl=settings.user_summary_cache_ttl,
+        )
+        # 在线备份只对 SQLite 后端有意义
+        self.backups = (
+            BackupManager(
+                settings.db_path,
+                backup_dir=settings.backup_dir,
+                keep=settings.backup_keep,
+                pages_per_step=settings.backup_pages_per_step,
+            )
+            if settings.storage_backend == "sqlite"
+            else None
+        )
+        # 投稿 ID 生成器：多实例部署时用 WORKER_ID 区分，避免 ID 冲突
+        self.ids = SnowflakeGenerator(settings.worker_id)
+        # 服务主动发出的消息统一经过发送调度，遵守 Telegram 的全局 / 会话限速
+        self.outbound = OutboundDispatcher(
+            global_rate=settings.outbound_global_rate,
+            private_rate=settings.outbound_private_rate,
+            group_per_minute=settings.outbound_group_per_minute,
+            max_retries=settings.outbound_max_retries,
+            max_retry_after=settings.outbound_max_retry_after,
+        )
+        # get_chat 查到的用户资料，审核 / 反馈等服务共用
+        self.profiles = ProfileCache(settings.profile_cache_size, settings.profile_cache_ttl)
+        self.metrics = MetricsRegistry()
+        self.metrics.register("outbound", self.outbound.stats)
+        self.metrics.register("submission_cache", lambda: self.db.cache.stats().as_dict())
+        self.metrics.register("user_summary_cache", lambda: self.db.summary_cache.stats().as_dict())
+        self.metrics.register("user_profiles", self.profiles.stats)
+        if self.database.write_behind:
+            self.metrics.register("write_behind", self.database.write_behind_stats)
         self.stats_service = StatsService(self)
         self.admin_service = AdminService(self)
         self.submission_service = SubmissionService(self)
         self.feedback_service = FeedbackService(self)
+        self.maintenance_service = MaintenanceService(self)
+        self.search_service = SearchService(self)
 
+    async def shutdown(self, application):
+        """Application.post_shutdown 回调：交付还在收集中的相册，停止发送调度，等待排队写入完成并释放数据库连接。"""
+        await self.submission_service.media_groups.flush_all()
+        await self.outbound.close()
+        await self.db.close()
@@ -6,6 +6,7 @@ from typing import Dict
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 
+from app.outbound import NOTIFY
 from app.services.state_store import TimedStateStore
 
 
@@ -15,6 +16,8 @@ class FeedbackService:
     def __init__(self, container):
         self.container = container
         self.settings = container.settings
+        self.outbound = container.outbound
+        self.profiles = container.profiles
         self.admin_reply_states: TimedStateStore[int] = TimedStateStore(ttl_seconds=3600)
 
     async def start_admin_reply_mode(self, update: Update, context: ContextTypes.DEFAULT_TYPE, payload: str):
@@ -27,14 +30,11 @@ class FeedbackService:
         admin_id = update.message.from_user.id
         self.admin_reply_states.set(admin_id, target_user_id)
 
-        try:
-            user = await context.bot.get_chat(target_user_id)
-            user_name = user.first_name
-            if user.last_name:
-                user_name += f" {user.last_name}"
-            username = f" (@{user.username})" if user.username else ""
-        except Exception as exc:  # pylint: disable=broad-except
-            logging.error("Error getting user info: %s", exc)
+        profile = await self.profiles.get(context.bot, target_user_id)
+        if profile is not None:
+            user_name = profile.full_name
+            username = f" (@{profile.username})" if profile.username else ""
+        else:
             user_name = "未知用户"
             username = ""
 
@@ -58,24 +58,35 @@ class FeedbackService:
 
         try:
             if message.text:
-                await context.bot.send_message(chat_id=target_user_id, text=message.text)
+                await self.outbound.send(
+                    context.bot.send_message,
+                    chat_id=target_user_id,
+                    text=message.text,
+                    priority=NOTIFY,
+                )
             elif message.photo:
-                await context.bot.send_photo(
+                await self.outbound.send(
+                    context.bot.send_photo,
                     chat_id=target_user_id,
                     photo=message.photo[-1].file_id,
                     caption=message.caption,
+                    priority=NOTIFY,
                 )
             elif message.video:
-                await context.bot.send_video(
+                await self.outbound.send(
+                    context.bot.send_video,
                     chat_id=target_user_id,
                     video=message.video.file_id,
                     caption=message.caption,
+                    priority=NOTIFY,
                 )
             elif message.document:
-                await context.bot.send_document(
+                await self.outbound.send(
+                    context.bot.send_document,
                     chat_id=target_user_id,
                     document=message.document.file_id,
                     caption=message.caption,
+                    priority=NOTIFY,
                 )
             else:
                 await message.reply_text("❌ 不支持的消息类型")
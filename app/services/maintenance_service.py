@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from telegram.ext import ContextTypes
+
+from app.backup import BackupResult
+
+# 两批归档之间让出事件循环 / 写线程，避免长时间占住写锁
+ARCHIVE_BATCH_PAUSE = 0.05
+
+
+class MaintenanceService:
+    """后台维护任务（由 JobQueue 定时调度）：冷数据归档、在线备份等。"""
+
+    def __init__(self, container):
+        self.container = container
+        self.database = container.database
+        self.db = container.db
+        self.settings = container.settings
+        self.archived_total = 0
+        self.last_archive_moved = 0
+        self.last_archive_seconds = 0.0
+        self.backups = container.backups
+        container.metrics.register("archive", self.archive_stats)
+        if self.backups is not None:
+            container.metrics.register("backup", self.backups.stats)
+
+    async def archive_job(self, context: ContextTypes.DEFAULT_TYPE):
+        await self.archive_decided()
+
+    async def archive_decided(self) -> int:
+        """把超过 ARCHIVE_AFTER_DAYS 且已审核的投稿分批移入归档表。"""
+        cutoff = datetime.now() - timedelta(days=self.settings.archive_after_days)
+        batch_size = self.settings.archive_batch_size
+        started = time.perf_counter()
+        moved = 0
+
+        while True:
+            count = await self.db.write_op(self.database.archive_batch_op(cutoff, batch_size))
+            moved += count
+            if count < batch_size:
+                break
+            await asyncio.sleep(ARCHIVE_BATCH_PAUSE)
+
+        self.archived_total += moved
+        self.last_archive_moved = moved
+        self.last_archive_seconds = time.perf_counter() - started
+        if moved:
+            logging.info("Archived %s decided submissions created before %s", moved, cutoff.isoformat())
+        return moved
+
+    def archive_stats(self) -> Dict[str, float]:
+        return {
+            "archived_total": self.archived_total,
+            "last_run_moved": self.last_archive_moved,
+            "last_run_seconds": round(self.last_archive_seconds, 3),
+        }
+
+    async def backup_job(self, context: ContextTypes.DEFAULT_TYPE):
+        try:
+            await self.backup()
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.error("Database backup failed: %s", exc)
+
+    async def backup(self) -> Optional[BackupResult]:
+        """在默认线程池里执行一次在线备份，事件循环和 DB 写线程都不受影响。"""
+        if self.backups is None:
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.backups.run)
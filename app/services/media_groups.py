@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+# Telegram 单个相册最多 10 个媒体
+MAX_GROUP_ITEMS = 10
+# 参与延迟分位数统计的最近相册数
+LATENCY_WINDOW = 256
+# 超过 max_wait 这么久仍未交付的相册视为被遗弃（等待任务异常退出等），由清扫回收
+EXPIRY_GRACE = 5.0
+
+
+@dataclass
+class PendingGroup:
+    group_id: str
+    user_id: int
+    started: float
+    last_item: float
+    items: List[Any] = field(default_factory=list)
+    meta: Dict[str, Any] = field(default_factory=dict)
+    task: Optional[asyncio.Task] = None
+
+
+FlushCallback = Callable[[PendingGroup], Awaitable[None]]
+
+
+class MediaGroupAggregator:
+    """把同一 media_group_id 的消息拼成一个相册。
+
+    滑动防抖：每来一条就把截止时间顺延到“最后一条 + debounce”，但从第一条算起最多等 max_wait；
+    凑满 10 条时立即交付。每个相册只有一个等待任务，循环检查截止时间，不会因为频繁顺延反复创建任务。
+
+    缓冲有上限：同时收集中的相册总数不超过 max_groups，单个用户不超过 max_groups_per_user，
+    超出时丢弃最早开始的相册（大量伪造的 media_group_id 不会让内存无限增长）。
+
+    clock / sleep 可替换，测试里用手动推进的时钟代替真实等待。
+    """
+
+    def __init__(
+        self,
+        on_flush: FlushCallback,
+        debounce: float = 1.0,
+        max_wait: float = 10.0,
+        max_groups: int = 200,
+        max_groups_per_user: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        self.on_flush = on_flush
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.max_groups = max(1, max_groups)
+        self.max_groups_per_user = max(1, max_groups_per_user)
+        self.clock = clock
+        self.sleep = sleep
+        # 按开始时间排序，最早的在最前：清扫与全局淘汰都只看队头
+        self._groups: OrderedDict[str, PendingGroup] = OrderedDict()
+        self._user_groups: Dict[int, Deque[str]] = {}
+        self._flush_reasons: Counter = Counter()
+        self._dropped: Counter = Counter()
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def __contains__(self, group_id: str) -> bool:
+        return group_id in self._groups
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    async def add(self, group_id: str, user_id: int, item: Any, **meta: Any):
+        """加入一条相册消息；meta 只补充相册里还没有记录（或为空）的键，例如第一条带说明文字的消息。"""
+        now = self.clock()
+        self._sweep(now)
+        group = self._groups.get(group_id)
+        if group is None:
+            self._make_room(user_id)
+            group = PendingGroup(group_id=group_id, user_id=user_id, started=now, last_item=now)
+            self._groups[group_id] = group
+            self._user_groups.setdefault(user_id, deque()).append(group_id)
+            group.task = asyncio.create_task(self._wait_and_flush(group))
+        else:
+            group.last_item = now
+        group.items.append(item)
+        for key, value in meta.items():
+            if value and not group.meta.get(key):
+                group.meta[key] = value
+
+        if len(group.items) >= MAX_GROUP_ITEMS:
+            if group.task is not None:
+                group.task.cancel()
+            await self._flush(group_id, "full")
+
+    def _deadline(self, group: PendingGroup) -> float:
+        return min(group.last_item + self.debounce, group.started + self.max_wait)
+
+    async def _wait_and_flush(self, group: PendingGroup):
+        while True:
+            remaining = self._deadline(group) - self.clock()
+            if remaining <= 0:
+                break
+            await self.sleep(remaining)
+        reached_cap = group.started + self.max_wait <= group.last_item + self.debounce
+        await self._flush(group.group_id, "max_wait" if reached_cap else "debounce")
+
+    def _make_room(self, user_id: int):
+        user_groups = self._user_groups.get(user_id)
+        if user_groups and len(user_groups) >= self.max_groups_per_user:
+            self._drop(user_groups[0], "evicted_user")
+        if len(self._groups) >= self.max_groups:
+            self._drop(next(iter(self._groups)), "evicted_global")
+
+    def _sweep(self, now: float):
+        """回收超过 max_wait + EXPIRY_GRACE 仍未交付的相册；正常情况下等待任务早已交付，这里只是兜底。"""
+        limit = self.max_wait + EXPIRY_GRACE
+        while self._groups:
+            group = next(iter(self._groups.values()))
+            if now - group.started <= limit:
+                break
+            self._drop(group.group_id, "expired")
+
+    def _drop(self, group_id: str, reason: str):
+        group = self._pop(group_id)
+        if group is None:
+            return
+        if group.task is not None:
+            group.task.cancel()
+        self._dropped[reason] += 1
+        logging.warning("Dropped media group %s of user %s (%s)", group_id, group.user_id, reason)
+
+    def _pop(self, group_id: str) -> Optional[PendingGroup]:
+        group = self._groups.pop(group_id, None)
+        if group is None:
+            return None
+        user_groups = self._user_groups.get(group.user_id)
+        if user_groups is not None:
+            user_groups.remove(group_id)
+            if not user_groups:
+                del self._user_groups[group.user_id]
+        return group
+
+    async def _flush(self, group_id: str, reason: str):
+        group = self._pop(group_id)
+        if group is None:
+            return
+        self._flush_reasons[reason] += 1
+        self._latencies.append(self.clock() - group.started)
+        try:
+            await self.on_flush(group)
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.error("Error flushing media group %s: %s", group_id, exc)
+
+    async def flush_all(self):
+        """立即交付所有未完成的相册（关闭时使用）。"""
+        for group_id in list(self._groups):
+            group = self._groups.get(group_id)
+            if group is not None and group.task is not None:
+                group.task.cancel()
+            await self._flush(group_id, "shutdown")
+
+    def stats(self) -> Dict[str, float]:
+        """缓冲大小、相册拼装延迟（第一条到交付，秒）与各交付 / 丢弃原因的次数。"""
+        latencies = sorted(self._latencies)
+
+        def quantile(q: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3) if latencies else 0.0
+
+        return {
+            "pending": len(self._groups),
+            "buffered_items": sum(len(group.items) for group in self._groups.values()),
+            "evicted_user": self._dropped["evicted_user"],
+            "evicted_global": self._dropped["evicted_global"],
+            "expired": self._dropped["expired"],
+            "flushed_debounce": self._flush_reasons["debounce"],
+            "flushed_full": self._flush_reasons["full"],
+            "flushed_max_wait": self._flush_reasons["max_wait"],
+            "latency_p50": quantile(0.5),
+            "latency_p95": quantile(0.95),
+            "latency_max": round(latencies[-1], 3) if latencies else 0.0,
+        }
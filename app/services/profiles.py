@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.cache import LRUCache
+
+
+@dataclass(frozen=True)
+class UserProfile:
+    user_id: int
+    full_name: str
+    username: Optional[str] = None
+
+
+def _profile_from(user_id: int, chat) -> UserProfile:
+    """get_chat 返回的 ChatFullInfo 与消息里的 User 都有 first_name / last_name / username。"""
+    full_name = chat.first_name or ""
+    if chat.last_name:
+        full_name += f" {chat.last_name}"
+    return UserProfile(user_id=user_id, full_name=full_name, username=chat.username)
+
+
+class ProfileCache:
+    """各服务共用的用户资料缓存，只用来拼显示名。
+
+    一条投稿从确认、返回控制面板到通过会多次需要投稿人的名字；命中缓存时不再请求 get_chat，
+    同一用户同时发起的多个查询合并为一次请求。查询失败的用户短时间内不再重试，由调用方使用库里的用户名兜底。
+    """
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: Optional[float] = 1800, failure_ttl: float = 60):
+        self.cache: LRUCache[int, UserProfile] = LRUCache(max_size, ttl_seconds)
+        self._failures: LRUCache[int, bool] = LRUCache(max_size, failure_ttl)
+        self._in_flight: Dict[int, asyncio.Future] = {}
+        self.coalesced = 0
+        self.lookups = 0
+        self.failures = 0
+
+    def remember(self, user) -> UserProfile:
+        """用消息里已有的 User 直接刷新缓存（用户发消息时顺带更新，不产生请求）。"""
+        profile = _profile_from(user.id, user)
+        self.cache.set(user.id, profile)
+        self._failures.delete(user.id)
+        return profile
+
+    async def get(self, bot, user_id: int) -> Optional[UserProfile]:
+        """取用户资料；查询失败时返回 None。"""
+        cached = self.cache.get(user_id)
+        if cached is not None:
+            return cached
+        if self._failures.peek(user_id):
+            return None
+
+        pending = self._in_flight.get(user_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(bot, user_id))
+            self._in_flight[user_id] = pending
+            pending.add_done_callback(lambda _: self._in_flight.pop(user_id, None))
+        else:
+            self.coalesced += 1
+        # shield：某个等待方被取消时不影响共用同一请求的其它调用方
+        return await asyncio.shield(pending)
+
+    async def display_name(self, bot, user_id: int, fallback: str) -> str:
+        profile = await self.get(bot, user_id)
+        return profile.full_name if profile is not None and profile.full_name else fallback
+
+    async def _fetch(self, bot, user_id: int) -> Optional[UserProfile]:
+        self.lookups += 1
+        try:
+            chat = await bot.get_chat(user_id)
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.error("Error getting user info: %s", exc)
+            self.failures += 1
+            self._failures.set(user_id, True)
+            return None
+        profile = _profile_from(user_id, chat)
+        self.cache.set(user_id, profile)
+        return profile
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **self.cache.stats().as_dict(),
+            "lookups": self.lookups,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+        }
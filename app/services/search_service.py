@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import html
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
+
+from app.models import Submission
+from app.services.state_store import TimedStateStore
+
+PAGE_SIZE = 10
+STATUS_EMOJI = {"pending": "⏳", "approved": "✅", "rejected": "🚫"}
+
+
+class SearchService:
+    """管理员 /search 与 /tags：全文检索 / 按标签列出投稿，通过“下一页”按钮翻页。
+
+    翻页游标保存在服务端，callback_data 里只放一个短编号，不受 64 字节限制。
+    """
+
+    def __init__(self, container):
+        self.container = container
+        self.db = container.db
+        self.settings = container.settings
+        self.cursors: TimedStateStore[Dict] = TimedStateStore(ttl_seconds=1800)
+        self._tokens = itertools.count(1)
+
+    async def search(self, message, query: str):
+        if not query.strip():
+            await message.reply_text("用法：/search 关键词 [关键词...]\n多个关键词需同时命中，支持中文与 #标签。")
+            return
+        await self._reply_page(message, "search", query, None, page_no=1)
+
+    async def tags(self, message, tag: str):
+        """不带参数时展示标签热度榜，带标签时按时间倒序列出使用该标签的投稿。"""
+        if tag.strip():
+            await self._reply_page(message, "tag", tag.strip(), None, page_no=1)
+            return
+
+        usages = await self.db.get_popular_tags(limit=30)
+        text = "🏷 <b>标签热度</b>\n\n"
+        if not usages:
+            text += "暂无标签。"
+        for usage in usages:
+            preset_mark = " 📌" if usage.preset else ""
+            text += f"<code>{html.escape(usage.name)}</code> · {usage.usage_count} 次{preset_mark}\n"
+        text += "\n💡 发送 <code>/tags #标签</code> 查看带该标签的投稿。"
+        await message.reply_text(text, parse_mode=ParseMode.HTML)
+
+    async def handle_callback(self, query, data: str):
+        token = int(data.split(":")[1])
+        state = self.cursors.pop(token)
+        if state is None:
+            await query.edit_message_reply_markup(reply_markup=None)
+            await query.message.reply_text("⌛ 结果已过期，请重新查询。")
+            return
+
+        submissions, next_cursor = await self._fetch(state["kind"], state["query"], state["cursor"])
+        text, keyboard = self._render(state["kind"], state["query"], submissions, next_cursor, state["page_no"] + 1)
+        await query.edit_message_text(
+            text, parse_mode=ParseMode.HTML, reply_markup=keyboard, disable_web_page_preview=True
+        )
+
+    async def _reply_page(self, message, kind: str, query: str, cursor: Any, page_no: int):
+        submissions, next_cursor = await self._fetch(kind, query, cursor)
+        text, keyboard = self._render(kind, query, submissions, next_cursor, page_no)
+        await message.reply_text(
+            text, parse_mode=ParseMode.HTML, reply_markup=keyboard, disable_web_page_preview=True
+        )
+
+    async def _fetch(self, kind: str, query: str, cursor: Any) -> Tuple[List[Submission], Any]:
+        """返回本页投稿与下一页游标（检索为 (rank, ID)，标签列表为最后一条的 ID）。"""
+        if kind == "tag":
+            submissions = await self.db.get_submissions_by_tag(query, before=cursor, limit=PAGE_SIZE + 1)
+            page = submissions[:PAGE_SIZE]
+            return page, page[-1].submission_id if len(submissions) > PAGE_SIZE else None
+
+        page = await self.db.search_submissions(query, after=cursor, limit=PAGE_SIZE)
+        return page.submissions, page.next_cursor
+
+    def _render(
+        self, kind: str, query: str, submissions: List[Submission], next_cursor: Any, page_no: int
+    ) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+        title = "🏷 <b>标签</b>" if kind == "tag" else "🔎 <b>检索</b>"
+        text = f"{title}：{html.escape(query)}（第 {page_no} 页）\n\n"
+        if not submissions:
+            text += "没有更多结果。" if page_no > 1 else "没有找到匹配的投稿。"
+        for submission in submissions:
+            text += self._format_hit(submission) + "\n"
+
+        if next_cursor is None:
+            return text, None
+        token = next(self._tokens)
+        self.cursors.set(token, {"kind": kind, "query": query, "cursor": next_cursor, "page_no": page_no})
+        keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("下一页 ▶️", callback_data=f"search_more:{token}")]])
+        return text, keyboard
+
+    def _format_hit(self, submission: Submission) -> str:
+        base_text = submission.caption_only or "无文案"
+        short_caption = base_text[:40] + "..." if len(base_text) > 40 else base_text
+        line = (
+            f"{STATUS_EMOJI.get(submission.status.value, '❓')} "
+            f"<code>{submission.submission_id}</code> {submission.created_at:%Y-%m-%d} "
+            f"{html.escape(short_caption)}"
+        )
+        if submission.tags:
+            line += f" <i>{html.escape(submission.tags)}</i>"
+        link = self._review_link(submission)
+        if link:
+            line += f' <a href="{link}">审核消息</a>'
+        return line
+
+    def _review_link(self, submission: Submission) -> Optional[str]:
+        # 超级群的消息链接：t.me/c/<去掉 -100 前缀的群 ID>/<消息 ID>
+        chat_id = str(self.settings.admin_group_id)
+        if not submission.admin_message_id or not chat_id.startswith("-100"):
+            return None
+        return f"https://t.me/c/{chat_id[4:]}/{submission.admin_message_id}"
@@ -1,126 +1,35 @@
 from __future__ import annotations
 
-import sqlite3
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import List, Tuple
 
-
-@dataclass(frozen=True)
-class DashboardStats:
-    total: int
-    status_counts: Dict[str, int]
-    daily_counts: List[Tuple[str, int]]
-    top_submitters: List[Tuple[str, int]]
-
-
-@dataclass(frozen=True)
-class UserSummary:
-    username: str
-    total: int
-    status_counts: Dict[str, int]
-    recent_submissions: List[Tuple[str, str, str, str]]
+from app.models import DashboardStats, ReviewStats, RollupReport, UserSummary  # noqa: F401  保持旧的导入路径可用
+from app.rollups import Period, window
 
 
 class StatsService:
-    """封装统计相关的数据库查询，便于 handler 复用。"""
+    """统计面板与个人中心的数据出口，具体查询由存储后端实现。"""
 
     def __init__(self, container):
-        self.db_path = container.db.db_path
-
-    def get_dashboard(self) -> DashboardStats:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT COUNT(*) FROM submissions")
-        total = cursor.fetchone()[0]
-
-        cursor.execute("SELECT status, COUNT(*) FROM submissions GROUP BY status")
-        status_counts = dict(cursor.fetchall())
-
-        seven_days_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-        cursor.execute(
-            """
-            SELECT DATE(created_at) as date, COUNT(*)
-            FROM submissions
-            WHERE created_at >= ?
-            GROUP BY DATE(created_at)
-            ORDER BY date ASC
-        """,
-            (seven_days_ago,),
-        )
-        daily_counts = cursor.fetchall()
-
-        thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-        cursor.execute(
-            """
-            SELECT COALESCE(username, ''), COUNT(*) as count
-            FROM submissions
-            WHERE created_at >= ?
-            GROUP BY user_id, username
-            ORDER BY count DESC
-            LIMIT 10
-        """,
-            (thirty_days_ago,),
-        )
-        top_submitters = cursor.fetchall()
-
-        conn.close()
-
-        return DashboardStats(
-            total=total,
-            status_counts=status_counts,
-            daily_counts=daily_counts,
-            top_submitters=top_submitters,
-        )
-
-    def get_user_summary(self, user_id: int, username: str) -> UserSummary:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            SELECT status, COUNT(*)
-            FROM submissions
-            WHERE user_id = ?
-            GROUP BY status
-        """,
-            (user_id,),
-        )
-        status_counts = dict(cursor.fetchall())
-
-        cursor.execute("SELECT COUNT(*) FROM submissions WHERE user_id = ?", (user_id,))
-        total = cursor.fetchone()[0]
+        self.db = container.db
+        self.time_buckets = container.database.time_buckets
 
-        cursor.execute(
-            """
-            SELECT submission_id, caption_only, tags, status, created_at
-            FROM submissions
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            LIMIT 10
-        """,
-            (user_id,),
-        )
-        recent = cursor.fetchall()
+    async def get_dashboard(self) -> DashboardStats:
+        return await self.db.get_dashboard_stats()
 
-        conn.close()
+    async def get_user_summary(self, user_id: int, username: str) -> UserSummary:
+        return await self.db.get_user_summary(user_id, username)
 
-        recent_compact = [
-            (
-                sub_id,
-                caption_only or "",
-                tags or "",
-                status,
-                created_at,
-            )
-            for sub_id, caption_only, tags, status, created_at in recent
-        ]
+    async def get_trend(self, period: Period) -> RollupReport:
+        """最近一段时间的趋势，读自按小时 / 按天的汇总表，桶数与投稿总量无关。"""
+        start, end = window(self.time_buckets, period)
+        return await self.db.get_rollups(period.granularity, start, end)
 
-        return UserSummary(
-            username=username,
-            total=total,
-            status_counts=status_counts,
-            recent_submissions=recent_compact,
-        )
+    async def get_tag_trend(self, tag: str, period: Period) -> List[Tuple[int, int]]:
+        """某个标签最近一段时间每天的投稿数（只有按天的粒度）。"""
+        start, end = window(self.time_buckets, period)
+        return await self.db.get_tag_rollups(tag, start, end)
 
+    async def get_review_stats(self, period: Period) -> ReviewStats:
+        """最近一段时间（按审核日期，只有按天的粒度）的审核耗时 p50 / p95 与管理员排行。"""
+        start, end = window(self.time_buckets, period)
+        return await self.db.get_review_stats(start, end)
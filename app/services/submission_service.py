@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import asyncio
 import html
+import logging
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, List, Optional
 
@@ -11,12 +13,28 @@ from telegram import (
     InputMediaDocument,
     InputMediaPhoto,
     InputMediaVideo,
+    Message,
     Update,
 )
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
 from app.models import MediaFile, Submission, SubmissionStatus
+from app.outbound import NOTIFY, REVIEW
+from app.services.media_groups import MAX_GROUP_ITEMS, MediaGroupAggregator, PendingGroup
+from app.services.state_store import TimedStateStore
+
+
+@dataclass
+class DeliveredAlbum:
+    """已交付的相册：生成的投稿与发给用户的预览。
+
+    保存投稿、发送预览和追加迟到的消息都在 lock 内进行，迟到的消息总能看到已经落库的投稿和预览。
+    """
+
+    submission_id: int
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    preview: Optional[Message] = None
 
 
 class SubmissionService:
@@ -25,15 +43,30 @@ class SubmissionService:
     def __init__(self, container):
         self.container = container
         self.db = container.db
+        self.ids = container.ids
         self.settings = container.settings
-        self.pending_media_groups: Dict[str, Dict] = {}
-        self.media_group_tasks: Dict[str, asyncio.Task] = {}
+        self.outbound = container.outbound
+        self.profiles = container.profiles
+        self.media_groups = MediaGroupAggregator(
+            self._create_submission_from_media_group,
+            debounce=self.settings.media_group_debounce,
+            max_wait=self.settings.media_group_timeout,
+            max_groups=self.settings.media_group_max_pending,
+            max_groups_per_user=self.settings.media_group_max_per_user,
+        )
+        # 已交付的相册 -> 生成的投稿 ID，用于接住交付之后才到的相册消息
+        self.album_submissions: TimedStateStore[DeliveredAlbum] = TimedStateStore(ttl_seconds=120)
+        self.late_album_items = 0
+        container.metrics.register("media_groups", self.media_group_stats)
 
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         # 只处理真正的消息更新，忽略回调 / 其它类型
         message = update.effective_message
         if message is None:
             return
+        if message.from_user is not None:
+            # 投稿人的资料随消息一起到达，顺带刷新缓存，审核面板和发布署名就不用再查 get_chat
+            self.profiles.remember(message.from_user)
 
         if message.media_group_id:
             await self._handle_media_group_message(update, context)
@@ -42,14 +75,14 @@ class SubmissionService:
         await self._process_single_submission(update, context)
 
     async def toggle_anonymous(self, query, submission_id: str):
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id)
 
         if not submission:
             await query.edit_message_text("❌ 投稿不存在或已过期", parse_mode=ParseMode.HTML)
             return
 
         submission.is_anonymous = not submission.is_anonymous
-        self.db.save_submission(submission)
+        await self.db.save_changes(submission)
 
         preview_text = self._format_preview_text(submission)
         keyboard = self._create_user_control_keyboard(submission)
@@ -68,7 +101,7 @@ class SubmissionService:
             )
 
     async def confirm_submission(self, query, submission_id: str, context: ContextTypes.DEFAULT_TYPE):
-        submission = self.db.get_submission(submission_id)
+        submission = await self.db.get_submission(submission_id)
 
         if not submission:
             await query.edit_message_text("❌ 投稿不存在或已过期", parse_mode=ParseMode.HTML)
@@ -106,95 +139,115 @@ class SubmissionService:
     async def _handle_media_group_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         message = update.message
         media_group_id = message.media_group_id
-
-        if media_group_id not in self.pending_media_groups:
-            self.pending_media_groups[media_group_id] = {
-                "messages": [],
-                "user_id": message.from_user.id,
-                "username": message.from_user.username or message.from_user.first_name,
-                "caption": message.caption or "",
-                "created_at": datetime.now(),
-            }
-
-            self.media_group_tasks[media_group_id] = asyncio.create_task(
-                self._process_media_group_after_timeout(media_group_id, context)
-            )
-
-        self.pending_media_groups[media_group_id]["messages"].append(message)
-
-        if message.caption:
-            self.pending_media_groups[media_group_id]["caption"] = message.caption
-
-    async def _process_media_group_after_timeout(self, media_group_id: str, context: ContextTypes.DEFAULT_TYPE):
-        await asyncio.sleep(self.settings.media_group_timeout)
-
-        if media_group_id not in self.pending_media_groups:
+        # 缓冲里只保留精简的媒体记录，不持有整个 Message 对象
+        media_file = self._extract_media_file(message)
+        if media_file is None:
             return
 
-        media_group = self.pending_media_groups.pop(media_group_id)
-        if media_group_id in self.media_group_tasks:
-            del self.media_group_tasks[media_group_id]
+        if media_group_id not in self.media_groups:
+            # 相册已经交付后才到的消息：追加到刚生成的投稿里，而不是变成一条单独的投稿
+            album = self.album_submissions.get(media_group_id)
+            if album is not None and await self._append_late_media(album, media_file, context.bot):
+                return
+
+        await self.media_groups.add(
+            media_group_id,
+            message.from_user.id,
+            media_file,
+            bot=context.bot,
+            chat_id=message.chat_id,
+            username=message.from_user.username or message.from_user.first_name,
+            caption=message.caption,
+            created_at=datetime.now(),
+        )
 
-        await self._create_submission_from_media_group(media_group, context)
+    async def _append_late_media(self, album: DeliveredAlbum, media_file: MediaFile, bot) -> bool:
+        # 相册还在保存 / 发送预览时，等它完成再追加
+        async with album.lock:
+            submission = await self.db.get_submission(album.submission_id)
+            if (
+                submission is None
+                or submission.status != SubmissionStatus.PENDING
+                or submission.admin_message_id is not None
+                or len(submission.media_files) >= MAX_GROUP_ITEMS
+            ):
+                return False
+            submission.media_files = [*submission.media_files, media_file]
+            await self.db.update_fields(album.submission_id, media_files=submission.media_files)
+            self.late_album_items += 1
+            await self._refresh_preview(bot, album.preview, submission)
+        return True
+
+    async def _refresh_preview(self, bot, preview: Optional[Message], submission: Submission):
+        """投稿内容变化后更新用户看到的预览（媒体数量等）。"""
+        if preview is None:
+            return
+        try:
+            await self.outbound.send(
+                bot.edit_message_caption,
+                chat_id=preview.chat_id,
+                message_id=preview.message_id,
+                caption=self._format_preview_text(submission),
+                reply_markup=self._create_user_control_keyboard(submission),
+                parse_mode=ParseMode.HTML,
+                cost=0,
+                priority=NOTIFY,
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.error("Error updating submission preview: %s", exc)
 
-    async def _create_submission_from_media_group(self, media_group: Dict, context: ContextTypes.DEFAULT_TYPE):
-        messages = media_group["messages"]
-        if not messages:
+    async def _create_submission_from_media_group(self, media_group: PendingGroup):
+        media_files: List[MediaFile] = media_group.items
+        if not media_files:
             return
 
-        media_files: List[MediaFile] = []
-        for message in messages:
-            if message.photo:
-                file_id = message.photo[-1].file_id
-                media_files.append(MediaFile(file_id=file_id, file_type="photo"))
-            elif message.video:
-                file_id = message.video.file_id
-                media_files.append(MediaFile(file_id=file_id, file_type="video"))
-            elif message.document:
-                file_id = message.document.file_id
-                media_files.append(MediaFile(file_id=file_id, file_type="document"))
-
-        submission_id = f"mg_{media_group['user_id']}_{int(datetime.now().timestamp())}"
+        meta = media_group.meta
+        caption = meta.get("caption") or ""
+
         submission = Submission(
-            submission_id=submission_id,
-            user_id=media_group["user_id"],
-            username=media_group["username"],
+            submission_id=self.ids.next_id(),
+            user_id=media_group.user_id,
+            username=meta["username"],
             media_files=media_files,
-            caption=media_group["caption"],
-            caption_only=media_group["caption"],
+            caption=caption,
+            caption_only=caption,
             is_anonymous=False,
             tags="",
             status=SubmissionStatus.PENDING,
-            created_at=media_group["created_at"],
-            media_group_id=messages[0].media_group_id,
+            created_at=meta["created_at"],
+            media_group_id=media_group.group_id,
         )
 
-        self.db.save_submission(submission)
-        await self._send_submission_preview(messages[0], submission)
+        # 在第一个 await 之前登记：保存和发送预览期间到达的同组消息也能找到这条投稿
+        album = DeliveredAlbum(submission.submission_id)
+        self.album_submissions.set(media_group.group_id, album)
+        async with album.lock:
+            try:
+                await self.db.save_submission(submission)
+            except Exception:
+                self.album_submissions.delete(media_group.group_id)
+                raise
+            album.preview = await self._send_preview(meta["bot"], meta["chat_id"], submission)
+
+    def media_group_stats(self) -> Dict[str, float]:
+        return {**self.media_groups.stats(), "late_items": self.late_album_items}
 
     async def _process_single_submission(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         message = update.message
         media_files: List[MediaFile] = []
         caption = message.caption or ""
 
-        if message.photo:
-            file_id = message.photo[-1].file_id
-            media_files.append(MediaFile(file_id=file_id, file_type="photo"))
-        elif message.video:
-            file_id = message.video.file_id
-            media_files.append(MediaFile(file_id=file_id, file_type="video"))
-        elif message.document:
-            file_id = message.document.file_id
-            media_files.append(MediaFile(file_id=file_id, file_type="document"))
+        media_file = self._extract_media_file(message)
+        if media_file:
+            media_files.append(media_file)
         elif message.text:
             caption = message.text
         else:
             await message.reply_text("❌ 不支持的文件类型，请发送文本、图片、视频或文件。")
             return
 
-        submission_id = f"single_{message.from_user.id}_{int(datetime.now().timestamp())}"
         submission = Submission(
-            submission_id=submission_id,
+            submission_id=self.ids.next_id(),
             user_id=message.from_user.id,
             username=message.from_user.username or message.from_user.first_name,
             media_files=media_files,
@@ -206,42 +259,44 @@ class SubmissionService:
             created_at=datetime.now(),
         )
 
-        self.db.save_submission(submission)
+        await self.db.save_submission(submission)
         await self._send_submission_preview(message, submission)
 
+    @staticmethod
+    def _extract_media_file(message) -> Optional[MediaFile]:
+        if message.photo:
+            photo = message.photo[-1]
+            return MediaFile(file_id=photo.file_id, file_type="photo", file_unique_id=photo.file_unique_id)
+        if message.video:
+            video = message.video
+            return MediaFile(file_id=video.file_id, file_type="video", file_unique_id=video.file_unique_id)
+        if message.document:
+            document = message.document
+            return MediaFile(file_id=document.file_id, file_type="document", file_unique_id=document.file_unique_id)
+        return None
+
     async def _send_submission_preview(self, message, submission: Submission):
+        await self._send_preview(message.get_bot(), message.chat_id, submission)
+
+    async def _send_preview(self, bot, chat_id: int, submission: Submission) -> Message:
         preview_text = self._format_preview_text(submission)
         keyboard = self._create_user_control_keyboard(submission)
+        common = {"chat_id": chat_id, "reply_markup": keyboard, "parse_mode": ParseMode.HTML, "priority": NOTIFY}
 
         if submission.media_files:
             first_media = submission.media_files[0]
             if first_media.file_type == "photo":
-                await message.reply_photo(
-                    photo=first_media.file_id,
-                    caption=preview_text,
-                    reply_markup=keyboard,
-                    parse_mode=ParseMode.HTML,
-                )
-            elif first_media.file_type == "video":
-                await message.reply_video(
-                    video=first_media.file_id,
-                    caption=preview_text,
-                    reply_markup=keyboard,
-                    parse_mode=ParseMode.HTML,
+                return await self.outbound.send(
+                    bot.send_photo, photo=first_media.file_id, caption=preview_text, **common
                 )
-            else:
-                await message.reply_document(
-                    document=first_media.file_id,
-                    caption=preview_text,
-                    reply_markup=keyboard,
-                    parse_mode=ParseMode.HTML,
+            if first_media.file_type == "video":
+                return await self.outbound.send(
+                    bot.send_video, video=first_media.file_id, caption=preview_text, **common
                 )
-        else:
-            await message.reply_text(
-                preview_text,
-                reply_markup=keyboard,
-                parse_mode=ParseMode.HTML,
+            return await self.outbound.send(
+                bot.send_document, document=first_media.file_id, caption=preview_text, **common
             )
+        return await self.outbound.send(bot.send_message, text=preview_text, **common)
 
     def _format_preview_text(self, submission: Submission) -> str:
         media_count = len(submission.media_files)
@@ -281,81 +336,83 @@ class SubmissionService:
         keyboard = admin_service.create_review_keyboard(submission)
 
         try:
-            if len(submission.media_files) > 1:
-                media_group = []
-                for i, media_file in enumerate(submission.media_files):
-                    media_caption = submission.caption if i == 0 and submission.caption else None
+            # 预览上传与投稿人资料查询互不依赖，同时进行；控制面板要回复预览消息，只能排在后面
+            preview_message, control_text = await asyncio.gather(
+                self._send_admin_preview(submission, context),
+                admin_service.format_control_text(submission, context),
+            )
+            control_message = await self.outbound.send(
+                context.bot.send_message,
+                chat_id=self.settings.admin_group_id,
+                text=control_text,
+                reply_markup=keyboard,
+                reply_to_message_id=preview_message.message_id,
+                parse_mode=ParseMode.HTML,
+                priority=REVIEW,
+            )
 
-                    if media_file.file_type == "photo":
-                        media = InputMediaPhoto(media=media_file.file_id, caption=media_caption)
-                    elif media_file.file_type == "video":
-                        media = InputMediaVideo(media=media_file.file_id, caption=media_caption)
-                    else:
-                        media = InputMediaDocument(media=media_file.file_id, caption=media_caption)
+            submission.preview_message_id = preview_message.message_id
+            submission.admin_message_id = control_message.message_id
 
-                    media_group.append(media)
+            await self.db.save_changes(submission)
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.error("Error sending to admin group: %s", exc)
 
-                preview_messages = await context.bot.send_media_group(
-                    chat_id=self.settings.admin_group_id,
-                    media=media_group,
-                )
+    async def _send_admin_preview(self, submission: Submission, context: ContextTypes.DEFAULT_TYPE):
+        """把投稿内容发到审核群，返回（相册的第一条）预览消息。"""
+        if len(submission.media_files) > 1:
+            media_group = []
+            for i, media_file in enumerate(submission.media_files):
+                media_caption = submission.caption if i == 0 and submission.caption else None
+
+                if media_file.file_type == "photo":
+                    media = InputMediaPhoto(media=media_file.file_id, caption=media_caption)
+                elif media_file.file_type == "video":
+                    media = InputMediaVideo(media=media_file.file_id, caption=media_caption)
+                else:
+                    media = InputMediaDocument(media=media_file.file_id, caption=media_caption)
 
-                control_text = await admin_service.format_control_text(submission, context)
-                control_message = await context.bot.send_message(
-                    chat_id=self.settings.admin_group_id,
-                    text=control_text,
-                    reply_markup=keyboard,
-                    reply_to_message_id=preview_messages[0].message_id,
-                    parse_mode=ParseMode.HTML,
-                )
+                media_group.append(media)
 
-                submission.preview_message_id = preview_messages[0].message_id
-                submission.admin_message_id = control_message.message_id
-            else:
-                if submission.media_files:
-                    media_file = submission.media_files[0]
-                    if media_file.file_type == "photo":
-                        preview_message = await context.bot.send_photo(
-                            chat_id=self.settings.admin_group_id,
-                            photo=media_file.file_id,
-                            caption=submission.caption,
-                        )
-                    elif media_file.file_type == "video":
-                        preview_message = await context.bot.send_video(
-                            chat_id=self.settings.admin_group_id,
-                            video=media_file.file_id,
-                            caption=submission.caption,
-                        )
-                    else:
-                        preview_message = await context.bot.send_document(
-                            chat_id=self.settings.admin_group_id,
-                            document=media_file.file_id,
-                            caption=submission.caption,
-                        )
-                else:
-                    preview_message = await context.bot.send_message(
-                        chat_id=self.settings.admin_group_id,
-                        text=submission.caption,
-                    )
+            preview_messages = await self.outbound.send(
+                context.bot.send_media_group,
+                chat_id=self.settings.admin_group_id,
+                media=media_group,
+                priority=REVIEW,
+            )
+            return preview_messages[0]
 
-                control_text = await admin_service.format_control_text(submission, context)
-                control_message = await context.bot.send_message(
+        if submission.media_files:
+            media_file = submission.media_files[0]
+            if media_file.file_type == "photo":
+                return await self.outbound.send(
+                    context.bot.send_photo,
                     chat_id=self.settings.admin_group_id,
-                    text=control_text,
-                    reply_markup=keyboard,
-                    reply_to_message_id=preview_message.message_id,
-                    parse_mode=ParseMode.HTML,
+                    photo=media_file.file_id,
+                    caption=submission.caption,
+                    priority=REVIEW,
                 )
-
-                submission.preview_message_id = preview_message.message_id
-                submission.admin_message_id = control_message.message_id
-
-            self.db.save_submission(submission)
-        except Exception as exc:  # pylint: disable=broad-except
-            # 使用 logging，在 main 中已配置默认 logger
-            import logging
-
-            logging.error("Error sending to admin group: %s", exc)
+            if media_file.file_type == "video":
+                return await self.outbound.send(
+                    context.bot.send_video,
+                    chat_id=self.settings.admin_group_id,
+                    video=media_file.file_id,
+                    caption=submission.caption,
+                    priority=REVIEW,
+                )
+            return await self.outbound.send(
+                context.bot.send_document,
+                chat_id=self.settings.admin_group_id,
+                document=media_file.file_id,
+                caption=submission.caption,
+                priority=REVIEW,
+            )
+        return await self.outbound.send(
+            context.bot.send_message,
+            chat_id=self.settings.admin_group_id,
+            text=submission.caption,
+            priority=REVIEW,
+        )
 
     @staticmethod
     def _escape_html(text: Optional[str]) -> str:
@@ -0,0 +1,38 @@
+"""
+标签字符串的解析规则（数据库触发器、内存引擎与管理员编辑共用）。
+
+``submissions.tags`` 仍保存空格分隔的展示字符串；``tags`` / ``submission_tags`` 表按这里的规则建立索引：
+每个标签统一为 ``#名称`` 形式，大小写不敏感去重，保持首次出现的顺序。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Iterable, List, Optional
+
+
+def normalize_tag(raw: str) -> Optional[str]:
+    name = raw.strip().lstrip("#").strip()
+    return f"#{name}" if name else None
+
+
+def parse_tags(text: Optional[str]) -> List[str]:
+    tags: List[str] = []
+    seen = set()
+    for raw in (text or "").split():
+        tag = normalize_tag(raw)
+        if tag and tag.lower() not in seen:
+            seen.add(tag.lower())
+            tags.append(tag)
+    return tags
+
+
+def merge_tags(current: Optional[str], new: Iterable[str]) -> List[str]:
+    """返回 ``new`` 中尚未出现在 ``current`` 里的标签（大小写不敏感）。"""
+    existing = {tag.lower() for tag in parse_tags(current)}
+    return [tag for tag in new if tag.lower() not in existing]
+
+
+def tag_list(text: Optional[str]) -> str:
+    """SQLite 自定义函数：标签字符串 -> JSON 数组，触发器里配合 json_each 使用。"""
+    return json.dumps(parse_tags(text), ensure_ascii=False)
@@ -0,0 +1,81 @@
+"""
+时间列的编码：``created_ts`` 为 UTC epoch 秒，``created_day`` 为按报表时区划分的日期桶（整数 YYYYMMDD）。
+
+``Submission.created_at`` 仍是不带时区的本地时间（``datetime.now()``）；
+换算 epoch 时按服务器本地时区解释，日期桶再按 ``TIMEZONE`` 配置的时区切分，
+这样服务器时区与运营所在时区不同时，“每天”的边界仍然正确。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from app.ids import datetime_to_ms
+
+
+def to_epoch(moment: datetime) -> int:
+    """datetime -> epoch 秒；不带时区的值按服务器本地时间解释。"""
+    return int(moment.timestamp())
+
+
+def format_day(day: int) -> str:
+    """20240105 -> '2024-01-05'"""
+    return f"{day // 10000:04d}-{day // 100 % 100:02d}-{day % 100:02d}"
+
+
+class TimeBuckets:
+    def __init__(self, timezone: str = ""):
+        # 留空表示使用服务器本地时区
+        self.tz: Optional[ZoneInfo] = ZoneInfo(timezone) if timezone else None
+
+    def localize(self, ts: float) -> datetime:
+        return datetime.fromtimestamp(ts, self.tz)
+
+    def day(self, ts: float) -> int:
+        moment = self.localize(ts)
+        return moment.year * 10000 + moment.month * 100 + moment.day
+
+    def day_of(self, moment: datetime) -> int:
+        return self.day(to_epoch(moment))
+
+    def today(self, now: Optional[datetime] = None) -> int:
+        return self.day(to_epoch(now) if now else datetime.now().timestamp())
+
+    def days_ago(self, days: int, now: Optional[datetime] = None) -> int:
+        """报表时区下“今天往前 days 天”的日期桶，用作按天范围查询的下界。"""
+        return add_days(self.today(now), -days)
+
+    def day_start(self, day: int) -> int:
+        """日期桶在报表时区下 0 点的 epoch 秒。"""
+        midnight = datetime.combine(parse_day(day), datetime.min.time())
+        return to_epoch(midnight.replace(tzinfo=self.tz) if self.tz else midnight)
+
+
+def hour_bucket(ts: float) -> int:
+    """epoch 秒 -> 所在整点的 epoch 秒（小时汇总的桶键）。"""
+    return int(ts) // 3600 * 3600
+
+
+def parse_day(day: int) -> date:
+    return date(day // 10000, day // 100 % 100, day % 100)
+
+
+def add_days(day: int, days: int) -> int:
+    moved = parse_day(day) + timedelta(days=days)
+    return moved.year * 10000 + moved.month * 100 + moved.day
+
+
+def register_time_functions(conn: sqlite3.Connection, buckets: TimeBuckets):
+    """迁移回填时使用的自定义函数：iso_epoch(created_at)、day_bucket(epoch)、iso_epoch_ms(created_at)。
+
+    iso_epoch_ms 用于按创建时间生成投稿 ID，与 iso_epoch 一样按服务器本地时间解释，
+    旧数据的 ID 与 created_ts、与迁移后用当前时钟生成的新 ID 保持同序。
+    """
+    conn.create_function("iso_epoch", 1, lambda value: to_epoch(datetime.fromisoformat(value)), deterministic=True)
+    conn.create_function(
+        "iso_epoch_ms", 1, lambda value: datetime_to_ms(datetime.fromisoformat(value)), deterministic=True
+    )
+    conn.create_function("day_bucket", 1, buckets.day, deterministic=True)
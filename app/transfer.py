@@ -0,0 +1,218 @@
+"""
+投稿数据的流式导出 / 导入（JSONL 与 CSV）。
+
+导出按批次从只读连接的游标上取行，每批只额外加载这一批的媒体，内存占用与表大小无关；
+导入按批次 executemany 写入，每批提交后记录检查点，中断后重跑会从上次提交的位置继续。
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+from app.database import (
+    INSERT_MEDIA,
+    SUBMISSION_COLUMNS,
+    TIME_COLUMNS,
+    Database,
+    encode_field,
+    load_media,
+    row_to_submission,
+)
+from app.ids import SnowflakeGenerator, datetime_to_ms, parse_submission_id
+from app.models import MediaFile
+from app.timeutil import to_epoch
+
+FORMATS = ("jsonl", "csv")
+# legacy_id：迁移到整数 ID 之前的文本 ID，导出后再导入时保持不变
+EXPORT_COLUMNS = (*SUBMISSION_COLUMNS, "legacy_id")
+CSV_FIELDS = [*EXPORT_COLUMNS, "archived", "media"]
+
+
+@dataclass(frozen=True)
+class ExportFilter:
+    status: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+    def where_clause(self) -> tuple[str, List[Any]]:
+        clauses, params = [], []
+        if self.status:
+            clauses.append("status = ?")
+            params.append(self.status)
+        if self.since:
+            clauses.append("created_ts >= ?")
+            params.append(to_epoch(self.since))
+        if self.until:
+            clauses.append("created_ts < ?")
+            params.append(to_epoch(self.until))
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def _media_to_dict(media: MediaFile) -> Dict[str, Any]:
+    return {
+        "file_id": media.file_id,
+        "file_type": media.file_type,
+        "caption": media.caption,
+        "file_unique_id": media.file_unique_id,
+    }
+
+
+def iter_records(
+    conn: sqlite3.Connection, export_filter: ExportFilter = ExportFilter(), batch_size: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    """逐条产出可序列化的投稿记录（热表在前、归档表在后）。"""
+    where, params = export_filter.where_clause()
+    columns = ", ".join(EXPORT_COLUMNS)
+
+    for table, archived in (("submissions", False), ("submissions_archive", True)):
+        cursor = conn.execute(f"SELECT {columns} FROM {table}{where}", params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            media = load_media(conn, [row[0] for row in rows])
+            for row in rows:
+                submission = row_to_submission(row[: len(SUBMISSION_COLUMNS)], media.get(row[0], []))
+                record = {column: encode_field(column, getattr(submission, column)) for column in SUBMISSION_COLUMNS}
+                record["legacy_id"] = row[-1]
+                record["is_anonymous"] = bool(submission.is_anonymous)
+                record["archived"] = archived
+                record["media"] = [_media_to_dict(m) for m in submission.media_files]
+                yield record
+
+
+def write_records(records: Iterable[Dict[str, Any]], output: IO[str], fmt: str) -> int:
+    count = 0
+    if fmt == "jsonl":
+        for record in records:
+            output.write(json.dumps(record, ensure_ascii=False))
+            output.write("\n")
+            count += 1
+    else:
+        writer = csv.DictWriter(output, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow({**record, "media": json.dumps(record["media"], ensure_ascii=False)})
+            count += 1
+    return count
+
+
+def read_records(source: IO[str], fmt: str) -> Iterator[Dict[str, Any]]:
+    if fmt == "jsonl":
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    for row in csv.DictReader(source):
+        record: Dict[str, Any] = dict(row)
+        record["media"] = json.loads(row["media"] or "[]")
+        record["is_anonymous"] = row["is_anonymous"].strip().lower() in {"1", "true"}
+        record["archived"] = row["archived"].strip().lower() in {"1", "true"}
+        record["submission_id"] = parse_submission_id(row["submission_id"])
+        for column in ("user_id", "admin_message_id", "preview_message_id", "decision_by"):
+            record[column] = int(row[column]) if row.get(column) else None
+        for column in ("legacy_id", "media_group_id", "caption", "caption_only", "tags", "decided_at"):
+            record[column] = row.get(column) or None
+        yield record
+
+
+def export_submissions(
+    database: Database, output: IO[str], fmt: str, export_filter: ExportFilter = ExportFilter()
+) -> int:
+    with database.reader() as conn:
+        return write_records(iter_records(conn, export_filter), output, fmt)
+
+
+def _assign_integer_id(conn: sqlite3.Connection, record: Dict[str, Any], generator: SnowflakeGenerator):
+    """旧版导出文件里的文本 ID：已导入过则沿用已分配的整数 ID，否则按创建时间（服务器本地时间）生成新 ID。"""
+    submission_id = parse_submission_id(record["submission_id"])
+    if isinstance(submission_id, int):
+        record["submission_id"] = submission_id
+        return
+    row = conn.execute("SELECT submission_id FROM all_submissions WHERE legacy_id = ?", (submission_id,)).fetchone()
+    record["legacy_id"] = submission_id
+    if row:
+        record["submission_id"] = row[0]
+    else:
+        record["submission_id"] = generator.next_id(datetime_to_ms(datetime.fromisoformat(record["created_at"])))
+
+
+def _submission_params(database: Database, record: Dict[str, Any]) -> List[Any]:
+    params = [record.get(column) for column in EXPORT_COLUMNS]
+    params[SUBMISSION_COLUMNS.index("is_anonymous")] = int(bool(record.get("is_anonymous")))
+    # created_ts / created_day / decided_ts 不导出，按目标库的时区配置重新计算
+    decided_at = record.get("decided_at")
+    params.extend(
+        database.time_fields(
+            datetime.fromisoformat(record["created_at"]), datetime.fromisoformat(decided_at) if decided_at else None
+        )
+    )
+    return params
+
+
+def _media_params(records: List[Dict[str, Any]]) -> Iterator[tuple]:
+    for record in records:
+        for position, media in enumerate(record["media"]):
+            yield (
+                record["submission_id"],
+                position,
+                media["file_id"],
+                media.get("file_unique_id"),
+                media["file_type"],
+                media.get("caption"),
+            )
+
+
+def import_submissions(
+    database: Database,
+    source: IO[str],
+    fmt: str,
+    batch_size: int = 1000,
+    checkpoint: Optional[Path] = None,
+) -> int:
+    """导入记录，已存在的 submission_id 会被跳过（可重复执行）；返回本次处理的记录数。"""
+    done = int(checkpoint.read_text()) if checkpoint and checkpoint.exists() else 0
+    columns = ", ".join((*EXPORT_COLUMNS, *TIME_COLUMNS))
+    values = ", ".join("?" * (len(EXPORT_COLUMNS) + len(TIME_COLUMNS)))
+    generator = SnowflakeGenerator()
+    insert_hot = f"INSERT OR IGNORE INTO submissions ({columns}) VALUES ({values})"
+    insert_archive = f"INSERT OR IGNORE INTO submissions_archive ({columns}, archived_at) VALUES ({values}, ?)"
+    insert_media = INSERT_MEDIA.replace("INSERT INTO", "INSERT OR IGNORE INTO", 1)
+
+    processed = 0
+    batch: List[Dict[str, Any]] = []
+
+    def flush():
+        nonlocal done
+        archived_at = datetime.now().isoformat()
+        with database.writer() as conn:
+            for record in batch:
+                _assign_integer_id(conn, record, generator)
+            conn.executemany(insert_hot, (_submission_params(database, r) for r in batch if not r.get("archived")))
+            conn.executemany(
+                insert_archive, ((*_submission_params(database, r), archived_at) for r in batch if r.get("archived"))
+            )
+            conn.executemany(insert_media, _media_params(batch))
+        done += len(batch)
+        if checkpoint:
+            checkpoint.write_text(str(done))
+        batch.clear()
+
+    for index, record in enumerate(read_records(source, fmt)):
+        if index < done:
+            continue
+        batch.append(record)
+        processed += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return processed
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+WriteOp = Callable[[sqlite3.Connection], Any]
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """组提交（group commit）写队列。
+
+    调用方把写操作放进队列后立即拿到一个 Future；后台线程每攒够 ``max_batch`` 个操作、
+    或距第一个操作超过 ``max_delay`` 秒，就在同一个事务里统一提交，只付一次 fsync。
+    每个操作包在独立的 SAVEPOINT 里，单个操作失败不会连累同批的其它写入；
+    Future 在所在批次提交成功之后才会完成。
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        lock: threading.RLock,
+        max_batch: int = 64,
+        max_delay: float = 0.005,
+        max_queue: int = 1024,
+    ):
+        self._conn = conn
+        self._lock = lock
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self.batches = 0
+        self.ops = 0
+        self._thread = threading.Thread(target=self._run, name="femsub-db-write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, op: WriteOp) -> Future:
+        if self._closed:
+            raise RuntimeError("WriteBehindQueue is closed")
+        future: Future = Future()
+        self._queue.put((op, future))
+        return future
+
+    def close(self):
+        """停止接收新写入，等待已排队的操作全部提交。"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": self.batches,
+            "ops": self.ops,
+            "avg_batch_size": round(self.ops / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch: List[Tuple[WriteOp, Future]] = [item]
+            deadline = time.monotonic() + self.max_delay
+            stop = False
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: List[Tuple[WriteOp, Future]]):
+        outcomes: List[Tuple[Future, bool, Any]] = []
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                for op, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    self._conn.execute("SAVEPOINT write_op")
+                    try:
+                        result = op(self._conn)
+                    except Exception as exc:  # pylint: disable=broad-except
+                        self._conn.execute("ROLLBACK TO write_op")
+                        self._conn.execute("RELEASE write_op")
+                        outcomes.append((future, False, exc))
+                    else:
+                        self._conn.execute("RELEASE write_op")
+                        outcomes.append((future, True, result))
+                self._conn.commit()
+            except Exception as exc:  # pylint: disable=broad-except
+                self._conn.rollback()
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+
+        self.batches += 1
+        self.ops += len(outcomes)
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+投稿写入吞吐基准：对比旧版“每次调用 connect/close”、长连接逐条提交与组提交（write-behind）。
+
+用法：python benchmarks/bench_writes.py [--count 2000] [--concurrency 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.async_database import AsyncDatabase  # noqa: E402
+from app.database import Database  # noqa: E402
+from app.models import MediaFile, Submission, SubmissionStatus  # noqa: E402
+
+
+def _make_submission(index: int) -> Submission:
+    return Submission(
+        submission_id=index + 1,
+        user_id=index % 500,
+        username=f"user{index % 500}",
+        media_files=[MediaFile(file_id=f"file_{index}_{i}", file_type="photo") for i in range(3)],
+        caption="benchmark caption",
+        caption_only="benchmark caption",
+        is_anonymous=False,
+        tags="#bench",
+        status=SubmissionStatus.PENDING,
+        created_at=datetime.now(),
+    )
+
+
+def bench_connect_per_call(db_path: str, count: int) -> float:
+    """复刻旧实现：每次写入都新建连接、默认 rollback journal、提交后关闭。"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        CREATE TABLE submissions (
+            submission_id TEXT PRIMARY KEY, user_id INTEGER NOT NULL, username TEXT NOT NULL,
+            media_files TEXT NOT NULL, caption TEXT, caption_only TEXT, is_anonymous BOOLEAN DEFAULT 0,
+            tags TEXT, status TEXT NOT NULL, created_at TIMESTAMP NOT NULL, media_group_id TEXT,
+            admin_message_id INTEGER, preview_message_id INTEGER
+        )
+    """
+    )
+    conn.commit()
+    conn.close()
+
+    start = time.perf_counter()
+    for index in range(count):
+        submission = _make_submission(index)
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "INSERT OR REPLACE INTO submissions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                submission.submission_id,
+                submission.user_id,
+                submission.username,
+                json.dumps([{"file_id": m.file_id, "file_type": m.file_type} for m in submission.media_files]),
+                submission.caption,
+                submission.caption_only,
+                submission.is_anonymous,
+                submission.tags,
+                submission.status.value,
+                submission.created_at.isoformat(),
+                None,
+                None,
+                None,
+            ),
+        )
+        conn.commit()
+        conn.close()
+    return time.perf_counter() - start
+
+
+def bench_async(db_path: str, count: int, concurrency: int, write_behind: bool) -> float:
+    database = Database(db_path=db_path, write_behind=write_behind)
+
+    async def run() -> float:
+        db = AsyncDatabase(database, cache_size=0)
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(count):
+            queue.put_nowait(index)
+
+        async def worker():
+            while not queue.empty():
+                await db.save_submission(_make_submission(queue.get_nowait()))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        await db.close()
+        return elapsed
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            "connect-per-call": bench_connect_per_call(os.path.join(tmp, "legacy.db"), args.count),
+            "pooled writer": bench_async(os.path.join(tmp, "pooled.db"), args.count, args.concurrency, False),
+            "write-behind": bench_async(os.path.join(tmp, "batched.db"), args.count, args.concurrency, True),
+        }
+
+    baseline = results["connect-per-call"]
+    print(f"{args.count} inserts, concurrency {args.concurrency}")
+    for name, elapsed in results.items():
+        print(f"  {name:<18} {args.count / elapsed:>10.0f} inserts/s  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
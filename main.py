@@ -27,7 +27,7 @@ def main():
     logging.getLogger("telegram.ext").setLevel(logging.WARNING)
 
     services = ServiceContainer(settings)
-    application = Application.builder().token(settings.bot_token).build()
+    application = Application.builder().token(settings.bot_token).post_shutdown(services.shutdown).build()
 
     # ===== GROUP_FEEDBACK =====
     application.add_handler(
@@ -52,6 +52,22 @@ def main():
         CommandHandler("stats", partial(commands.stats, services=services)),
         group=GROUP_SUBMISSION,
     )
+    application.add_handler(
+        CommandHandler("review", partial(commands.review, services=services)),
+        group=GROUP_SUBMISSION,
+    )
+    application.add_handler(
+        CommandHandler("metrics", partial(commands.metrics, services=services)),
+        group=GROUP_SUBMISSION,
+    )
+    application.add_handler(
+        CommandHandler("search", partial(commands.search, services=services)),
+        group=GROUP_SUBMISSION,
+    )
+    application.add_handler(
+        CommandHandler("tags", partial(commands.tags, services=services)),
+        group=GROUP_SUBMISSION,
+    )
     application.add_handler(
         CommandHandler("my", partial(commands.my_command, services=services)),
         group=GROUP_SUBMISSION,
@@ -75,6 +91,22 @@ def main():
     )
     application.add_handler(CallbackQueryHandler(partial(callbacks.handle_callback_query, services=services)))
 
+    # ===== Background jobs =====
+    if settings.archive_after_days > 0:
+        application.job_queue.run_repeating(
+            services.maintenance_service.archive_job,
+            interval=settings.archive_interval,
+            first=60,
+            name="archive_decided",
+        )
+    if services.backups is not None and settings.backup_interval > 0:
+        application.job_queue.run_repeating(
+            services.maintenance_service.backup_job,
+            interval=settings.backup_interval,
+            first=300,
+            name="database_backup",
+        )
+
     print("🤖 FemSub Bot is starting...")
     application.run_polling()
 
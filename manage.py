@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+FemSub 数据维护命令行
+
+    python manage.py export -o dump.jsonl [--format jsonl|csv] [--status approved] [--since 2024-01-01]
+    python manage.py import dump.jsonl [--format jsonl|csv] [--batch-size 1000]
+    python manage.py backup [-o 备份目录] [--keep 7]
+    python manage.py rebuild-stats
+
+导出 / 导入 / 备份均为流式处理，可以在机器人运行时执行。
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.backup import BackupManager
+from app.config import settings
+from app.database import Database
+from app.transfer import FORMATS, ExportFilter, export_submissions, import_submissions
+
+
+def _guess_format(path: str, explicit: str) -> str:
+    if explicit:
+        return explicit
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def _report(action: str, count: int, started: float):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"✅ {action} {count} 条投稿，用时 {elapsed:.2f}s（{count / elapsed:.0f} 条/秒）", file=sys.stderr)
+
+
+def cmd_export(args, database: Database):
+    fmt = _guess_format(args.output or "", args.format)
+    export_filter = ExportFilter(
+        status=args.status,
+        since=datetime.fromisoformat(args.since) if args.since else None,
+        until=datetime.fromisoformat(args.until) if args.until else None,
+    )
+    started = time.perf_counter()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as output:
+            count = export_submissions(database, output, fmt, export_filter)
+    else:
+        count = export_submissions(database, sys.stdout, fmt, export_filter)
+    _report("导出", count, started)
+
+
+def cmd_import(args, database: Database):
+    fmt = _guess_format(args.input, args.format)
+    checkpoint = Path(f"{args.input}.progress")
+    if args.restart and checkpoint.exists():
+        checkpoint.unlink()
+    started = time.perf_counter()
+    with open(args.input, encoding="utf-8", newline="") as source:
+        count = import_submissions(database, source, fmt, batch_size=args.batch_size, checkpoint=checkpoint)
+    _report("导入", count, started)
+
+
+def cmd_backup(args, database: Database):
+    manager = BackupManager(database.db_path, backup_dir=args.output, keep=args.keep, pages_per_step=args.pages)
+    result = manager.run()
+    print(
+        f"✅ 备份完成：{result.path}（{result.size_bytes / 1024 / 1024:.1f} MB，{result.pages} 页，"
+        f"用时 {result.duration:.2f}s，完整性校验通过）",
+        file=sys.stderr,
+    )
+
+
+def cmd_rebuild_stats(args, database: Database):
+    drifts = database.rebuild_stats()
+    for drift in drifts:
+        key = ", ".join(map(str, drift.key))
+        print(f"⚠️ {drift.table}[{key}]: 计数 {drift.stored} -> 实际 {drift.actual}", file=sys.stderr)
+    print(f"✅ 统计计数已重建，发现 {len(drifts)} 处偏差", file=sys.stderr)
+    if drifts and args.check:
+        sys.exit(1)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="FemSub 数据维护工具")
+    parser.add_argument(
+        "--db", default=settings.db_path, help=f"SQLite 数据库路径（默认取 DB_PATH：{settings.db_path}）"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="流式导出投稿")
+    export_parser.add_argument("-o", "--output", help="输出文件（省略时写到标准输出）")
+    export_parser.add_argument("--format", choices=FORMATS, help="输出格式（默认按扩展名判断）")
+    export_parser.add_argument("--status", choices=["pending", "approved", "rejected"])
+    export_parser.add_argument("--since", help="只导出该时间（含）之后创建的投稿，ISO 格式")
+    export_parser.add_argument("--until", help="只导出该时间之前创建的投稿，ISO 格式")
+    export_parser.set_defaults(handler=cmd_export)
+
+    import_parser = subparsers.add_parser("import", help="批量导入投稿（可断点续传）")
+    import_parser.add_argument("input", help="导入文件")
+    import_parser.add_argument("--format", choices=FORMATS, help="输入格式（默认按扩展名判断）")
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+    import_parser.add_argument("--restart", action="store_true", help="忽略检查点，从头导入")
+    import_parser.set_defaults(handler=cmd_import)
+
+    backup_parser = subparsers.add_parser("backup", help="在线备份数据库（含完整性校验与轮换）")
+    backup_parser.add_argument(
+        "-o",
+        "--output",
+        default=settings.backup_dir,
+        help=f"备份目录（默认取 BACKUP_DIR：{settings.backup_dir}）",
+    )
+    backup_parser.add_argument(
+        "--keep",
+        type=int,
+        default=settings.backup_keep,
+        help=f"保留的备份份数（默认取 BACKUP_KEEP：{settings.backup_keep}）",
+    )
+    backup_parser.add_argument(
+        "--pages",
+        type=int,
+        default=settings.backup_pages_per_step,
+        help=f"每步复制的页数（默认取 BACKUP_PAGES_PER_STEP：{settings.backup_pages_per_step}）",
+    )
+    backup_parser.set_defaults(handler=cmd_backup)
+
+    rebuild_parser = subparsers.add_parser("rebuild-stats", help="按原始数据重算统计计数并报告偏差")
+    rebuild_parser.add_argument("--check", action="store_true", help="发现偏差时以非零状态码退出")
+    rebuild_parser.set_defaults(handler=cmd_rebuild_stats)
+
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    database = Database(db_path=args.db, timezone=settings.timezone)
+    try:
+        args.handler(args, database)
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.database import Database
+from app.memory_database import InMemoryDatabase
+from app.models import MediaFile, Submission, SubmissionStatus
+
+
+def create_submission(submission_id: int, **overrides: Any) -> Submission:
+    """构造测试用的投稿；只需写出与默认值不同的字段，caption_only 默认与 caption 相同。"""
+    fields = {
+        "user_id": 1,
+        "username": "tester",
+        "media_files": [MediaFile(file_id=f"file_{submission_id}", file_type="photo")],
+        "caption": "hello",
+        "is_anonymous": False,
+        "tags": "",
+        "status": SubmissionStatus.PENDING,
+        "created_at": datetime(2024, 1, 1),
+        **overrides,
+    }
+    fields.setdefault("caption_only", fields["caption"])
+    return Submission(submission_id=submission_id, **fields)
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def backend(request, tmp_path: Path):
+    """同一个测试分别跑在 SQLite 与内存两个存储后端上；需要预置数据的测试文件可以覆盖这个 fixture。"""
+    database = Database(db_path=str(tmp_path / "backend.db")) if request.param == "sqlite" else InMemoryDatabase()
+    yield database
+    database.close()
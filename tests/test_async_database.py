@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.async_database import AsyncDatabase
+from app.database import Database
+from app.models import SubmissionStatus
+from conftest import create_submission
+
+
+def test_async_facade_runs_off_loop(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "async.db"), forbid_loop_calls=True)
+
+    async def scenario():
+        db = AsyncDatabase(database)
+        await db.save_submission(create_submission(1))
+        await db.update_submission_status(1, SubmissionStatus.APPROVED)
+        loaded = await db.get_submission(1)
+        count = await db.read(lambda conn: conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0])
+        await db.close()
+        return loaded, count
+
+    loaded, count = asyncio.run(scenario())
+    assert loaded.status == SubmissionStatus.APPROVED
+    assert count == 1
+
+
+def test_sync_call_on_event_loop_fails_loudly(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "guard.db"), forbid_loop_calls=True)
+
+    async def scenario():
+        database.get_submission(999)
+
+    with pytest.raises(RuntimeError, match="event loop"):
+        asyncio.run(scenario())
+    database.close()
+
+
+def test_submission_cache_serves_reads_and_tracks_writes(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "cache.db"), forbid_loop_calls=True)
+
+    async def scenario():
+        db = AsyncDatabase(database, cache_size=1)
+        await db.save_submission(create_submission(11))
+
+        first = await db.get_submission(11)
+        first.caption = "local edit only"
+        second = await db.get_submission(11)
+        assert second.caption == "hello"  # 调用方拿到的是副本
+
+        await db.update_fields(11, is_anonymous=True)
+        assert (await db.get_submission(11)).is_anonymous is True
+
+        await db.save_submission(create_submission(12))  # 容量为 1，挤掉 11
+        assert (await db.get_submission(11)).is_anonymous is True
+        stats = db.cache.stats()
+        await db.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats.hits == 3
+    assert stats.misses == 1
+    assert stats.evictions >= 1
+
+
+def test_write_behind_batches_and_flushes_on_close(tmp_path: Path):
+    db_path = str(tmp_path / "batched.db")
+    database = Database(db_path=db_path, write_behind=True, write_batch_size=16, write_batch_delay=0.05)
+
+    async def scenario():
+        db = AsyncDatabase(database, cache_size=0)
+        await asyncio.gather(*(db.save_submission(create_submission(100 + i)) for i in range(40)))
+        # 批内单个操作失败不影响其它写入
+        results = await asyncio.gather(
+            db.update_fields(100, is_anonymous=True),
+            db.write_op(lambda conn: conn.execute("INSERT INTO missing_table VALUES (1)")),
+            return_exceptions=True,
+        )
+        stats = database.write_behind_stats()
+        await db.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert results[0] is True
+    assert isinstance(results[1], Exception)
+    assert stats["ops"] == 42 and stats["batches"] < 40
+
+    reopened = Database(db_path=db_path)
+    with reopened.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0] == 40
+    assert reopened.get_submission(100).is_anonymous is True
+    reopened.close()
+
+
+def test_user_summary_cache_is_invalidated_by_writes(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "summary.db"), forbid_loop_calls=True)
+
+    async def scenario():
+        db = AsyncDatabase(database, cache_size=0)
+        await db.save_submission(create_submission(21))
+        first = await db.get_user_summary(1, "tester")
+        again = await db.get_user_summary(1, "renamed")
+        assert again.username == "renamed" and again.total == first.total == 1
+
+        await db.save_submission(create_submission(23, user_id=67890))
+        await db.get_user_summary(67890, "other")
+
+        # 投稿不在读缓存里（cache_size=0）：按写操作返回的 user_id 失效，其他用户的概况保留
+        await db.update_submission_status(21, SubmissionStatus.APPROVED)
+        assert db.summary_cache.peek(67890) is not None
+        updated = await db.get_user_summary(1, "tester")
+        await db.save_submission(create_submission(22))
+        latest = await db.get_user_summary(1, "tester")
+        stats = db.summary_cache.stats()
+        await db.close()
+        return updated, latest, stats
+
+    updated, latest, stats = asyncio.run(scenario())
+    assert updated.status_counts == {"approved": 1}
+    assert latest.total == 2
+    assert (stats.hits, stats.misses) == (1, 4)
+
+
+def test_summary_read_during_slow_write_is_not_cached(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "race.db"), forbid_loop_calls=True)
+    release = threading.Event()
+    update_fields_op = database.update_fields_op
+
+    def slow_update_fields_op(submission_id, **changes):
+        op = update_fields_op(submission_id, **changes)
+
+        def blocked(conn):
+            release.wait(timeout=5)
+            return op(conn)
+
+        return blocked
+
+    database.update_fields_op = slow_update_fields_op
+
+    async def scenario():
+        db = AsyncDatabase(database)
+        await db.save_submission(create_submission(31))
+        writing = asyncio.ensure_future(db.update_submission_status(31, SubmissionStatus.APPROVED))
+        await asyncio.sleep(0.05)
+        # 写操作还卡在写线程里：这次读取拿到的是旧数据，不能留在缓存里
+        during = await db.get_user_summary(1, "tester")
+        release.set()
+        await writing
+        after = await db.get_user_summary(1, "tester")
+        await db.close()
+        return during, after
+
+    during, after = asyncio.run(scenario())
+    assert during.status_counts == {"pending": 1}
+    assert after.status_counts == {"approved": 1}
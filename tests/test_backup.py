@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+from app.backup import BackupManager
+from app.database import Database
+from conftest import create_submission
+
+
+def test_backup_while_writing_is_consistent_and_rotated(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "live.db"))
+    for index in range(500):
+        database.save_submission(create_submission(index + 1, caption="x" * 200))
+
+    stop = threading.Event()
+
+    def keep_writing():
+        index = 1000
+        while not stop.is_set():
+            database.save_submission(create_submission(index, caption="x" * 200))
+            index += 1
+
+    writer = threading.Thread(target=keep_writing)
+    writer.start()
+    manager = BackupManager(database.db_path, backup_dir=str(tmp_path / "backups"), keep=2, pages_per_step=8)
+    try:
+        results = [manager.run() for _ in range(3)]
+    finally:
+        stop.set()
+        writer.join()
+        database.close()
+
+    backups = manager.list_backups()
+    assert len(backups) == 2 and results[-1].path in backups
+    conn = sqlite3.connect(str(results[-1].path))
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0] >= 500
+    conn.close()
+
+    stats = manager.stats()
+    assert stats["backups_ok"] == 3 and stats["last_size_bytes"] > 0
@@ -1,37 +1,26 @@
 from __future__ import annotations
 
+import sqlite3
 from datetime import datetime
 from pathlib import Path
 
-from app.database import Database
-from app.models import MediaFile, Submission, SubmissionStatus
-
+import pytest
 
-def _create_submission(submission_id: str) -> Submission:
-    return Submission(
-        submission_id=submission_id,
-        user_id=12345,
-        username="tester",
-        media_files=[MediaFile(file_id="file_1", file_type="photo")],
-        caption="hello world",
-        caption_only="hello world",
-        is_anonymous=False,
-        tags="#tag1",
-        status=SubmissionStatus.PENDING,
-        created_at=datetime.utcnow(),
-    )
+from app.database import Database
+from app.models import MediaFile, SubmissionStatus
+from conftest import create_submission
 
 
 def test_save_and_load_submission(tmp_path: Path):
     db_path = tmp_path / "test.db"
     database = Database(db_path=str(db_path))
 
-    submission = _create_submission("test_1")
+    submission = create_submission(1, caption="hello world")
     database.save_submission(submission)
 
-    loaded = database.get_submission("test_1")
+    loaded = database.get_submission(1)
     assert loaded is not None
-    assert loaded.submission_id == "test_1"
+    assert loaded.submission_id == 1
     assert loaded.caption_only == "hello world"
     assert loaded.media_files[0].file_id == "file_1"
 
@@ -40,14 +29,131 @@ def test_update_status_and_tags(tmp_path: Path):
     db_path = tmp_path / "test2.db"
     database = Database(db_path=str(db_path))
 
-    submission = _create_submission("test_2")
+    submission = create_submission(2)
     database.save_submission(submission)
 
-    database.update_submission_status("test_2", SubmissionStatus.APPROVED)
-    database.update_submission_tags("test_2", ["#a", "#b"])
+    database.update_submission_status(2, SubmissionStatus.APPROVED)
+    database.update_submission_tags(2, ["#a", "#b"])
 
-    loaded = database.get_submission("test_2")
+    loaded = database.get_submission(2)
     assert loaded is not None
     assert loaded.status == SubmissionStatus.APPROVED
     assert loaded.tags == "#a #b"
 
+
+def test_wal_mode_and_read_only_pool(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "test3.db"), read_pool_size=2)
+    database.save_submission(create_submission(3))
+
+    with database.writer() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # 持有一个读连接时，写入和另一个读连接都不受影响
+    with database.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0] == 1
+        database.update_submission_status(3, SubmissionStatus.APPROVED)
+        assert database.get_submission(3).status == SubmissionStatus.APPROVED
+
+    with database.reader() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM submissions")
+
+    database.close()
+
+
+def test_get_submissions_bulk_preserves_order(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "bulk.db"))
+    for i in range(3):
+        database.save_submission(create_submission(100 + i))
+
+    loaded = database.get_submissions([102, 999, 100, 102])
+    assert [s.submission_id for s in loaded] == [102, 100, 102]
+    assert loaded[0].media_files[0].file_id == "file_102"
+    database.close()
+
+
+def test_update_fields_writes_only_dirty_columns(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "dirty.db"))
+    submission = create_submission(4)
+    database.save_submission(submission)
+    assert submission.dirty_fields() == {}
+
+    submission.is_anonymous = True
+    submission.status = SubmissionStatus.REJECTED
+    assert set(submission.dirty_fields()) == {"is_anonymous", "status"}
+
+    assert database.update_fields(4, **submission.dirty_fields())
+    assert not database.update_fields(999, is_anonymous=True)
+    with pytest.raises(ValueError):
+        database.update_fields(4, user_name="other")
+
+    loaded = database.get_submission(4)
+    assert loaded.is_anonymous is True
+    assert loaded.status == SubmissionStatus.REJECTED
+    assert loaded.media_files[0].file_id == "file_4"
+    database.close()
+
+
+def test_media_is_loaded_only_on_request(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "media.db"))
+    submission = create_submission(5)
+    submission.media_files.append(MediaFile(file_id="file_2", file_type="video", file_unique_id="u2"))
+    database.save_submission(submission)
+
+    light = database.get_submission(5, with_media=False)
+    assert light.media_files == [] and not light.media_loaded
+
+    # 未加载媒体的对象整行保存，也不会清空媒体表
+    light.caption = "changed"
+    database.save_submission(light)
+    assert [m.file_unique_id for m in database.get_media(5)] == [None, "u2"]
+
+    database.update_fields(5, media_files=[MediaFile(file_id="file_3", file_type="document")])
+    assert [m.file_id for m in database.get_submission(5).media_files] == ["file_3"]
+    database.close()
+
+
+def test_archive_moves_old_decided_rows_transparently(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "archive.db"))
+    old = datetime(2020, 1, 1)
+    for i, status in enumerate([SubmissionStatus.APPROVED, SubmissionStatus.REJECTED, SubmissionStatus.PENDING]):
+        database.save_submission(create_submission(10 + i, created_at=old, status=status))
+    database.save_submission(create_submission(20))
+
+    assert database.archive_decided(datetime(2021, 1, 1), batch_size=1) == 2
+
+    with database.reader() as conn:
+        hot = {row[0] for row in conn.execute("SELECT submission_id FROM submissions")}
+        total = conn.execute("SELECT COUNT(*) FROM all_submissions").fetchone()[0]
+    assert hot == {12, 20}
+    assert total == 4
+
+    archived = database.get_submission(10)
+    assert archived.status == SubmissionStatus.APPROVED
+    assert archived.media_files[0].file_id == "file_10"
+    assert database.update_fields(11, caption_only="edited")
+    assert database.get_submission(11).caption_only == "edited"
+    database.close()
+
+
+def test_stats_counters_track_writes_and_rebuild_detects_drift(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "stats.db"))
+    for i in range(3):
+        database.save_submission(create_submission(30 + i, created_at=datetime.now()))
+    database.update_submission_status(30, SubmissionStatus.APPROVED)
+    database.update_submission_status(31, SubmissionStatus.REJECTED)
+    database.archive_decided(datetime(2100, 1, 1))
+
+    dashboard = database.get_dashboard_stats()
+    assert dashboard.total == 3
+    assert dashboard.status_counts == {"pending": 1, "approved": 1, "rejected": 1}
+    assert dashboard.top_submitters == [("tester", 3)]
+    assert database.get_user_summary(1, "tester").status_counts == dashboard.status_counts
+    assert database.rebuild_stats() == []
+
+    with database.writer() as conn:
+        conn.execute("UPDATE stats_status SET count = 7 WHERE status = 'pending'")
+    drifts = database.rebuild_stats()
+    assert [(d.table, d.key, d.stored, d.actual) for d in drifts] == [("stats_status", ("pending",), 7, 1)]
+    assert database.get_dashboard_stats().total == 3
+    database.close()
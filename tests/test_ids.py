@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.ids import (
+    EPOCH_MS,
+    MAX_SEQUENCE,
+    SnowflakeGenerator,
+    compose_id,
+    datetime_to_ms,
+    id_timestamp_ms,
+    min_id_for,
+    parse_submission_id,
+)
+
+
+def test_ids_are_unique_and_monotonic_within_one_millisecond():
+    generator = SnowflakeGenerator(worker_id=3, clock=lambda: 1_750_000_000.0)
+    ids = [generator.next_id() for _ in range(MAX_SEQUENCE + 10)]
+
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    # 序号用尽后借用下一毫秒
+    assert id_timestamp_ms(ids[-1]) == 1_750_000_000_001
+    assert ids[0] < 2**63
+
+
+def test_clock_going_backwards_keeps_ids_increasing():
+    now = [1_750_000_000.0]
+    generator = SnowflakeGenerator(clock=lambda: now[0])
+    first = generator.next_id()
+    now[0] -= 5
+    assert generator.next_id() > first
+
+
+def test_time_range_and_legacy_parsing():
+    generator = SnowflakeGenerator()
+    moment = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+    submission_id = generator.next_id(int(moment.timestamp() * 1000))
+
+    assert min_id_for(moment) <= submission_id < min_id_for(datetime(2025, 6, 1, 12, 0, 1, tzinfo=timezone.utc))
+    # 不带时区的值按服务器本地时间解释，与 created_ts 一致
+    assert min_id_for(moment.astimezone().replace(tzinfo=None)) == min_id_for(moment)
+    assert parse_submission_id(str(submission_id)) == submission_id
+    assert parse_submission_id("single_1_1700000000") == "single_1_1700000000"
+
+
+def test_pre_epoch_timestamps_are_rejected():
+    with pytest.raises(ValueError):
+        compose_id(EPOCH_MS - 1)
+    assert datetime_to_ms(datetime(2014, 12, 31)) < EPOCH_MS
+    assert min_id_for(datetime(2000, 1, 1)) == 0
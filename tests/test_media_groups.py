@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.services.media_groups import MAX_GROUP_ITEMS, MediaGroupAggregator
+
+
+def _collector():
+    flushed = []
+
+    async def on_flush(group):
+        flushed.append((group.group_id, list(group.items)))
+
+    return flushed, on_flush
+
+
+class ManualClock:
+    """手动推进的时钟：sleep 只在 advance 越过截止时间时返回。"""
+
+    def __init__(self):
+        self.now = 0.0
+        self._sleepers = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        future = asyncio.get_running_loop().create_future()
+        self._sleepers.append((self.now + seconds, future))
+        await future
+
+    async def advance(self, seconds: float):
+        self.now += seconds
+        due = [entry for entry in self._sleepers if entry[0] <= self.now]
+        self._sleepers = [entry for entry in self._sleepers if entry[0] > self.now]
+        for _, future in due:
+            if not future.done():
+                future.set_result(None)
+        # 让被唤醒的等待任务跑完
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+
+def test_full_group_flushes_immediately():
+    async def scenario():
+        flushed, on_flush = _collector()
+        aggregator = MediaGroupAggregator(on_flush, debounce=5, max_wait=30)
+        for index in range(MAX_GROUP_ITEMS):
+            await aggregator.add("album", 1, index)
+        assert flushed == [("album", list(range(MAX_GROUP_ITEMS)))]
+        assert len(aggregator) == 0
+        assert aggregator.stats()["flushed_full"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_debounce_slides_until_max_wait():
+    async def scenario():
+        clock = ManualClock()
+        flushed, on_flush = _collector()
+        aggregator = MediaGroupAggregator(on_flush, debounce=1, max_wait=2, clock=clock, sleep=clock.sleep)
+        await aggregator.add("quiet", 1, "a")
+        await aggregator.add("quiet", 1, "b")
+        # 持续有新消息的相册在 max_wait 时被截断交付
+        for index in range(4):
+            await aggregator.add("busy", 2, index)
+            await clock.advance(0.6)
+            if index == 1:
+                assert flushed == [("quiet", ["a", "b"])]
+        assert "busy" not in aggregator
+        assert flushed[-1] == ("busy", [0, 1, 2, 3])
+        stats = aggregator.stats()
+        assert (stats["flushed_debounce"], stats["flushed_max_wait"]) == (1, 1)
+        assert (stats["latency_p50"], stats["latency_max"]) == (2.4, 2.4)
+
+    asyncio.run(scenario())
+
+
+def test_buffer_caps_evict_oldest_groups():
+    async def scenario():
+        flushed, on_flush = _collector()
+        aggregator = MediaGroupAggregator(on_flush, debounce=5, max_wait=30, max_groups=4, max_groups_per_user=2)
+        for index in range(3):
+            await aggregator.add(f"u1-{index}", 1, "photo", caption=None)
+        assert "u1-0" not in aggregator and len(aggregator) == 2
+        for user_id in (2, 3, 4):
+            await aggregator.add(f"u{user_id}", user_id, "photo")
+        assert len(aggregator) == 4
+        assert "u1-1" not in aggregator and "u1-2" in aggregator
+        # 后来的说明文字补进 meta，已有的值不被覆盖
+        await aggregator.add("u4", 4, "photo", caption="hello")
+        await aggregator.add("u4", 4, "photo", caption="ignored")
+        assert aggregator._groups["u4"].meta == {"caption": "hello"}
+        stats = aggregator.stats()
+        assert (stats["evicted_user"], stats["evicted_global"], stats["buffered_items"]) == (1, 1, 6)
+        await aggregator.flush_all()
+        assert flushed[-1] == ("u4", ["photo"] * 3) and len(aggregator) == 0
+
+    asyncio.run(scenario())
+
+
+def test_abandoned_groups_are_swept():
+    async def scenario():
+        now = [0.0]
+        flushed, on_flush = _collector()
+        aggregator = MediaGroupAggregator(on_flush, debounce=1, max_wait=2, clock=lambda: now[0])
+        await aggregator.add("stuck", 1, "photo")
+        aggregator._groups["stuck"].task.cancel()
+        now[0] = 60.0
+        await aggregator.add("fresh", 2, "photo")
+        assert "stuck" not in aggregator and "fresh" in aggregator
+        assert aggregator.stats()["expired"] == 1
+        await aggregator.flush_all()
+        assert flushed == [("fresh", ["photo"])]
+
+    asyncio.run(scenario())
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from app.async_database import AsyncDatabase
+from app.config import Settings
+from app.database import Database
+from app.memory_database import InMemoryDatabase
+from app.models import MediaFile, SubmissionStatus
+from app.repository import create_repository
+from conftest import create_submission
+
+NOW = datetime.now()
+
+
+def _populate(backend):
+    for index in range(6):
+        submission = create_submission(
+            index + 1,
+            user_id=index % 2,
+            username=f"user{index % 2}",
+            tags="#日常",
+            created_at=NOW - timedelta(days=index * 3),
+        )
+        backend.save_submission(submission)
+    backend.update_fields(1, status=SubmissionStatus.APPROVED)
+    backend.update_fields(2, status=SubmissionStatus.REJECTED, tags="#福利")
+    backend.update_fields(3, media_files=[MediaFile(file_id="replaced", file_type="video")])
+
+
+def test_backends_agree(tmp_path: Path):
+    sqlite_db = Database(db_path=str(tmp_path / "parity.db"))
+    memory_db = InMemoryDatabase()
+    _populate(sqlite_db)
+    _populate(memory_db)
+
+    ids = [index + 1 for index in range(6)]
+    assert sqlite_db.get_submissions(ids) == memory_db.get_submissions(ids)
+    assert sqlite_db.get_media(3) == memory_db.get_media(3)
+    assert sqlite_db.get_dashboard_stats() == memory_db.get_dashboard_stats()
+    assert sqlite_db.get_user_summary(1, "user1") == memory_db.get_user_summary(1, "user1")
+    sqlite_db.close()
+
+
+def test_backend_contract(backend):
+    submission = create_submission(1)
+    backend.save_submission(submission)
+    assert not submission.dirty_fields()
+
+    loaded = backend.get_submission(1, with_media=False)
+    assert loaded.media_files == [] and not loaded.media_loaded
+    loaded.caption = "changed"
+    # 未加载媒体的保存不能清空已有媒体
+    backend.save_submission(loaded)
+    assert [media.file_id for media in backend.get_media(1)] == ["file_1"]
+
+    assert backend.update_fields(999, status=SubmissionStatus.APPROVED) is False
+    with pytest.raises(ValueError):
+        backend.update_fields(1, bogus=1)
+
+    backend.update_fields(1, status=SubmissionStatus.APPROVED)
+    assert backend.archive_decided(datetime.now() + timedelta(seconds=1)) == 1
+    assert backend.get_submission(1).caption == "changed"
+
+
+def test_rebuild_stats_detects_drift(backend):
+    _populate(backend)
+    assert backend.rebuild_stats() == []
+
+    # 两个后端的聚合计数同样被改坏，rebuild_stats 报告的偏差一致
+    if isinstance(backend, Database):
+        with backend.writer() as conn:
+            conn.execute("UPDATE stats_user_status SET count = 5 WHERE user_id = 0 AND status = 'approved'")
+            conn.execute("UPDATE stats_user_daily SET count = count + 1 WHERE user_id = 1")
+    else:
+        backend._user_status_counts[0]["approved"] = 5
+        for counts in backend._user_daily_counts.values():
+            if counts[1]:
+                counts[1] += 1
+    drifts = {(d.table, d.key, d.stored, d.actual) for d in backend.rebuild_stats()}
+    assert ("stats_user_status", (0, "approved"), 5, 1) in drifts
+    assert {table for table, *_ in drifts} == {"stats_user_status", "stats_user_daily"}
+    assert len(drifts) == 4
+    assert backend.rebuild_stats() == []
+
+
+def test_memory_backend_through_async_facade():
+    repository = create_repository(Settings(storage_backend="memory"))
+    assert isinstance(repository, InMemoryDatabase)
+
+    async def scenario():
+        db = AsyncDatabase(repository)
+        await db.save_submission(create_submission(1))
+        await db.update_submission_status(1, SubmissionStatus.APPROVED)
+        db.cache.clear()
+        loaded = await db.get_submission(1)
+        stats = await db.get_dashboard_stats()
+        await db.close()
+        return loaded, stats
+
+    loaded, stats = asyncio.run(scenario())
+    assert loaded.status == SubmissionStatus.APPROVED
+    assert stats.status_counts == {"approved": 1}
+
+    with pytest.raises(ValueError):
+        create_repository(Settings(storage_backend="postgres"))
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.database import Database
+from app.ids import SnowflakeGenerator, id_timestamp_ms
+from app.migrations import MIGRATIONS, apply_migrations, get_schema_version
+from conftest import create_submission
+
+
+def test_legacy_database_is_upgraded_once(tmp_path: Path):
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        CREATE TABLE submissions (
+            submission_id TEXT PRIMARY KEY, user_id INTEGER NOT NULL, username TEXT NOT NULL,
+            media_files TEXT NOT NULL, caption TEXT, caption_only TEXT, is_anonymous BOOLEAN DEFAULT 0,
+            tags TEXT, status TEXT NOT NULL, created_at TIMESTAMP NOT NULL, media_group_id TEXT,
+            admin_message_id INTEGER, preview_message_id INTEGER
+        )
+    """
+    )
+    # 早于 2024 年的旧投稿也要保留各自的时间顺序
+    conn.execute(
+        "INSERT INTO submissions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            "single_1_1690000000",
+            1,
+            "tester",
+            "[]",
+            "old",
+            "old",
+            0,
+            "",
+            "approved",
+            "2023-07-22T04:26:40",
+            None,
+            None,
+            None,
+        ),
+    )
+    conn.execute(
+        "INSERT INTO submissions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            "mg_1_1700000000",
+            1,
+            "tester",
+            json.dumps(
+                [{"file_id": "a", "file_type": "photo", "caption": None}, {"file_id": "b", "file_type": "video"}]
+            ),
+            "hi",
+            "hi",
+            0,
+            "",
+            "pending",
+            "2024-01-01T00:00:00",
+            "group",
+            None,
+            None,
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+    database = Database(db_path=db_path)
+    submission_id = database.resolve_legacy_id("mg_1_1700000000")
+    older_id = database.resolve_legacy_id("single_1_1690000000")
+    # 旧 ID 的时间戳与 created_ts 一致（不带时区的旧时间都按服务器本地时间解释），
+    # 迁移之后按当前时钟生成的新 ID 一定比旧 ID 大
+    with database.reader() as conn:
+        created = dict(conn.execute("SELECT submission_id, created_ts FROM all_submissions"))
+    assert id_timestamp_ms(submission_id) == created[submission_id] * 1000
+    assert id_timestamp_ms(older_id) == created[older_id] * 1000
+    assert 0 < older_id < submission_id < SnowflakeGenerator().next_id()
+    loaded = database.get_submission(submission_id)
+    assert [(m.file_id, m.file_type) for m in loaded.media_files] == [("a", "photo"), ("b", "video")]
+
+    with database.writer() as conn:
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(submissions)")]
+        day = conn.execute("SELECT created_day FROM submissions WHERE submission_id = ?", (submission_id,)).fetchone()
+    assert "decision_by" in columns
+    assert day == (20240101,)
+    database.close()
+
+    # 再次打开不会重复执行任何迁移
+    conn = sqlite3.connect(db_path)
+    assert apply_migrations(conn) == MIGRATIONS[-1][0]
+    conn.close()
+
+
+def test_user_queries_use_index(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "idx.db"))
+    with database.reader() as conn:
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT status, COUNT(*) FROM submissions WHERE user_id = ? GROUP BY status",
+                (1,),
+            )
+        )
+    assert "idx_submissions_user_created" in plan
+    database.close()
+
+
+def test_time_columns_bucket_by_configured_timezone(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "tz.db"), timezone="Asia/Shanghai")
+    # UTC 2024-01-01 20:00 在东八区已经是 1 月 2 日
+    created_at = datetime.fromtimestamp(datetime(2024, 1, 1, 20, tzinfo=timezone.utc).timestamp())
+    database.save_submission(create_submission(1, created_at=created_at))
+    with database.reader() as conn:
+        assert conn.execute("SELECT created_day FROM submissions").fetchone() == (20240102,)
+        assert conn.execute("SELECT day FROM stats_daily").fetchone() == (20240102,)
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT submission_id FROM submissions WHERE created_ts < ? ORDER BY created_ts",
+                (0,),
+            )
+        )
+    assert "idx_submissions_created" in plan
+    database.close()
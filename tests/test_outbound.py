@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+from telegram.error import RetryAfter
+
+from app.outbound import NOTIFY, PUBLISH, OutboundDispatcher, TokenBucket
+
+
+class FakeBot:
+    def __init__(self, flood_once: bool = False):
+        self.sent = []
+        self.flood_once = flood_once
+
+    async def send_message(self, chat_id: int, text: str):
+        if self.flood_once:
+            self.flood_once = False
+            raise RetryAfter(timedelta(0))
+        self.sent.append((chat_id, text))
+        return len(self.sent)
+
+
+def test_priority_and_per_chat_limits():
+    async def scenario():
+        bot = FakeBot()
+        outbound = OutboundDispatcher(global_rate=1000, private_rate=20, group_per_minute=1200)
+        # 同一私聊的桶只有 1 个令牌：第二条要等，期间其它会话和高优先级消息照常发送
+        sends = [
+            outbound.send(bot.send_message, chat_id=1, text="user-a", priority=NOTIFY),
+            outbound.send(bot.send_message, chat_id=1, text="user-b", priority=NOTIFY),
+            outbound.send(bot.send_message, chat_id=-100, text="channel", priority=PUBLISH),
+        ]
+        await asyncio.gather(*sends)
+        assert [text for _, text in bot.sent] == ["channel", "user-a", "user-b"]
+        stats = outbound.stats()
+        assert (stats["sent"], stats["queue_depth"], stats["failed"]) == (3, 0, 0)
+        assert stats["max_queue_wait"] >= 0.03
+        await outbound.close()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_is_retried_transparently():
+    async def scenario():
+        bot = FakeBot(flood_once=True)
+        outbound = OutboundDispatcher()
+        assert await outbound.send(bot.send_message, chat_id=5, text="hello") == 1
+        assert outbound.stats()["retry_after"] == 1
+        await outbound.close()
+        with pytest.raises(RuntimeError):
+            await outbound.send(bot.send_message, chat_id=5, text="late")
+
+    asyncio.run(scenario())
+
+
+def test_retry_keeps_order_within_chat():
+    async def scenario():
+        bot = FakeBot(flood_once=True)
+        outbound = OutboundDispatcher(global_rate=1000, group_per_minute=6000)
+        # 第一条（预览）遇到 RetryAfter，第二条（控制面板）不能抢在它前面
+        results = await asyncio.gather(
+            outbound.send(bot.send_message, chat_id=-100, text="preview"),
+            outbound.send(bot.send_message, chat_id=-100, text="panel"),
+        )
+        assert results == [1, 2]
+        assert [text for _, text in bot.sent] == ["preview", "panel"]
+        assert outbound.stats()["retry_after"] == 1
+        await outbound.close()
+
+    asyncio.run(scenario())
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=1, capacity=2, now=0)
+    bucket.take(0, 2)
+    assert bucket.wait_time(0) == pytest.approx(1)
+    bucket.pause(0, 5)
+    assert bucket.wait_time(1) == pytest.approx(4)
+    assert bucket.wait_time(6) == pytest.approx(0)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from app.services.profiles import ProfileCache
+
+
+class FakeBot:
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def get_chat(self, user_id: int):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("chat not found")
+        return SimpleNamespace(first_name="Alice", last_name="Liddell", username="alice")
+
+
+def test_concurrent_lookups_are_coalesced_and_cached():
+    async def scenario():
+        bot = FakeBot()
+        profiles = ProfileCache(max_size=8, ttl_seconds=60)
+        names = await asyncio.gather(*(profiles.display_name(bot, 7, "fallback") for _ in range(5)))
+        assert names == ["Alice Liddell"] * 5
+        assert await profiles.display_name(bot, 7, "fallback") == "Alice Liddell"
+        assert bot.calls == 1
+        stats = profiles.stats()
+        assert (stats["coalesced"], stats["hits"], stats["lookups"]) == (4, 1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_failed_lookup_falls_back_and_is_not_retried_immediately():
+    async def scenario():
+        bot = FakeBot(fail=True)
+        profiles = ProfileCache(max_size=8, ttl_seconds=60)
+        assert await profiles.display_name(bot, 9, "stored_name") == "stored_name"
+        assert await profiles.get(bot, 9) is None
+        assert bot.calls == 1
+        # 用户发来的消息会直接刷新资料
+        profiles.remember(SimpleNamespace(id=9, first_name="Bob", last_name=None, username=None))
+        assert await profiles.display_name(bot, 9, "stored_name") == "Bob"
+
+    asyncio.run(scenario())
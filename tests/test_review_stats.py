@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.database import Database
+from app.latency import latency_bucket, percentile
+from app.memory_database import InMemoryDatabase
+from app.models import SubmissionStatus
+from app.timeutil import add_days
+from conftest import create_submission
+
+NOW = datetime.now().replace(microsecond=0)
+CREATED = NOW - timedelta(hours=2)
+
+
+def _populate(backend):
+    # 20 条：第 i 条在创建后 i 分钟被审核，管理员 100 审了 15 条，管理员 200 审了 5 条
+    for index in range(1, 21):
+        backend.save_submission(create_submission(index, created_at=CREATED))
+        backend.update_fields(
+            index,
+            status=SubmissionStatus.APPROVED if index % 4 else SubmissionStatus.REJECTED,
+            decided_at=CREATED + timedelta(minutes=index),
+            decision_by=100 if index <= 15 else 200,
+        )
+    backend.save_submission(create_submission(21, created_at=CREATED))
+    backend.archive_decided(NOW + timedelta(days=1))
+
+
+def test_review_stats_match_memory_engine(tmp_path: Path):
+    sqlite_db = Database(db_path=str(tmp_path / "review.db"))
+    memory_db = InMemoryDatabase()
+    _populate(sqlite_db)
+    _populate(memory_db)
+    end = add_days(sqlite_db.time_buckets.today(), 1)
+    start = sqlite_db.time_buckets.days_ago(1)
+
+    stats = sqlite_db.get_review_stats(start, end)
+    assert stats == memory_db.get_review_stats(start, end)
+    assert stats.decisions == 20
+    assert [(m.admin_id, m.approved, m.rejected) for m in stats.moderators] == [(100, 12, 3), (200, 3, 2)]
+    # 对数分桶的相对误差在 20% 以内
+    assert 8 * 60 <= stats.p50 <= 12 * 60
+    assert 15 * 60 <= stats.p95 <= 23 * 60
+    assert sqlite_db.rebuild_stats() == []
+    sqlite_db.close()
+
+
+def test_percentile_of_empty_histogram():
+    assert percentile({}, 0.5) is None
+    assert percentile({latency_bucket(90): 1}, 0.5) is not None
+    assert latency_bucket(-5) == 0
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.async_database import AsyncDatabase
+from app.database import Database
+from app.memory_database import InMemoryDatabase
+from app.models import MediaFile, SubmissionStatus
+from app.rollups import DAY, HOUR, Period, parse_period, window
+from app.timeutil import hour_bucket
+from conftest import create_submission
+
+NOW = datetime(2024, 6, 30, 12, 30)
+
+
+def _populate(backend):
+    for index in range(40):
+        submission_id, user_id = index + 1, index % 3
+        submission = create_submission(
+            submission_id,
+            user_id=user_id,
+            username=f"user{user_id}",
+            media_files=[MediaFile(file_id=f"{submission_id}_{i}", file_type="photo") for i in range(index % 3)],
+            tags="#日常" if submission_id % 2 else "#福利 #日常",
+            created_at=NOW - timedelta(hours=index * 7),
+        )
+        backend.save_submission(submission)
+    backend.update_fields(1, status=SubmissionStatus.APPROVED)
+    backend.update_fields(2, status=SubmissionStatus.REJECTED, tags="#故事")
+    backend.update_fields(3, media_files=[MediaFile(file_id="replaced", file_type="video")])
+    backend.update_fields(4, created_at=NOW - timedelta(days=100))
+    backend.archive_decided(NOW)
+
+
+def _reports(backend):
+    day_window = window(backend.time_buckets, Period(DAY, 400, "400d"), now=NOW)
+    hour_window = window(backend.time_buckets, Period(HOUR, 72, "72h"), now=NOW)
+    return (
+        backend.get_rollups(DAY, *day_window),
+        backend.get_rollups(HOUR, *hour_window),
+        backend.get_tag_rollups("#日常", *day_window),
+    )
+
+
+def test_rollups_match_memory_engine(tmp_path: Path):
+    sqlite_db = Database(db_path=str(tmp_path / "rollups.db"))
+    memory_db = InMemoryDatabase()
+    _populate(sqlite_db)
+    _populate(memory_db)
+
+    daily, hourly, tag = _reports(sqlite_db)
+    assert (daily, hourly, tag) == _reports(memory_db)
+    assert sum(bucket.submissions for bucket in daily.buckets) == 40
+    assert sum(bucket.approved for bucket in daily.buckets) == 1
+    assert daily.unique_submitters == 3
+    assert sum(count for _, count in tag) == 39
+    sqlite_db.close()
+
+
+def test_history_is_backfilled_lazily(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "lazy.db"))
+    _populate(database)
+    expected = _reports(database)
+
+    # 模拟迁移前就存在的数据：汇总表为空，回填边界停在 NOW 所在的桶
+    with database.writer() as conn:
+        for table in ("rollup_hourly", "rollup_daily", "rollup_hourly_users", "rollup_tag_daily"):
+            conn.execute(f"DELETE FROM {table}")
+        pending = {DAY: database.time_buckets.day_of(NOW), HOUR: hour_bucket(NOW.timestamp())}
+        conn.executemany(
+            "UPDATE rollup_state SET pending_through = ? WHERE granularity = ?",
+            [(bucket, granularity) for granularity, bucket in pending.items()],
+        )
+
+    start = window(database.time_buckets, Period(DAY, 400, "400d"), now=NOW)[0]
+    # 读查询本身不写库：回填之前汇总表仍是空的
+    assert database.rollups_pending(DAY, start)
+    assert _reports(database) != expected
+    assert database.rollups_pending(DAY, start)
+
+    async def scenario():
+        # 经异步外观查询时，回填作为写操作交给写线程，读查询仍然只读
+        db = AsyncDatabase(database)
+        day_window = window(database.time_buckets, Period(DAY, 400, "400d"), now=NOW)
+        hour_window = window(database.time_buckets, Period(HOUR, 72, "72h"), now=NOW)
+        reports = (
+            await db.get_rollups(DAY, *day_window),
+            await db.get_rollups(HOUR, *hour_window),
+            await db.get_tag_rollups("#日常", *day_window),
+        )
+        state = await db.read(lambda conn: conn.execute("SELECT granularity, pending_through FROM rollup_state").fetchall())
+        await db.close()
+        return reports, dict(state)
+
+    reports, pending = asyncio.run(scenario())
+    assert reports == expected
+    assert pending[DAY] < start
+
+
+def test_parse_period():
+    assert parse_period("90d") == Period(DAY, 90, "90d")
+    assert parse_period("1Y") == Period(DAY, 365, "1y")
+    assert parse_period("48h") == Period(HOUR, 48, "48h")
+    assert parse_period("0d") is None
+    assert parse_period("abc") is None
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from app.models import SubmissionStatus
+from app.search import build_match_query
+from conftest import create_submission
+
+CAPTIONS = ["今天的日常分享", "日常自拍", "Hello happy world", "故事一则", "日常日常碎碎念"]
+
+
+@pytest.fixture
+def backend(backend):
+    for index, caption in enumerate(CAPTIONS):
+        backend.save_submission(
+            create_submission(
+                index + 1,
+                caption=caption,
+                tags="#日常" if index == 3 else "",
+                status=SubmissionStatus.APPROVED,
+                created_at=datetime(2024, 1, index + 1),
+            )
+        )
+    return backend
+
+
+def test_match_query_splits_cjk_and_escapes_syntax():
+    assert build_match_query('日常 "hap') == '"日 常"* "hap"*'
+    assert build_match_query("  ") is None
+
+
+def test_search_pages_through_all_hits_once(backend):
+    seen = []
+    page = backend.search_submissions("日常", limit=2)
+    seen.extend(submission.submission_id for submission in page.submissions)
+    while page.next_cursor is not None:
+        page = backend.search_submissions("日常", after=page.next_cursor, limit=2)
+        seen.extend(submission.submission_id for submission in page.submissions)
+
+    assert sorted(seen) == [1, 2, 4, 5]
+    assert [s.submission_id for s in backend.search_submissions("HAPP").submissions] == [3]
+    assert backend.search_submissions("日常 自拍").submissions[0].submission_id == 2
+
+
+def test_index_follows_updates_and_archiving(backend):
+    backend.update_fields(3, caption_only="goodbye")
+    assert backend.search_submissions("happy").submissions == []
+    assert [s.submission_id for s in backend.search_submissions("goodbye").submissions] == [3]
+
+    assert backend.archive_decided(datetime(2030, 1, 1)) == len(CAPTIONS)
+    assert [s.submission_id for s in backend.search_submissions("故事").submissions] == [4]
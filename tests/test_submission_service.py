@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from app.config import Settings
+from app.services.container import ServiceContainer
+
+
+class FakeBot:
+    def __init__(self):
+        self.previews = []
+        self.edits = []
+
+    async def send_photo(self, chat_id: int, photo: str, caption: str, **kwargs):
+        self.previews.append((chat_id, photo, caption))
+        return SimpleNamespace(chat_id=chat_id, message_id=len(self.previews))
+
+    async def edit_message_caption(self, chat_id: int, message_id: int, caption: str, **kwargs):
+        self.edits.append((chat_id, message_id, caption))
+
+
+def _album_update(group_id: str, file_id: str) -> SimpleNamespace:
+    user = SimpleNamespace(id=42, first_name="Tester", last_name=None, username="tester")
+    message = SimpleNamespace(
+        media_group_id=group_id,
+        from_user=user,
+        chat_id=42,
+        caption=None,
+        photo=[SimpleNamespace(file_id=file_id, file_unique_id=f"u-{file_id}")],
+        video=None,
+        document=None,
+    )
+    return SimpleNamespace(effective_message=message, message=message)
+
+
+def test_late_album_item_during_flush_joins_submission():
+    async def scenario():
+        container = ServiceContainer(Settings(storage_backend="memory", outbound_private_rate=1000))
+        service = container.submission_service
+        bot = FakeBot()
+        context = SimpleNamespace(bot=bot)
+
+        # 交付相册时让保存卡住，期间同组的下一条消息到达
+        release = asyncio.Event()
+        save_submission = container.db.save_submission
+
+        async def slow_save(submission):
+            await release.wait()
+            await save_submission(submission)
+
+        container.db.save_submission = slow_save
+        await service.handle_message(_album_update("album", "p1"), context)
+        flushing = asyncio.ensure_future(service.media_groups.flush_all())
+        await asyncio.sleep(0)
+        late = asyncio.ensure_future(service.handle_message(_album_update("album", "p2"), context))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(flushing, late)
+
+        album = service.album_submissions.get("album")
+        submission = await container.db.get_submission(album.submission_id)
+        pending = len(service.media_groups)
+        stats = service.media_group_stats()
+        await container.shutdown(None)
+        return submission, pending, stats, bot
+
+    submission, pending, stats, bot = asyncio.run(scenario())
+    assert [media.file_id for media in submission.media_files] == ["p1", "p2"]
+    assert pending == 0 and stats["late_items"] == 1
+    # 预览只发一次，随后更新为两张
+    assert len(bot.previews) == 1 and "单图" in bot.previews[0][2]
+    assert len(bot.edits) == 1 and "组图 (2张)" in bot.edits[0][2]
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from app.database import Database
+from app.models import SubmissionStatus
+from app.tags import merge_tags, parse_tags
+from conftest import create_submission
+
+
+@pytest.fixture
+def backend(backend):
+    backend.seed_tags(["#日常", "#福利"])
+    return backend
+
+
+def _usage(backend):
+    return {usage.name: usage.usage_count for usage in backend.get_popular_tags()}
+
+
+def test_parse_and_merge_tags():
+    assert parse_tags("#a  b #A ##c #") == ["#a", "#b", "#c"]
+    assert merge_tags("#日常 #Cat", ["#cat", "#新"]) == ["#新"]
+
+
+def test_counts_follow_inserts_edits_and_archiving(backend):
+    backend.save_submission(create_submission(1, tags="#日常 #Cat", status=SubmissionStatus.APPROVED))
+    backend.save_submission(create_submission(2, tags="#cat", status=SubmissionStatus.APPROVED))
+    backend.save_submission(create_submission(3, tags="", status=SubmissionStatus.APPROVED))
+    assert _usage(backend) == {"#Cat": 2, "#日常": 1, "#福利": 0}
+
+    backend.update_fields(1, tags="#福利")
+    backend.update_fields(3, tags="#cat #新")
+    assert _usage(backend) == {"#Cat": 2, "#福利": 1, "#新": 1, "#日常": 0}
+
+    backend.archive_decided(datetime(2030, 1, 1))
+    assert _usage(backend)["#Cat"] == 2
+    assert [s.submission_id for s in backend.get_submissions_by_tag("CAT")] == [3, 2]
+    assert [s.submission_id for s in backend.get_submissions_by_tag("#cat", before=3)] == [2]
+    assert backend.get_submissions_by_tag("#missing") == []
+
+
+def test_tag_listing_uses_index(tmp_path: Path):
+    # 只有一个读连接：trace 回调能看到 get_submissions_by_tag 实际执行的语句
+    database = Database(db_path=str(tmp_path / "plan.db"), read_pool_size=1)
+    database.save_submission(create_submission(1, tags="#a", status=SubmissionStatus.APPROVED))
+    statements = []
+    with database.reader() as conn:
+        conn.set_trace_callback(statements.append)
+    assert [s.submission_id for s in database.get_submissions_by_tag("#a", before=10)] == [1]
+
+    with database.reader() as conn:
+        conn.set_trace_callback(None)
+        listing = [sql for sql in statements if "FROM submission_tags" in sql]
+        assert len(listing) == 1
+        plan = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {listing[0]}"))
+    assert "SCAN" not in plan and "TEMP B-TREE" not in plan
+    database.close()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import io
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from app.database import Database
+from app.ids import id_timestamp_ms
+from app.models import MediaFile, SubmissionStatus
+from app.transfer import ExportFilter, export_submissions, import_submissions
+from conftest import create_submission
+
+
+def _seed(database: Database):
+    for i in range(5):
+        submission = create_submission(
+            i + 1,
+            user_id=i,
+            username=f"user{i}",
+            media_files=[MediaFile(file_id=f"file_{i}", file_type="photo", file_unique_id=f"u{i}")],
+            caption=f"caption {i}",
+            is_anonymous=i % 2 == 0,
+            tags="#tag",
+            status=SubmissionStatus.APPROVED if i < 3 else SubmissionStatus.PENDING,
+            created_at=datetime(2024, 1, i + 1),
+        )
+        database.save_submission(submission)
+    database.archive_decided(datetime(2024, 1, 2))
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_export_import_round_trip(tmp_path: Path, fmt: str):
+    source = Database(db_path=str(tmp_path / "source.db"))
+    _seed(source)
+
+    buffer = io.StringIO()
+    assert export_submissions(source, buffer, fmt) == 5
+
+    target = Database(db_path=str(tmp_path / "target.db"))
+    checkpoint = tmp_path / "import.progress"
+    buffer.seek(0)
+    assert import_submissions(target, buffer, fmt, batch_size=2, checkpoint=checkpoint) == 5
+    assert checkpoint.read_text() == "5"
+
+    # 检查点之后再次导入不会重复处理
+    buffer.seek(0)
+    assert import_submissions(target, buffer, fmt, checkpoint=checkpoint) == 0
+
+    for i in range(5):
+        assert target.get_submission(i + 1) == source.get_submission(i + 1)
+    with target.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM submissions_archive").fetchone()[0] == 1
+    source.close()
+    target.close()
+
+
+def test_export_filters_by_status_and_date(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "filter.db"))
+    _seed(database)
+
+    buffer = io.StringIO()
+    count = export_submissions(
+        database, buffer, "jsonl", ExportFilter(status="approved", since=datetime(2024, 1, 2))
+    )
+    assert count == 2
+    database.close()
+
+
+def test_import_assigns_integer_ids_to_legacy_records(tmp_path: Path):
+    database = Database(db_path=str(tmp_path / "legacy.db"))
+    record = (
+        '{"submission_id": "single_1_1700000000", "user_id": 1, "username": "u", "caption": "c", '
+        '"caption_only": "c", "is_anonymous": false, "tags": "", "status": "approved", '
+        '"created_at": "2024-03-01T00:00:00", "media_group_id": null, "admin_message_id": null, '
+        '"preview_message_id": null, "archived": false, '
+        '"media": [{"file_id": "f", "file_type": "photo", "caption": null, "file_unique_id": null}]}\n'
+    )
+    # 重复导入同一条旧记录只会保留一行
+    for _ in range(2):
+        import_submissions(database, io.StringIO(record), "jsonl")
+
+    submission_id = database.resolve_legacy_id("single_1_1700000000")
+    assert isinstance(submission_id, int)
+    with database.reader() as conn:
+        created_ts = conn.execute("SELECT created_ts FROM all_submissions").fetchone()[0]
+    assert id_timestamp_ms(submission_id) == created_ts * 1000
+    assert [m.file_id for m in database.get_media(submission_id)] == ["f"]
+    with database.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM submission_media").fetchone()[0] == 1
+    database.close()